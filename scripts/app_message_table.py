@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-"""Parse the APP.bin message handler table and emit a JSON index."""
+"""Parse the APP.bin message handler table and emit a JSON index.
+
+``--offset auto`` (or ``--discover`` for a ranked list) locates tables of
+``<handler_ptr, string_ptr, flag>`` triples anywhere in the image instead of
+relying on the known offset; see :func:`discover_tables`.
+"""
 
 from __future__ import annotations
 
@@ -7,9 +12,18 @@ import argparse
 import json
 import logging
 import struct
+import sys
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import List, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if __package__ in (None, ""):  # executed as `python3 scripts/app_message_table.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.string_table import StringTable, decode_text
+
+if TYPE_CHECKING:
+    import numpy as np
 
 LOGGER = logging.getLogger("app_message_table")
 
@@ -17,7 +31,14 @@ DEFAULT_INPUT = Path("data/raw/ZK-INKJET-NANO-APP.bin")
 DEFAULT_OUTPUT = Path("data/processed/app_message_table.json")
 DEFAULT_OFFSET = 0x001D3E00
 DEFAULT_BASE_ADDR = 0x0020_0000
+DEFAULT_DISCOVERY_OUTPUT = Path("data/processed/app_message_table_candidates.json")
 ENTRY_STRUCT = struct.Struct("<III")
+ENTRY_WORDS = ENTRY_STRUCT.size // 4
+MAX_FLAG = 0xFF
+MIN_TEXT_LENGTH = 2
+MIN_TABLE_ENTRIES = 4
+# Message-queue fields seen in the flag 2 handlers (docs/analysis/app_message_handlers.md).
+QUEUE_OFFSETS = (0x144, 0x14C, 0x164, 0x7D8)
 
 
 @dataclass(frozen=True)
@@ -33,20 +54,29 @@ class MessageEntry:
     text: str
 
 
+@dataclass(frozen=True)
+class TableCandidate:
+    """A run of consecutive plausible entries, ranked by :func:`discover_tables`."""
+
+    offset: int
+    entries: int
+    terminated: bool
+    distinct_strings: int
+    first_text: str
+
+
 def configure_logging(level: str) -> None:
     logging.basicConfig(level=getattr(logging, level.upper(), logging.INFO), format="%(levelname)s %(message)s")
 
 
-def decode_c_string(payload: bytes, offset: int) -> Tuple[str, int]:
+def decode_c_string(payload: bytes, offset: int, strings: Optional[StringTable] = None) -> Tuple[str, int]:
+    """Return ``(text, next offset)``; pass ``strings`` when decoding many pointers into one payload."""
+    if strings is not None:
+        return strings.text(offset), strings.end(offset) + 1
     end = payload.find(b"\x00", offset)
     if end == -1:
         raise ValueError(f"Missing NUL terminator for string at 0x{offset:X}.")
-    raw = payload[offset:end]
-    try:
-        text = raw.decode("utf-8")
-    except UnicodeDecodeError:
-        text = raw.decode("latin-1", errors="replace")
-    return text, end + 1  # next offset (including NUL)
+    return decode_text(payload[offset:end]), end + 1  # next offset (including NUL)
 
 
 def parse_message_table(
@@ -54,8 +84,10 @@ def parse_message_table(
     offset: int,
     base_addr: int,
     limit_entries: int | None = None,
+    strings: Optional[StringTable] = None,
 ) -> List[MessageEntry]:
     entries: List[MessageEntry] = []
+    strings = strings if strings is not None else StringTable(payload)
     total = len(payload)
     cursor = offset
 
@@ -78,7 +110,7 @@ def parse_message_table(
         if not (0 <= string_offset < total):
             raise ValueError(f"Entry {len(entries)} string pointer 0x{string_addr:X} outside payload.")
 
-        text, _ = decode_c_string(payload, string_offset)
+        text, _ = decode_c_string(payload, string_offset, strings)
 
         entries.append(
             MessageEntry(
@@ -98,6 +130,111 @@ def parse_message_table(
     return entries
 
 
+def printable_strings(
+    payload: bytes,
+    min_length: int = MIN_TEXT_LENGTH,
+    strings: Optional[StringTable] = None,
+) -> "np.ndarray":
+    """Boolean mask: ``True`` where a NUL-terminated printable string of ``min_length``+ bytes starts.
+
+    Printable means ASCII 0x20-0x7E, tab/CR/LF, or any byte >= 0x80 (UTF-8 and
+    GB2312 text both live in the high half).
+    """
+    import numpy as np
+
+    raw = np.frombuffer(payload, dtype=np.uint8)
+    size = raw.size
+    text_bytes = ((raw >= 0x20) & (raw != 0x7F)) | (raw == 0x09) | (raw == 0x0A) | (raw == 0x0D)
+    bad = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(~text_bytes & (raw != 0), out=bad[1:])
+
+    positions = np.arange(size, dtype=np.int64)
+    ends = (strings if strings is not None else StringTable(payload)).ends(positions)
+    return (ends >= 0) & (ends - positions >= min_length) & (bad[ends] == bad[positions])
+
+
+def entry_mask(
+    words: "np.ndarray",
+    strings: "np.ndarray",
+    size: int,
+    base_addr: int,
+    string_base: int = 0,
+    max_flag: int = MAX_FLAG,
+) -> "np.ndarray":
+    """``True`` at word index ``i`` when ``words[i:i + 3]`` looks like one table entry.
+
+    The handler must point into the image (Thumb bit allowed, ARM targets
+    word-aligned), the string pointer must land on a printable NUL-terminated
+    string and the flag must not exceed ``max_flag``.
+    """
+    import numpy as np
+
+    count = max(words.size - ENTRY_WORDS + 1, 0)
+    handler = words[:count].astype(np.int64)
+    string = words[1 : 1 + count].astype(np.int64) - string_base
+    flag = words[2 : 2 + count]
+
+    handler_offset = (handler & ~1) - base_addr
+    handler_ok = (handler_offset >= 0) & (handler_offset < size) & (((handler & 1) == 1) | (handler % 4 == 0))
+    string_ok = (string >= 0) & (string < size)
+    string_ok[string_ok] = strings[string[string_ok]]
+    return handler_ok & string_ok & (flag <= max_flag)
+
+
+def discover_tables(
+    payload: bytes,
+    base_addr: int = DEFAULT_BASE_ADDR,
+    string_base: int = 0,
+    max_flag: int = MAX_FLAG,
+    min_entries: int = MIN_TABLE_ENTRIES,
+    min_text_length: int = MIN_TEXT_LENGTH,
+    strings: Optional[StringTable] = None,
+) -> List[TableCandidate]:
+    """Rank every 4-byte-aligned run of plausible entries, longest first.
+
+    All offsets are scored in one vectorized pass: :func:`entry_mask` marks
+    entry starts, and runs are measured separately for each of the three word
+    phases, because entries repeat every 12 bytes.  String pointers are file
+    offsets plus ``string_base``, as in :func:`parse_message_table`.  A run
+    followed by an all-zero sentinel ranks above an equally long one without.
+    Pass ``strings`` to reuse a :class:`StringTable` of ``payload``.
+    """
+    import numpy as np
+
+    words = np.frombuffer(payload, dtype="<u4", count=len(payload) // 4)
+    table = strings if strings is not None else StringTable(payload)
+    printable = printable_strings(payload, min_text_length, table)
+    valid = entry_mask(words, printable, len(payload), base_addr, string_base, max_flag)
+
+    heads: List[Tuple[int, int]] = []
+    for phase in range(ENTRY_WORDS):
+        column = valid[phase::ENTRY_WORDS]
+        positions = np.arange(column.size)
+        breaks = np.append(np.flatnonzero(~column), column.size)
+        lengths = breaks[np.searchsorted(breaks, positions)] - positions
+        starts = column & np.concatenate(([True], ~column[:-1]))
+        for position in np.flatnonzero(starts & (lengths >= min_entries)).tolist():
+            heads.append((phase + position * ENTRY_WORDS, int(lengths[position])))
+
+    candidates: List[TableCandidate] = []
+    for word_index, length in heads:
+        end = word_index + length * ENTRY_WORDS
+        sentinel = words[end : end + ENTRY_WORDS]
+        string_ptrs = words[word_index + 1 : end : ENTRY_WORDS]
+        first_text = table.text(int(string_ptrs[0]) - string_base)
+        candidates.append(
+            TableCandidate(
+                offset=word_index * 4,
+                entries=length,
+                terminated=sentinel.size == ENTRY_WORDS and not sentinel.any(),
+                distinct_strings=int(np.unique(string_ptrs).size),
+                first_text=first_text,
+            )
+        )
+    candidates.sort(key=lambda item: (-item.entries, not item.terminated, item.offset))
+    return candidates
+
+
 def build_summary(entries: Sequence[MessageEntry]) -> dict:
     by_flag: dict[int, int] = {}
     for entry in entries:
@@ -112,10 +249,46 @@ def build_summary(entries: Sequence[MessageEntry]) -> dict:
     }
 
 
-def write_index(path: Path, header: dict, entries: Sequence[MessageEntry]) -> None:
+def enrich_handlers(
+    payload: bytes,
+    entries: Sequence[MessageEntry],
+    base_addr: int,
+    max_bytes: int | None = None,
+) -> Dict[int, dict]:
+    """Disassembly summary per distinct handler pointer (mode from the Thumb bit), decoded once each."""
+    from scripts.arm_disasm import DEFAULT_MAX_FUNCTION_BYTES, FunctionDecoder
+
+    decoder = FunctionDecoder(payload, base_addr, max_bytes or DEFAULT_MAX_FUNCTION_BYTES)
+    summaries: Dict[int, dict] = {}
+    for entry in entries:
+        if entry.handler_addr in summaries:
+            continue
+        try:
+            summary = decoder.summary(entry.handler_addr)
+        except ValueError as exc:
+            LOGGER.warning("Entry %d: %s", entry.index, exc)
+            continue
+        record = summary.to_dict()
+        record["queue_offsets"] = [f"0x{value:X}" for value in summary.struct_offsets if value in QUEUE_OFFSETS]
+        summaries[entry.handler_addr] = record
+    return summaries
+
+
+def write_index(
+    path: Path,
+    header: dict,
+    entries: Sequence[MessageEntry],
+    handlers: Optional[Dict[int, dict]] = None,
+) -> None:
+    records = []
+    for entry in entries:
+        record = asdict(entry)
+        if handlers is not None and entry.handler_addr in handlers:
+            record["handler"] = handlers[entry.handler_addr]
+        records.append(record)
     payload = {
         "metadata": header,
-        "entries": [asdict(entry) for entry in entries],
+        "entries": records,
     }
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
@@ -125,7 +298,12 @@ def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("-i", "--input", type=Path, default=DEFAULT_INPUT, help="APP.bin path.")
     parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="Output JSON path.")
-    parser.add_argument("--offset", type=lambda value: int(value, 0), default=DEFAULT_OFFSET, help="Table offset in file.")
+    parser.add_argument(
+        "--offset",
+        type=lambda value: value if value == "auto" else int(value, 0),
+        default=DEFAULT_OFFSET,
+        help="Table offset in file, or 'auto' to use the top-ranked discovered table.",
+    )
     parser.add_argument(
         "--base-addr",
         type=lambda value: int(value, 0),
@@ -133,15 +311,72 @@ def main() -> None:
         help="Load address base used to convert handler addresses to file offsets.",
     )
     parser.add_argument("--limit", type=int, default=None, help="Optional limit for the number of entries to parse.")
+    parser.add_argument(
+        "--discover",
+        action="store_true",
+        help=f"Write ranked table candidates (default: {DEFAULT_DISCOVERY_OUTPUT}) instead of parsing one table.",
+    )
+    parser.add_argument(
+        "--string-base",
+        type=lambda value: int(value, 0),
+        default=0,
+        help="Value subtracted from string pointers to get file offsets during discovery (default: 0).",
+    )
+    parser.add_argument(
+        "--max-flag", type=lambda value: int(value, 0), default=MAX_FLAG, help="Largest plausible flag value."
+    )
+    parser.add_argument("--min-entries", type=int, default=MIN_TABLE_ENTRIES, help="Shortest table reported.")
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Add a disassembly summary (callees, MMIO literals, queue offsets) for each handler (needs capstone).",
+    )
+    parser.add_argument(
+        "--max-handler-bytes",
+        type=lambda value: int(value, 0),
+        default=None,
+        help="Stop decoding a handler after this many bytes if no return is found (default: 0x1000).",
+    )
     parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
     args = parser.parse_args()
 
     configure_logging(args.log_level)
     LOGGER.info("Reading %s", args.input)
     payload = args.input.read_bytes()
+    # One NUL index serves discovery and parsing.
+    strings = StringTable(payload)
+
+    if args.discover or args.offset == "auto":
+        candidates = discover_tables(
+            payload, args.base_addr, args.string_base, args.max_flag, args.min_entries, strings=strings
+        )
+        LOGGER.info("Found %d table candidate(s)", len(candidates))
+        for candidate in candidates[:10]:
+            LOGGER.info(
+                "  0x%08X: %d entries%s, first %r",
+                candidate.offset,
+                candidate.entries,
+                " + sentinel" if candidate.terminated else "",
+                candidate.first_text,
+            )
+        if args.discover:
+            output = DEFAULT_DISCOVERY_OUTPUT if args.output == DEFAULT_OUTPUT else args.output
+            output.parent.mkdir(parents=True, exist_ok=True)
+            document = {
+                "input": str(args.input),
+                "base_addr": args.base_addr,
+                "string_base": args.string_base,
+                "candidates": [asdict(candidate) for candidate in candidates],
+            }
+            output.write_text(json.dumps(document, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            LOGGER.info("Wrote %s", output)
+            return
+        if not candidates:
+            raise SystemExit("No message table candidates found.")
+        args.offset = candidates[0].offset
 
     LOGGER.info("Parsing message table at 0x%X", args.offset)
-    entries = parse_message_table(payload, args.offset, args.base_addr, limit_entries=args.limit)
+    entries = parse_message_table(payload, args.offset, args.base_addr, limit_entries=args.limit, strings=strings)
     LOGGER.info("Recovered %d entries", len(entries))
 
     header = {
@@ -151,8 +386,14 @@ def main() -> None:
         "summary": build_summary(entries),
     }
 
+    handlers = None
+    if args.enrich:
+        handlers = enrich_handlers(payload, entries, args.base_addr, args.max_handler_bytes)
+        LOGGER.info("Summarised %d distinct handler(s)", len(handlers))
+        header["enriched_handlers"] = len(handlers)
+
     LOGGER.info("Writing index to %s", args.output)
-    write_index(args.output, header, entries)
+    write_index(args.output, header, entries, handlers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Shared Capstone helpers for the ARM/Thumb firmware images.
+
+Tools that disassemble the APP/BOOT images share one detail-enabled ``Cs``
+instance per mode (:func:`disassembler`).  :class:`FunctionDecoder`
+summarises whole functions (callees, literal-pool constants, MMIO
+addresses, structure field offsets) and keeps every summary, so a function
+reached from many places is decoded only once.  Given a
+:class:`scripts.disasm_cache.DisasmCache`, it reads instructions from the
+persistent cache instead of calling Capstone.
+
+Code pointers follow the firmware convention: bit 0 set means Thumb.
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+try:
+    from capstone import CS_ARCH_ARM, CS_MODE_ARM, CS_MODE_THUMB, Cs  # type: ignore
+    from capstone.arm import (  # type: ignore
+        ARM_CC_AL,
+        ARM_CC_INVALID,
+        ARM_INS_BL,
+        ARM_INS_BLX,
+        ARM_OP_IMM,
+        ARM_OP_MEM,
+        ARM_OP_REG,
+    )
+except ImportError as exc:  # pragma: no cover - prefer explicit hint
+    raise SystemExit("capstone module is required; install with `python3 -m pip install capstone`") from exc
+
+from scripts.mapped_input import Buffer
+
+if TYPE_CHECKING:
+    from scripts.disasm_cache import DisasmCache
+
+MODES = ("arm", "thumb")
+DEFAULT_MAX_FUNCTION_BYTES = 0x1000
+MMIO_RANGE = (0xB000_0000, 0xC000_0000)
+# Field offsets below this are too common (small structs, stack slots) to be interesting.
+MIN_STRUCT_OFFSET = 0x40
+UNCONDITIONAL = (ARM_CC_AL, ARM_CC_INVALID)
+LOCAL_BRANCH = re.compile(r"^(b|cbn?z)(eq|ne|cs|hs|cc|lo|mi|pl|vs|vc|hi|ls|ge|lt|gt|le|al)?(\.w|\.n)?$")
+
+
+@dataclass(frozen=True)
+class FunctionSummary:
+    """What one decoded function touches; ``callees`` are code pointers (Thumb bit set for Thumb)."""
+
+    address: int
+    mode: str
+    size: int
+    instruction_count: int
+    returns: bool
+    callees: Tuple[int, ...]
+    indirect_calls: int
+    literals: Tuple[int, ...]
+    mmio: Tuple[int, ...]
+    struct_offsets: Tuple[int, ...]
+
+    @property
+    def pointer(self) -> int:
+        return code_pointer(self.address, self.mode)
+
+    def to_dict(self) -> dict:
+        return {
+            "address": f"0x{self.address:08X}",
+            "mode": self.mode,
+            "size": self.size,
+            "instruction_count": self.instruction_count,
+            "returns": self.returns,
+            "callees": [f"0x{callee:08X}" for callee in self.callees],
+            "indirect_calls": self.indirect_calls,
+            "literals": [f"0x{value:08X}" for value in self.literals],
+            "mmio": [f"0x{value:08X}" for value in self.mmio],
+            "struct_offsets": [f"0x{value:X}" for value in self.struct_offsets],
+        }
+
+
+@lru_cache(maxsize=None)
+def disassembler(mode: str) -> Cs:
+    """The shared detail-enabled Capstone instance for ``mode`` (``"arm"`` or ``"thumb"``)."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}.")
+    instance = Cs(CS_ARCH_ARM, CS_MODE_THUMB if mode == "thumb" else CS_MODE_ARM)
+    instance.detail = True
+    return instance
+
+
+def split_pointer(pointer: int) -> Tuple[int, str]:
+    """``(address, mode)`` for a code pointer whose bit 0 selects Thumb."""
+    return pointer & ~1, "thumb" if pointer & 1 else "arm"
+
+
+def code_pointer(address: int, mode: str) -> int:
+    return address | 1 if mode == "thumb" else address
+
+
+def literal_address(insn, mode: str, disp: int) -> int:
+    """Target of a PC-relative load (Thumb reads PC word-aligned)."""
+    pc = insn.address + (4 if mode == "thumb" else 8)
+    return (pc & ~3) + disp
+
+
+def is_mmio(value: int) -> bool:
+    return MMIO_RANGE[0] <= value < MMIO_RANGE[1]
+
+
+def is_return(insn) -> bool:
+    """Unconditional ``bx lr``, ``mov pc, lr``, ``pop``/``ldm`` into PC or ``ldr pc, [sp], ...``."""
+    if insn.cc not in UNCONDITIONAL:
+        return False
+    mnemonic = insn.mnemonic.split(".")[0]
+    op_str = insn.op_str.replace(" ", "").lower()
+    if mnemonic == "bx":
+        return op_str == "lr"
+    if mnemonic == "mov":
+        return op_str == "pc,lr"
+    if mnemonic in ("pop", "ldm", "ldmia", "ldmfd"):
+        return "pc" in op_str.replace("{", "").replace("}", "").split(",")
+    if mnemonic == "ldr":
+        return op_str.startswith("pc,[sp]")
+    return False
+
+
+def call_target(insn, mode: str) -> Optional[int]:
+    """Code pointer called by a direct ``bl``/``blx`` (``blx imm`` switches mode), else ``None``."""
+    if insn.id not in (ARM_INS_BL, ARM_INS_BLX) or not insn.operands:
+        return None
+    operand = insn.operands[0]
+    if operand.type != ARM_OP_IMM:
+        return None
+    target_mode = mode if insn.id == ARM_INS_BL else ("arm" if mode == "thumb" else "thumb")
+    return code_pointer(operand.imm & 0xFFFFFFFE, target_mode)
+
+
+def branch_target(insn) -> Optional[int]:
+    """Destination of a local ``b``/``cbz``/``cbnz`` (not calls)."""
+    if not LOCAL_BRANCH.match(insn.mnemonic):
+        return None
+    for operand in insn.operands:
+        if operand.type == ARM_OP_IMM:
+            return operand.imm & 0xFFFFFFFF
+    return None
+
+
+class FunctionDecoder:
+    """Decode functions of one image on demand, caching each summary by ``(address, mode)``.
+
+    A function runs from its entry to the first unconditional return (or
+    unconditional branch) that no earlier forward branch jumps past, capped
+    at ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        payload: Buffer,
+        base_addr: int,
+        max_bytes: int = DEFAULT_MAX_FUNCTION_BYTES,
+        cache: Optional["DisasmCache"] = None,
+    ) -> None:
+        self.payload = payload
+        self.base_addr = base_addr
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self._cache: Dict[Tuple[int, str], FunctionSummary] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def read_u32(self, address: int) -> Optional[int]:
+        offset = address - self.base_addr
+        if offset < 0 or offset + 4 > len(self.payload):
+            return None
+        return struct.unpack_from("<I", self.payload, offset)[0]
+
+    def summary(self, pointer: int) -> FunctionSummary:
+        return self.decode(*split_pointer(pointer))
+
+    def decode(self, address: int, mode: str) -> FunctionSummary:
+        key = (address, mode)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._cache[key] = self._decode(address, mode)
+        return cached
+
+    def _decode(self, address: int, mode: str) -> FunctionSummary:
+        offset = address - self.base_addr
+        if offset < 0 or offset >= len(self.payload):
+            raise ValueError(f"Function 0x{address:08X} lies outside the image.")
+        if self.cache is not None:
+            instructions = self.cache.disasm(address, self.max_bytes, mode)
+        else:
+            instructions = disassembler(mode).disasm(bytes(self.payload[offset : offset + self.max_bytes]), address)
+        callees: List[int] = []
+        literals: List[int] = []
+        offsets: Set[int] = set()
+        halves: Dict[str, int] = {}
+        indirect = 0
+        count = 0
+        end = address
+        furthest = address
+        returns = False
+
+        for insn in instructions:
+            count += 1
+            end = insn.address + insn.size
+            target = call_target(insn, mode)
+            if target is not None:
+                if target not in callees:
+                    callees.append(target)
+            elif insn.id in (ARM_INS_BL, ARM_INS_BLX):
+                indirect += 1
+            self._collect_constants(insn, mode, literals, offsets, halves)
+
+            local = branch_target(insn)
+            if local is not None and insn.address < local < address + self.max_bytes:
+                furthest = max(furthest, local)
+            if insn.address < furthest:
+                continue
+            if is_return(insn):
+                returns = True
+                break
+            if insn.cc in UNCONDITIONAL and insn.mnemonic.split(".")[0] in ("b", "bx"):
+                break  # tail jump or loop back with nothing pending after it
+
+        return FunctionSummary(
+            address=address,
+            mode=mode,
+            size=end - address,
+            instruction_count=count,
+            returns=returns,
+            callees=tuple(callees),
+            indirect_calls=indirect,
+            literals=tuple(literals),
+            mmio=tuple(sorted({value for value in literals if is_mmio(value)})),
+            struct_offsets=tuple(sorted(offsets)),
+        )
+
+    def _collect_constants(
+        self,
+        insn,
+        mode: str,
+        literals: List[int],
+        offsets: Set[int],
+        halves: Dict[str, int],
+    ) -> None:
+        operands = insn.operands
+        mnemonic = insn.mnemonic.split(".")[0]
+        for operand in operands:
+            if operand.type != ARM_OP_MEM or operand.mem.base == 0:
+                continue
+            base = insn.reg_name(operand.mem.base)
+            if base == "pc" and mnemonic == "ldr":
+                value = self.read_u32(literal_address(insn, mode, operand.mem.disp))
+                if value is not None and value not in literals:
+                    literals.append(value)
+            elif base not in ("pc", "sp") and operand.mem.disp >= MIN_STRUCT_OFFSET:
+                offsets.add(operand.mem.disp)
+
+        if len(operands) < 2 or operands[0].type != ARM_OP_REG or operands[-1].type != ARM_OP_IMM:
+            return
+        dest = insn.reg_name(operands[0].reg)
+        imm = operands[-1].imm & 0xFFFFFFFF
+        if mnemonic == "movw":
+            halves[dest] = imm & 0xFFFF
+        elif mnemonic == "movt" and dest in halves:
+            value = ((imm & 0xFFFF) << 16) | halves.pop(dest)
+            if value not in literals:
+                literals.append(value)
+        elif mnemonic in ("add", "adds", "sub", "subs") and len(operands) == 3 and imm >= MIN_STRUCT_OFFSET:
+            if operands[1].type == ARM_OP_REG and insn.reg_name(operands[1].reg) not in ("pc", "sp"):
+                offsets.add(imm)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Multi-resolution entropy/structure heatmaps for firmware blobs.
+
+The blob is read once into 256-bin histograms and pointer counts of
+``levels[0]``-byte blocks.  Every coarser level (a multiple of the finest
+window) is built by summing adjacent blocks, so the whole pyramid costs one
+pass over the bytes.  Each metric becomes one PNG strip, with one band per
+window size and the image offset running left to right.  The raw series
+go to a compact ``.npz`` next to the PNGs.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+from PIL import Image
+
+from scripts.mapped_input import Buffer
+from scripts.reshw_probe import pointer_mask
+
+LOGGER = logging.getLogger("blob_heatmap")
+
+DEFAULT_LEVELS = (256, 1024, 4096, 16384, 65536)
+DEFAULT_WIDTH = 1024
+METRICS = ("entropy", "ascii", "zero", "pointers")
+BAND_HEIGHT = 16
+HISTOGRAM_BATCH_BLOCKS = 4096
+# Black -> red -> yellow -> white, sampled at 0, 1/3, 2/3 and 1.
+PALETTE_STOPS = np.array([0.0, 1 / 3, 2 / 3, 1.0])
+PALETTE_RGB = np.array([[0, 0, 0], [200, 30, 30], [250, 210, 40], [255, 255, 255]], dtype=np.float64)
+
+
+def parse_levels(value: str) -> List[int]:
+    levels = sorted({int(part, 0) for part in value.split(",") if part.strip()})
+    if not levels or levels[0] % 4:
+        raise ValueError("The finest level must be a positive multiple of 4 bytes.")
+    if any(level % levels[0] for level in levels):
+        raise ValueError("Every level must be a multiple of the finest level.")
+    return levels
+
+
+def block_histograms(payload: Buffer, block: int) -> np.ndarray:
+    """``(n_blocks, 256)`` byte histograms of consecutive ``block``-byte blocks (tail dropped)."""
+    data = np.frombuffer(payload, dtype=np.uint8)
+    count = data.size // block
+    histograms = np.zeros((count, 256), dtype=np.int32)
+    for first in range(0, count, HISTOGRAM_BATCH_BLOCKS):
+        last = min(count, first + HISTOGRAM_BATCH_BLOCKS)
+        chunk = data[first * block : last * block]
+        bins = np.repeat(np.arange(last - first, dtype=np.int64) * 256, block) + chunk
+        histograms[first:last] = np.bincount(bins, minlength=(last - first) * 256).reshape(-1, 256)
+    return histograms
+
+
+def compute_pyramid(payload: Buffer, levels: Sequence[int], base_addr: int) -> Dict[str, np.ndarray]:
+    """Return ``{"<metric>_<window>": series}`` for every metric and level, plus ``levels``."""
+    finest = levels[0]
+    histograms = block_histograms(payload, finest)
+    words = pointer_mask(payload, base_addr)
+    pointers = words[: histograms.shape[0] * finest // 4].reshape(histograms.shape[0], finest // 4).sum(axis=1)
+
+    series: Dict[str, np.ndarray] = {"levels": np.asarray(levels, dtype=np.int64)}
+    for level in levels:
+        factor = level // finest
+        count = histograms.shape[0] // factor
+        counts = histograms[: count * factor].reshape(count, factor, 256).sum(axis=1, dtype=np.int64)
+        xlogx = counts * np.log2(np.maximum(counts, 1))
+        series[f"entropy_{level}"] = (np.log2(level) - xlogx.sum(axis=1) / level).astype(np.float32)
+        series[f"ascii_{level}"] = (counts[:, 32:127].sum(axis=1) / level).astype(np.float32)
+        series[f"zero_{level}"] = (counts[:, 0] / level).astype(np.float32)
+        level_pointers = pointers[: count * factor].reshape(count, factor).sum(axis=1)
+        series[f"pointers_{level}"] = (level_pointers / (level // 4)).astype(np.float32)
+    return series
+
+
+def resample(values: np.ndarray, width: int) -> np.ndarray:
+    """Mean of ``values`` over ``width`` equal column spans (or the values themselves if shorter)."""
+    if values.size <= width:
+        return values
+    edges = np.linspace(0, values.size, width + 1).astype(np.int64)[:-1]
+    sums = np.add.reduceat(values.astype(np.float64), edges)
+    lengths = np.diff(np.append(edges, values.size))
+    return sums / lengths
+
+
+def colourize(values: np.ndarray) -> np.ndarray:
+    clipped = np.clip(values, 0.0, 1.0)
+    channels = [np.interp(clipped, PALETTE_STOPS, PALETTE_RGB[:, channel]) for channel in range(3)]
+    return np.stack(channels, axis=-1).astype(np.uint8)
+
+
+def render_strip(series: Dict[str, np.ndarray], metric: str, width: int) -> Image.Image:
+    """One band per level, all stretched to ``width`` columns; 1px black gaps between bands."""
+    levels = series["levels"].tolist()
+    scale = 8.0 if metric == "entropy" else 1.0
+    height = len(levels) * (BAND_HEIGHT + 1) - 1
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    for band, level in enumerate(levels):
+        values = resample(series[f"{metric}_{level}"], width) / scale
+        if values.size == 0:
+            continue
+        columns = np.linspace(0, values.size, width, endpoint=False).astype(np.int64)
+        top = band * (BAND_HEIGHT + 1)
+        canvas[top : top + BAND_HEIGHT] = colourize(values[columns])[np.newaxis, :, :]
+    return Image.fromarray(canvas, mode="RGB")
+
+
+def write_heatmaps(series: Dict[str, np.ndarray], prefix: Path, width: int = DEFAULT_WIDTH) -> List[Path]:
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    for metric in METRICS:
+        path = prefix.with_name(f"{prefix.name}_{metric}.png")
+        render_strip(series, metric, width).save(path)
+        written.append(path)
+    npz_path = prefix.with_name(f"{prefix.name}.npz")
+    with npz_path.open("wb") as handle:
+        np.savez_compressed(handle, **series)
+    written.append(npz_path)
+    LOGGER.debug("Wrote %s", ", ".join(str(path) for path in written))
+    return written
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Persistent inverse call index (target -> call sites) for ARM/Thumb images.
+
+Every direct ``bl``/``blx imm`` in the image is decoded once, for both
+modes, with :mod:`scripts.branch_scan`.  Edges whose target falls outside
+the image are dropped, since those are almost always data.  The rest are
+stored sorted by target, so looking up the callers of any address is a
+binary search.  Index files are keyed by the image's SHA-256 and the base
+address, like :mod:`scripts.string_index`, and are rebuilt only when
+either changes.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from scripts.branch_scan import CallEdges, image_calls
+from scripts.mapped_input import Buffer, open_mapped
+from scripts.string_index import file_sha256
+
+LOGGER = logging.getLogger("call_index")
+
+DEFAULT_INDEX_DIR = Path("data/processed/call_index")
+SCHEMA_VERSION = 1
+MODES = ("thumb", "arm")
+
+
+class CallIndex:
+    """Direct call edges of one image, per mode, sorted by target."""
+
+    def __init__(self, edges: Dict[str, CallEdges], meta: dict) -> None:
+        self.edges = edges
+        self.meta = meta
+
+    def __len__(self) -> int:
+        return sum(len(edges) for edges in self.edges.values())
+
+    @classmethod
+    def build(cls, payload: Buffer, base_addr: int, meta: dict | None = None) -> "CallIndex":
+        end = base_addr + len(payload)
+        edges: Dict[str, CallEdges] = {}
+        for mode in MODES:
+            decoded = image_calls(payload, base_addr, mode)
+            decoded = decoded.select((decoded.targets >= base_addr) & (decoded.targets < end))
+            edges[mode] = decoded.select(np.lexsort((decoded.sites, decoded.targets)))
+        return cls(edges, dict(meta or {}, base_addr=base_addr, size=len(payload)))
+
+    def callers(self, target: int, mode: str) -> CallEdges:
+        """``mode`` call sites whose target is ``target`` (Thumb bit ignored), ordered by site."""
+        edges = self.edges[mode]
+        key = target & ~1
+        low = int(np.searchsorted(edges.targets, key, side="left"))
+        high = int(np.searchsorted(edges.targets, key, side="right"))
+        return edges.select(slice(low, high))  # type: ignore[arg-type]
+
+    def save(self, path: Path) -> None:
+        """Write an ``.npz`` next to ``path`` and rename it into place."""
+        arrays = {"meta": np.array(json.dumps(dict(self.meta, schema_version=SCHEMA_VERSION)))}
+        for mode, edges in self.edges.items():
+            arrays[f"{mode}_sites"] = edges.sites.astype(np.uint32)
+            arrays[f"{mode}_targets"] = edges.targets.astype(np.uint32)
+            arrays[f"{mode}_exchange"] = edges.exchange
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+        with tmp_path.open("wb") as handle:
+            np.savez(handle, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CallIndex":
+        with np.load(path) as archive:
+            meta = json.loads(str(archive["meta"]))
+            if int(meta.get("schema_version", 0)) != SCHEMA_VERSION:
+                raise ValueError(f"{path} uses an unsupported call index schema.")
+            edges = {
+                mode: CallEdges(
+                    mode,
+                    archive[f"{mode}_sites"].astype(np.int64),
+                    archive[f"{mode}_targets"].astype(np.int64),
+                    archive[f"{mode}_exchange"],
+                )
+                for mode in MODES
+            }
+        return cls(edges, meta)
+
+
+def index_path(index_dir: Path, sha256: str, base_addr: int) -> Path:
+    return index_dir / f"{sha256}-base{base_addr:08X}.npz"
+
+
+def load_or_build(source: Path, base_addr: int, index_dir: Path = DEFAULT_INDEX_DIR) -> CallIndex:
+    """Open the call index for ``source``/``base_addr``, building it on first use."""
+    sha256 = file_sha256(source, index_dir)
+    path = index_path(index_dir, sha256, base_addr)
+    if path.exists():
+        try:
+            LOGGER.info("Using call index %s", path)
+            return CallIndex.load(path)
+        except (OSError, ValueError, KeyError) as exc:
+            LOGGER.warning("Discarding unreadable call index %s (%s)", path, exc)
+            path.unlink()
+
+    LOGGER.info("Building call index %s", path)
+    with open_mapped(source) as payload:
+        index = CallIndex.build(payload, base_addr, {"sha256": sha256, "source": str(source)})
+    index.save(path)
+    return index
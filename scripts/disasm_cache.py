@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Persistent, memory-mapped store of decoded ARM/Thumb instructions.
+
+One cache directory exists per image, keyed by SHA-256 and base address.
+Inside it, each mode (ARM/Thumb) has fixed-width columns with one slot per
+aligned offset, so an instruction's address is implied by its slot:
+
+* ``size``: ``0`` means not decoded yet, :data:`INVALID` means Capstone rejected it
+* ``insn_id``, ``cc``, ``mnemonic`` and ``op_str`` (ids into interned string tables)
+* an operand summary: count, then type/register/value of the first :data:`MAX_OPERANDS` operands
+
+Columns are ``np.memmap`` files that start sparse.  Whichever tool first
+decodes a range fills them; later runs read the range back without calling
+Capstone.  Records returned by :meth:`DisasmCache.disasm` expose the
+attributes the repo's tools use on Capstone instructions (``id``, ``cc``,
+``mnemonic``, ``op_str``, ``bytes``, ``operands`` with ``type``/``reg``/
+``imm``/``mem``, ``reg_name``), so either source can feed them.
+
+Thumb ``IT`` blocks are decoded in the context of the range that first
+reached them, the same way a single Capstone sweep would.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from capstone.arm import ARM_OP_IMM, ARM_OP_MEM, ARM_OP_REG  # type: ignore
+
+from scripts.arm_disasm import MODES, disassembler
+from scripts.mapped_input import Buffer
+from scripts.string_index import file_sha256
+
+LOGGER = logging.getLogger("disasm_cache")
+
+DEFAULT_CACHE_DIR = Path("data/processed/disasm_cache")
+SCHEMA_VERSION = 1
+INVALID = 0xFF
+MAX_OPERANDS = 3
+ALIGNMENT = {"arm": 4, "thumb": 2}
+READ_BLOCK_SLOTS = 1024
+# (column, dtype, values per slot)
+COLUMNS = (
+    ("size", np.uint8, 1),
+    ("insn_id", np.uint16, 1),
+    ("cc", np.uint8, 1),
+    ("mnemonic", np.uint16, 1),
+    ("op_str", np.uint32, 1),
+    ("op_count", np.uint8, 1),
+    ("op_type", np.uint8, MAX_OPERANDS),
+    ("op_reg", np.uint16, MAX_OPERANDS),
+    ("op_value", np.int32, MAX_OPERANDS),
+)
+
+
+class CachedMem:
+    __slots__ = ("base", "disp")
+
+    def __init__(self, base: int, disp: int) -> None:
+        self.base = base
+        self.disp = disp
+
+
+class CachedOperand:
+    """Capstone-compatible view of one stored operand (``imm`` and ``mem.disp`` are signed 32-bit)."""
+
+    __slots__ = ("type", "reg", "imm", "mem")
+
+    def __init__(self, type_: int, reg: int, value: int) -> None:
+        self.type = type_
+        self.reg = reg
+        self.imm = value
+        self.mem = CachedMem(reg, value) if type_ == ARM_OP_MEM else CachedMem(0, 0)
+
+    @property
+    def value(self) -> "CachedOperand":
+        return self
+
+
+class CachedInsn:
+    __slots__ = ("address", "size", "id", "cc", "mnemonic", "op_str", "operands", "bytes", "mode")
+
+    def __init__(
+        self,
+        address: int,
+        size: int,
+        insn_id: int,
+        cc: int,
+        mnemonic: str,
+        op_str: str,
+        operands: Tuple[CachedOperand, ...],
+        raw: bytes,
+        mode: str,
+    ) -> None:
+        self.address = address
+        self.size = size
+        self.id = insn_id
+        self.cc = cc
+        self.mnemonic = mnemonic
+        self.op_str = op_str
+        self.operands = operands
+        self.bytes = raw
+        self.mode = mode
+
+    def reg_name(self, reg: int) -> str:
+        return disassembler(self.mode).reg_name(reg)
+
+
+class _Interned:
+    """Append-only string table, one entry per line, shared by every open cache.
+
+    New entries are written through immediately, before any column refers to
+    them, so the columns never reference a string missing from disk.  Appends
+    hold an exclusive ``flock`` and first read the lines other handles added,
+    so two handles never give the same id to different strings.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._handle = path.open("a+b")
+        self._position = 0
+        with self._locked(fcntl.LOCK_SH):
+            self._refresh()
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        fcntl.flock(self._handle, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Read the lines appended since the last refresh (call with the lock held)."""
+        self._handle.seek(self._position)
+        for value in self._handle.read().decode("utf-8").split("\n")[:-1]:
+            self.ids.setdefault(value, len(self.values))
+            self.values.append(value)
+        self._position = self._handle.tell()
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            with self._locked(fcntl.LOCK_EX):
+                self._refresh()
+                index = self.ids.get(value)
+                if index is None:
+                    index = self.ids[value] = len(self.values)
+                    self.values.append(value)
+                    self._handle.write(value.encode("utf-8") + b"\n")
+                    self._handle.flush()
+                    self._position = self._handle.tell()
+        return index
+
+    def lookup(self, index: int) -> str:
+        """String ``index``, re-reading the table if another handle added it."""
+        if index >= len(self.values):
+            with self._locked(fcntl.LOCK_SH):
+                self._refresh()
+        return self.values[index]
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class _ModeColumns:
+    def __init__(self, directory: Path, mode: str, slots: int) -> None:
+        self.columns: Dict[str, np.memmap] = {}
+        for name, dtype, width in COLUMNS:
+            path = directory / f"{mode}.{name}"
+            shape = (slots, width) if width > 1 else (slots,)
+            expected = slots * width * np.dtype(dtype).itemsize
+            if not path.exists() or path.stat().st_size != expected:
+                with path.open("wb") as handle:
+                    handle.truncate(expected)  # sparse; zero means "not decoded"
+            if slots:
+                self.columns[name] = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+            else:
+                self.columns[name] = np.zeros(shape, dtype)
+
+    def __getitem__(self, name: str) -> np.memmap:
+        return self.columns[name]
+
+    def flush(self) -> None:
+        for column in self.columns.values():
+            if isinstance(column, np.memmap):
+                column.flush()
+
+
+class DisasmCache:
+    """Decoded-instruction store for one image; see the module docstring for the layout."""
+
+    def __init__(self, directory: Path, payload: Buffer, base_addr: int) -> None:
+        self.directory = directory
+        self.payload = payload
+        self.base_addr = base_addr
+        self.hits = 0
+        self.misses = 0
+        directory.mkdir(parents=True, exist_ok=True)
+        meta_path = directory / "meta.json"
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        if meta:
+            if meta.get("schema_version") != SCHEMA_VERSION or meta.get("size") != len(payload):
+                raise ValueError(f"{directory} holds an incompatible disassembly cache.")
+        else:
+            meta = {"schema_version": SCHEMA_VERSION, "base_addr": base_addr, "size": len(payload)}
+            meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+        self._mnemonics = _Interned(directory / "mnemonics.txt")
+        self._op_strs = _Interned(directory / "op_strs.txt")
+        self._modes: Dict[str, _ModeColumns] = {}
+
+    @classmethod
+    def for_image(
+        cls,
+        source: Path,
+        payload: Buffer,
+        base_addr: int,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+    ) -> "DisasmCache":
+        """Open (or start) the cache of ``source`` loaded at ``base_addr``."""
+        sha256 = file_sha256(source, cache_dir)
+        return cls(cache_dir / f"{sha256}-base{base_addr:08X}", payload, base_addr)
+
+    def __enter__(self) -> "DisasmCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _columns(self, mode: str) -> _ModeColumns:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}.")
+        columns = self._modes.get(mode)
+        if columns is None:
+            columns = self._modes[mode] = _ModeColumns(self.directory, mode, len(self.payload) // ALIGNMENT[mode])
+        return columns
+
+    def disasm(self, address: int, length: int, mode: str) -> Iterator[CachedInsn]:
+        """Linear decode of ``[address, address + length)`` like ``Cs.disasm``, stopping at invalid bytes."""
+        columns = self._columns(mode)
+        align = ALIGNMENT[mode]
+        offset = address - self.base_addr
+        end = min(offset + length, len(self.payload))
+        if offset < 0 or offset % align:
+            raise ValueError(f"0x{address:08X} is not a {mode} instruction address in this image.")
+        while offset < end:
+            first = offset // align
+            last = first + min(READ_BLOCK_SLOTS, (end - offset + align - 1) // align)
+            rows = {name: columns[name][first:last].tolist() for name, _, _ in COLUMNS}
+            if not rows["size"]:
+                return
+            block_end = min(end, (first + len(rows["size"])) * align)
+            while offset < block_end:
+                row = offset // align - first
+                size = rows["size"][row]
+                if size == INVALID or offset + size > end:
+                    return
+                if size == 0:
+                    # Capstone takes over up to ``end``; everything it decodes is stored.
+                    yield from self._decode_run(columns, mode, offset, end)
+                    return
+                self.hits += 1
+                yield self._record(mode, offset, rows, row)
+                offset += size
+
+    def _decode_run(self, columns: _ModeColumns, mode: str, offset: int, end: int) -> List[CachedInsn]:
+        """Decode ``[offset, end)`` with Capstone and store every instruction."""
+        align = ALIGNMENT[mode]
+        slots: List[int] = []
+        rows: Dict[str, list] = {name: [] for name, _, _ in COLUMNS}
+        cursor = offset
+        for insn in disassembler(mode).disasm(bytes(self.payload[offset:end]), self.base_addr + offset):
+            slots.append(cursor // align)
+            self._summarise(insn, rows)
+            cursor += insn.size
+        if slots:
+            # ``size`` last: a non-zero size is what marks a slot as decoded for other readers.
+            for name, dtype, _ in COLUMNS[1:] + COLUMNS[:1]:
+                columns[name][slots] = np.asarray(rows[name], dtype=dtype)
+        if end - cursor >= 4:  # room for any encoding, so Capstone rejected these bytes
+            columns["size"][cursor // align] = INVALID
+        self.misses += len(slots)
+        decoded: List[CachedInsn] = []
+        cursor = offset
+        for row in range(len(slots)):
+            decoded.append(self._record(mode, cursor, rows, row))
+            cursor += rows["size"][row]
+        return decoded
+
+    def _summarise(self, insn, rows: Dict[str, list]) -> None:
+        """Append ``insn``'s column values to ``rows``."""
+        types = [0] * MAX_OPERANDS
+        regs = [0] * MAX_OPERANDS
+        values = [0] * MAX_OPERANDS
+        for index, operand in enumerate(insn.operands[:MAX_OPERANDS]):
+            types[index] = operand.type
+            if operand.type == ARM_OP_MEM:
+                regs[index], values[index] = operand.mem.base, operand.mem.disp
+            elif operand.type == ARM_OP_REG:
+                regs[index] = operand.reg
+            elif operand.type == ARM_OP_IMM:
+                values[index] = operand.imm  # Capstone reports signed 32-bit
+        rows["size"].append(insn.size)
+        rows["insn_id"].append(insn.id)
+        rows["cc"].append(insn.cc)
+        rows["mnemonic"].append(self._mnemonics.intern(insn.mnemonic))
+        rows["op_str"].append(self._op_strs.intern(insn.op_str))
+        rows["op_count"].append(len(insn.operands))
+        rows["op_type"].append(types)
+        rows["op_reg"].append(regs)
+        rows["op_value"].append(values)
+
+    def _record(self, mode: str, offset: int, rows: Dict[str, list], row: int) -> CachedInsn:
+        size = rows["size"][row]
+        types, regs, values = rows["op_type"][row], rows["op_reg"][row], rows["op_value"][row]
+        return CachedInsn(
+            address=self.base_addr + offset,
+            size=size,
+            insn_id=rows["insn_id"][row],
+            cc=rows["cc"][row],
+            mnemonic=self._mnemonics.lookup(rows["mnemonic"][row]),
+            op_str=self._op_strs.lookup(rows["op_str"][row]),
+            operands=tuple(
+                CachedOperand(types[i], regs[i], values[i]) for i in range(min(rows["op_count"][row], MAX_OPERANDS))
+            ),
+            raw=bytes(self.payload[offset : offset + size]),
+            mode=mode,
+        )
+
+    def flush(self) -> None:
+        for columns in self._modes.values():
+            columns.flush()
+        LOGGER.debug("Disassembly cache %s: %d hits, %d misses", self.directory, self.hits, self.misses)
+
+    def close(self) -> None:
+        self.flush()
+        self._mnemonics.close()
+        self._op_strs.close()
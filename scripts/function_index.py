@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Function-start index for the APP/BOOT images.
+
+Function starts are seeded from three sources:
+
+* prologues: Thumb ``push {.., lr}`` (16-bit and ``push.w``) and ARM
+  ``stmfd sp!, {.., lr}``, found with one vectorized pass per mode.  A
+  16-bit push is only two bytes (``0xB5xx``) and turns up in data and ARM
+  code, so it is kept only where the Thumb linear sweep
+  (:mod:`scripts.parallel_sweep`) decodes it as an instruction and it is
+  either a call target or follows a return or padding;
+* direct call targets inside the image (:mod:`scripts.branch_scan`), kept
+  once at least ``min_callers`` sites reach them, or if a prologue sits there;
+* handler pointers from a message-table index (``app_message_table.py``).
+
+Starts are stored as sorted arrays, so finding the function that contains
+an address is a binary search.  :meth:`FunctionIndex.confirmed_start`
+ignores starts seeded by a prologue alone, for callers that cut code at
+the entry.  Because the prologue and call seeds only
+depend on the image, they are cached as ``<sha256>-base<base>.npz`` like
+:mod:`scripts.call_index`.  Handler seeds are merged in after loading.
+
+Example:
+    python3 scripts/function_index.py --message-index data/processed/app_message_table.json \\
+        --lookup 0x0020EB10 --lookup 0x0026CD00
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if __package__ in (None, ""):  # executed as `python3 scripts/function_index.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.app_message_table import DEFAULT_BASE_ADDR, DEFAULT_INPUT, configure_logging
+from scripts.branch_scan import arm_calls, thumb_calls
+from scripts.mapped_input import Buffer, open_mapped
+from scripts.parallel_sweep import Sweep, sweep
+from scripts.string_index import file_sha256
+
+LOGGER = logging.getLogger("function_index")
+
+DEFAULT_INDEX_DIR = Path("data/processed/function_index")
+SCHEMA_VERSION = 2
+DEFAULT_MIN_CALLERS = 2
+# Seed sources, stored as a bit mask per start.
+PROLOGUE = 1
+CALL_TARGET = 2
+HANDLER = 4
+SOURCE_NAMES = ((PROLOGUE, "prologue"), (CALL_TARGET, "call"), (HANDLER, "handler"))
+# nop, mov r8, r8, zero fill and erased flash.
+THUMB_PADDING = (0xBF00, 0x46C0, 0x0000, 0xFFFF)
+
+
+def after_return_or_padding(halfwords: np.ndarray) -> np.ndarray:
+    """``True`` where the preceding code is a Thumb return (``bx lr``, ``pop {.., pc}``,
+    ``pop.w {.., pc}``, ``ldr pc, [sp], #4``) or padding (``nop``, zeros, erased flash)."""
+    previous = np.r_[0, halfwords[:-1]]
+    before = np.r_[0, 0, halfwords[:-2]]
+    return (
+        np.isin(previous, THUMB_PADDING)
+        | (previous == 0x4770)
+        | ((previous & 0xFF00) == 0xBD00)
+        | ((before == 0xE8BD) & ((previous & 0x8000) != 0))
+        | ((before == 0xF85D) & (previous == 0xFB04))
+    )
+
+
+def thumb_prologues(
+    payload: Buffer,
+    base_addr: int,
+    targets: Optional[np.ndarray] = None,
+    path: Optional[Sweep] = None,
+) -> np.ndarray:
+    """Addresses of Thumb ``push.w {.., lr}`` and of the 16-bit ``push {.., lr}`` that look like entries.
+
+    A 16-bit push counts when it is a call target (``targets`` holds code
+    pointers) or follows a return or padding, and, given the Thumb linear
+    sweep ``path``, also lies on it.
+    """
+    halfwords = np.frombuffer(payload, dtype="<u2", count=len(payload) // 2)
+    wide = np.zeros(halfwords.size, dtype=bool)
+    wide[:-1] = (halfwords[:-1] == 0xE92D) & ((halfwords[1:] & 0xA000) == 0x0000) & ((halfwords[1:] & 0x4000) != 0)
+    rows = np.flatnonzero((halfwords & 0xFF00) == 0xB500)
+    short = base_addr + rows.astype(np.int64) * 2
+    keep = after_return_or_padding(halfwords)[rows]
+    if targets is not None:
+        keep |= np.isin(short | 1, targets)
+    if path is not None:
+        keep &= path.contains(short)
+    return np.union1d(short[keep], base_addr + np.flatnonzero(wide).astype(np.int64) * 2)
+
+
+def arm_prologues(payload: Buffer, base_addr: int) -> np.ndarray:
+    """Addresses of ARM ``stmfd sp!, {.., lr}`` (``push``, condition AL)."""
+    words = np.frombuffer(payload, dtype="<u4", count=len(payload) // 4)
+    return base_addr + np.flatnonzero((words & 0xFFFF4000) == 0xE92D4000).astype(np.int64) * 4
+
+
+def call_targets(payload: Buffer, base_addr: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct code pointers (bit 0 = Thumb) of direct calls inside the image, with their caller counts."""
+    end = base_addr + len(payload)
+    pointers = []
+    for edges in (thumb_calls(payload, base_addr), arm_calls(payload, base_addr)):
+        inside = edges.select((edges.targets >= base_addr) & (edges.targets < end))
+        pointers.append(inside.targets | inside.target_modes())
+    return np.unique(np.concatenate(pointers), return_counts=True)
+
+
+class FunctionIndex:
+    """Sorted function starts (``addresses``) with their mode and seed sources."""
+
+    def __init__(self, addresses: np.ndarray, thumb: np.ndarray, sources: np.ndarray, meta: dict) -> None:
+        self.addresses = addresses
+        self.thumb = thumb
+        self.sources = sources
+        self.meta = meta
+
+    def __len__(self) -> int:
+        return self.addresses.size
+
+    @classmethod
+    def from_seeds(cls, seeds: Iterable[Tuple[np.ndarray, int]], meta: dict) -> "FunctionIndex":
+        """Merge ``(pointers, source)`` seeds; an address seen in both modes keeps its strongest source's."""
+        seeds = list(seeds)
+        pointers = [np.asarray(values, dtype=np.int64) for values, _ in seeds]
+        flags = [np.full(values.size, source, dtype=np.uint8) for values, (_, source) in zip(pointers, seeds)]
+        if not sum(values.size for values in pointers):
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty.astype(bool), empty.astype(np.uint8), meta)
+        pointer = np.concatenate(pointers)
+        flag = np.concatenate(flags)
+        address = pointer & ~1
+        # Sort by address, then strongest source first, so the first row of each address decides the mode.
+        order = np.lexsort((-flag.astype(np.int16), address))
+        address, pointer, flag = address[order], pointer[order], flag[order]
+        first = np.flatnonzero(np.r_[True, address[1:] != address[:-1]])
+        sources = np.bitwise_or.reduceat(flag, first) if first.size else flag[:0]
+        return cls(address[first], (pointer[first] & 1).astype(bool), sources.astype(np.uint8), meta)
+
+    @classmethod
+    def build(
+        cls,
+        payload: Buffer,
+        base_addr: int,
+        min_callers: int = DEFAULT_MIN_CALLERS,
+        meta: Optional[dict] = None,
+        thumb_path: Optional[Sweep] = None,
+    ) -> "FunctionIndex":
+        """Seed starts from ``payload``; ``thumb_path`` (a Thumb linear sweep) vets 16-bit pushes."""
+        targets, callers = call_targets(payload, base_addr)
+        thumb = thumb_prologues(payload, base_addr, targets, thumb_path)
+        prologues = np.concatenate([thumb | 1, arm_prologues(payload, base_addr)])
+        # A single call is enough when the target starts with a prologue of the same mode.
+        calls = targets[(callers >= min_callers) | np.isin(targets, prologues)]
+        seeds = [(prologues, PROLOGUE), (calls, CALL_TARGET)]
+        meta = dict(meta or {}, base_addr=base_addr, size=len(payload), min_callers=min_callers)
+        meta["thumb_path"] = thumb_path is not None
+        return cls.from_seeds(seeds, meta)
+
+    def with_pointers(self, pointers: Iterable[int], source: int) -> "FunctionIndex":
+        """A copy with extra code pointers merged in (e.g. message-table handlers)."""
+        current = self.addresses | self.thumb
+        seeds = [(current[self.sources & bit != 0], bit) for bit, _ in SOURCE_NAMES]
+        seeds.append((np.fromiter(pointers, dtype=np.int64), source))
+        return FunctionIndex.from_seeds(seeds, self.meta)
+
+    def containing(self, address: int) -> int:
+        """Row of the last start at or below ``address``, or ``-1`` if it precedes every start."""
+        return int(np.searchsorted(self.addresses, address, side="right")) - 1
+
+    def start(self, address: int) -> Optional[int]:
+        row = self.containing(address)
+        return int(self.addresses[row]) if row >= 0 else None
+
+    def confirmed_start(self, address: int) -> Optional[int]:
+        """:meth:`start`, or ``None`` when that start was only seeded by a prologue."""
+        row = self.containing(address)
+        return int(self.addresses[row]) if row >= 0 and self.sources[row] != PROLOGUE else None
+
+    def label(self, address: int) -> str:
+        """``sub_<start>`` or ``sub_<start>+0x<delta>``; ``?`` before the first start."""
+        row = self.containing(address)
+        if row < 0:
+            return "?"
+        start = int(self.addresses[row])
+        return f"sub_{start:08X}" if address == start else f"sub_{start:08X}+0x{address - start:X}"
+
+    def describe(self, row: int) -> dict:
+        return {
+            "start": f"0x{int(self.addresses[row]):08X}",
+            "mode": "thumb" if self.thumb[row] else "arm",
+            "sources": [name for bit, name in SOURCE_NAMES if self.sources[row] & bit],
+        }
+
+    def save(self, path: Path) -> None:
+        """Write an ``.npz`` next to ``path`` and rename it into place."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                meta=np.array(json.dumps(dict(self.meta, schema_version=SCHEMA_VERSION))),
+                addresses=self.addresses.astype(np.uint32),
+                thumb=self.thumb,
+                sources=self.sources,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "FunctionIndex":
+        with np.load(path) as archive:
+            meta = json.loads(str(archive["meta"]))
+            if int(meta.get("schema_version", 0)) != SCHEMA_VERSION:
+                raise ValueError(f"{path} uses an unsupported function index schema.")
+            return cls(archive["addresses"].astype(np.int64), archive["thumb"], archive["sources"], meta)
+
+
+def index_path(index_dir: Path, sha256: str, base_addr: int, min_callers: int) -> Path:
+    suffix = "" if min_callers == DEFAULT_MIN_CALLERS else f"-min{min_callers}"
+    return index_dir / f"{sha256}-base{base_addr:08X}{suffix}.npz"
+
+
+def load_or_build(
+    source: Path,
+    base_addr: int,
+    index_dir: Path = DEFAULT_INDEX_DIR,
+    min_callers: int = DEFAULT_MIN_CALLERS,
+    workers: Optional[int] = None,
+) -> FunctionIndex:
+    """Open the function index for ``source``/``base_addr``, building it on first use."""
+    sha256 = file_sha256(source, index_dir)
+    path = index_path(index_dir, sha256, base_addr, min_callers)
+    if path.exists():
+        try:
+            LOGGER.info("Using function index %s", path)
+            return FunctionIndex.load(path)
+        except (OSError, ValueError, KeyError) as exc:
+            LOGGER.warning("Discarding unreadable function index %s (%s)", path, exc)
+            path.unlink()
+
+    LOGGER.info("Building function index %s", path)
+    thumb_path = sweep(source, base_addr, "thumb", workers=workers)
+    with open_mapped(source) as payload:
+        meta = {"sha256": sha256, "source": str(source)}
+        index = FunctionIndex.build(payload, base_addr, min_callers, meta, thumb_path)
+    index.save(path)
+    return index
+
+
+def handler_pointers(message_index: Path) -> List[int]:
+    """Handler pointers from an ``app_message_table.py`` index JSON."""
+    document = json.loads(message_index.read_text(encoding="utf-8"))
+    return sorted({int(entry["handler_addr"]) for entry in document.get("entries", [])})
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a function-start index and look up addresses.")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Firmware image (APP or BOOT).")
+    parser.add_argument(
+        "--base-address",
+        type=lambda value: int(value, 0),
+        default=DEFAULT_BASE_ADDR,
+        help="Load address of the image (default: 0x00200000).",
+    )
+    parser.add_argument("--index-dir", type=Path, default=DEFAULT_INDEX_DIR, help="Where index files are kept.")
+    parser.add_argument(
+        "--min-callers",
+        type=int,
+        default=DEFAULT_MIN_CALLERS,
+        help="Direct calls needed to seed a start without a prologue (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for the Thumb linear sweep run when building (default: all cores).",
+    )
+    parser.add_argument("--message-index", type=Path, help="app_message_table.py JSON whose handlers seed starts.")
+    parser.add_argument(
+        "--lookup",
+        type=lambda value: int(value, 0),
+        action="append",
+        default=[],
+        help="Print the function containing this VA; repeat for several.",
+    )
+    parser.add_argument("--output", type=Path, help="Optional JSON listing of every start.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level)
+
+    index = load_or_build(args.input, args.base_address, args.index_dir, args.min_callers, args.workers)
+    if args.message_index:
+        index = index.with_pointers(handler_pointers(args.message_index), HANDLER)
+    LOGGER.info("%d function starts", len(index))
+
+    for address in args.lookup:
+        row = index.containing(address)
+        detail = index.describe(row) if row >= 0 else {}
+        print(f"0x{address:08X}  {index.label(address)}  {json.dumps(detail)}")
+
+    if args.output:
+        document = {
+            "metadata": dict(index.meta, base_address=f"0x{args.base_address:08X}", count=len(index)),
+            "functions": [index.describe(row) for row in range(len(index))],
+        }
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+        LOGGER.info("Wrote %s", args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
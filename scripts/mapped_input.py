@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Read-only memory-mapped access to large inputs (SD card images, firmware dumps)."""
+
+from __future__ import annotations
+
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Tuple, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+@contextmanager
+def open_mapped(path: Path) -> Iterator[Buffer]:
+    """Map ``path`` read-only; empty files yield ``b""`` since they cannot be mapped."""
+    with path.open("rb") as handle:
+        if path.stat().st_size == 0:
+            yield b""
+            return
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapping
+        finally:
+            mapping.close()
+
+
+def release_range(buffer: Buffer, start: int, end: int) -> None:
+    """Drop resident pages of ``buffer[start:end]`` so RSS stays bounded while streaming.
+
+    This is a no-op for plain ``bytes`` and on platforms without ``madvise``.
+    """
+    if not isinstance(buffer, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    page_start = start - start % mmap.PAGESIZE
+    length = min(end, len(buffer)) - page_start
+    if length > 0:
+        buffer.madvise(mmap.MADV_DONTNEED, page_start, length)
+
+
+def iter_overlapping_chunks(
+    buffer: Buffer,
+    chunk_size: int,
+    overlap: int,
+) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, chunk)`` pairs covering ``buffer`` in ``chunk_size`` strides.
+
+    Each chunk carries ``overlap`` extra trailing bytes so that fixed-size
+    windows starting inside a stride are never cut at its boundary.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    total = len(buffer)
+    for offset in range(0, total, chunk_size):
+        yield offset, buffer[offset : offset + chunk_size + overlap]
+        release_range(buffer, offset, offset + chunk_size)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Linear-sweep disassembly of whole images across a process pool.
+
+A linear sweep decodes from the start of the image and steps over bytes
+Capstone rejects, one alignment unit (2 bytes for Thumb, 4 for ARM) at a
+time.  :func:`sweep` splits the image into aligned chunks and decodes each
+chunk in a worker process, starting ``overlap`` bytes early so that it has
+usually resynchronised with the true instruction stream by the time it
+reaches its own range.
+
+Chunk results are merged in image order.  Each chunk also reports the first
+offset at or past its end, which is where the true stream continues.  If
+the next chunk's path passes through that offset, the next chunk is used
+from there on.  Otherwise the merge decodes serially from that offset
+until it lands on the chunk's path (a Thumb stream that is still
+misaligned after the overlap).  The result is therefore identical to a
+single sweep from offset 0, whatever the chunking.  Decoding restarts
+every :data:`WINDOW_BYTES`, so the condition suffixes of a Thumb ``IT``
+block that straddles a restart may differ from an unbroken decode.
+Instruction boundaries never do.
+
+``visit(insn, mode)`` runs in the workers for every instruction.  It must
+be a module-level (picklable) function, and its non-``None`` results are
+kept by offset.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from scripts.arm_disasm import call_target, disassembler
+from scripts.mapped_input import Buffer, open_mapped
+
+ALIGNMENT = {"arm": 4, "thumb": 2}
+MAX_INSN_BYTES = 4
+WINDOW_BYTES = 0x1000
+DEFAULT_CHUNK_SIZE = 0x40000
+DEFAULT_OVERLAP = 0x100
+
+Visitor = Callable[[object, str], Optional[object]]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    start: int
+    stop: int
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    """Path of one chunk's sweep: positions in ``[start, stop)`` (``valid`` is ``False`` for skipped units)."""
+
+    chunk: Chunk
+    path: np.ndarray
+    valid: np.ndarray
+    records: Dict[int, object]
+    next_offset: int
+
+
+@dataclass(frozen=True)
+class Sweep:
+    """Merged linear sweep of one image in one mode; offsets are file offsets."""
+
+    mode: str
+    base_addr: int
+    offsets: np.ndarray
+    records: Dict[int, object]
+    resynced: int
+
+    def __len__(self) -> int:
+        return self.offsets.size
+
+    def contains(self, addresses: np.ndarray) -> np.ndarray:
+        """``True`` where a VA is the start of an instruction on the sweep path."""
+        offsets = np.asarray(addresses, dtype=np.int64) - self.base_addr
+        index = np.minimum(np.searchsorted(self.offsets, offsets), max(self.offsets.size - 1, 0))
+        return (self.offsets.size > 0) & (self.offsets[index] == offsets)
+
+
+def call_visitor(insn, mode: str) -> Optional[int]:
+    """Code pointer of a direct ``bl``/``blx`` (see :func:`scripts.arm_disasm.call_target`)."""
+    return call_target(insn, mode)
+
+
+def plan_chunks(size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Chunk]:
+    """Word-aligned chunks covering ``[0, size)``, so boundaries suit both modes."""
+    chunk_size = max(MAX_INSN_BYTES, chunk_size - chunk_size % MAX_INSN_BYTES)
+    return [Chunk(start, min(size, start + chunk_size)) for start in range(0, size, chunk_size)]
+
+
+def walk(payload: Buffer, base_addr: int, mode: str, offset: int, stop: int) -> Iterator[Tuple[int, object]]:
+    """Yield ``(offset, insn)`` along the sweep from ``offset`` until ``stop``; skipped units have ``insn=None``."""
+    align = ALIGNMENT[mode]
+    dis = disassembler(mode)
+    hard_end = min(len(payload), stop + MAX_INSN_BYTES)
+    while offset < stop:
+        limit = min(hard_end, offset + WINDOW_BYTES)
+        cursor = offset
+        for insn in dis.disasm(bytes(payload[offset:limit]), base_addr + offset):
+            if cursor >= stop:
+                break
+            yield cursor, insn
+            cursor += insn.size
+        if cursor >= stop:
+            return
+        if cursor + MAX_INSN_BYTES > limit and limit < hard_end:
+            offset = cursor  # cut off by the window, not invalid
+            continue
+        yield cursor, None
+        offset = cursor + align
+
+
+def sweep_chunk(
+    payload: Buffer,
+    base_addr: int,
+    mode: str,
+    chunk: Chunk,
+    overlap: int = DEFAULT_OVERLAP,
+    visit: Optional[Visitor] = None,
+) -> ChunkResult:
+    path: List[int] = []
+    valid: List[bool] = []
+    records: Dict[int, object] = {}
+    start = max(0, chunk.start - overlap)
+    next_offset = start
+    for offset, insn in walk(payload, base_addr, mode, start, chunk.stop):
+        next_offset = offset + (insn.size if insn is not None else ALIGNMENT[mode])
+        if offset < chunk.start:
+            continue
+        path.append(offset)
+        valid.append(insn is not None)
+        if insn is not None and visit is not None:
+            record = visit(insn, mode)
+            if record is not None:
+                records[offset] = record
+    return ChunkResult(chunk, np.array(path, dtype=np.int64), np.array(valid, dtype=bool), records, next_offset)
+
+
+def merge(
+    payload: Buffer,
+    base_addr: int,
+    mode: str,
+    results: List[ChunkResult],
+    visit: Optional[Visitor] = None,
+) -> Sweep:
+    """Join chunk results in order, re-decoding serially wherever a chunk had not resynchronised."""
+    pieces: List[np.ndarray] = []
+    records: Dict[int, object] = {}
+    expected = 0
+    resynced = 0
+    for result in sorted(results, key=lambda item: item.chunk.start):
+        if expected >= result.chunk.stop:
+            continue  # the previous instruction ran over this whole (tiny) chunk
+        index = int(np.searchsorted(result.path, expected))
+        if index >= result.path.size or result.path[index] != expected:
+            resynced += 1
+            serial = sweep_chunk(payload, base_addr, mode, Chunk(expected, result.chunk.stop), 0, visit)
+            joined = np.flatnonzero(np.isin(serial.path, result.path))
+            if not joined.size:
+                pieces.append(serial.path[serial.valid])
+                records.update(serial.records)
+                expected = serial.next_offset
+                continue
+            cut = int(joined[0])
+            pieces.append(serial.path[:cut][serial.valid[:cut]])
+            records.update({offset: record for offset, record in serial.records.items() if offset < serial.path[cut]})
+            index = int(np.searchsorted(result.path, serial.path[cut]))
+        pieces.append(result.path[index:][result.valid[index:]])
+        first = int(result.path[index])
+        records.update({offset: record for offset, record in result.records.items() if offset >= first})
+        expected = result.next_offset
+    offsets = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.int64)
+    return Sweep(mode, base_addr, offsets, records, resynced)
+
+
+_PAYLOAD: Buffer = b""
+_WORKER_STACK = ExitStack()
+
+
+def _init_worker(path: str) -> None:
+    global _PAYLOAD
+    _PAYLOAD = _WORKER_STACK.enter_context(open_mapped(Path(path)))
+
+
+def _sweep_chunk_worker(
+    base_addr: int, mode: str, overlap: int, visit: Optional[Visitor], chunk: Chunk
+) -> ChunkResult:
+    return sweep_chunk(_PAYLOAD, base_addr, mode, chunk, overlap, visit)
+
+
+def sweep(
+    source: Path,
+    base_addr: int,
+    mode: str,
+    visit: Optional[Visitor] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_OVERLAP,
+) -> Sweep:
+    """Linear sweep of ``source`` in ``mode`` across ``workers`` processes (default: all cores)."""
+    if mode not in ALIGNMENT:
+        raise ValueError(f"Unknown mode {mode!r}.")
+    workers = workers or os.cpu_count() or 1
+    with open_mapped(source) as payload:
+        chunks = plan_chunks(len(payload), chunk_size)
+        if workers <= 1 or len(chunks) <= 1:
+            results = [sweep_chunk(payload, base_addr, mode, chunk, overlap, visit) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(str(source),)
+            ) as pool:
+                results = list(pool.map(partial(_sweep_chunk_worker, base_addr, mode, overlap, visit), chunks))
+        return merge(payload, base_addr, mode, results, visit)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Rendering helpers shared by the report generators in ``scripts/``.
+
+``hexdump`` formats whole rows with ``bytes.hex`` and a translate table
+instead of one f-string per byte, and the ``write_*`` helpers stream lines
+to disk as they are produced so large reports never sit in memory.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable, List
+
+# Printable ASCII maps to itself, everything else (controls and high bytes) to '.'.
+HEXDUMP_ASCII_TABLE = bytes(byte if 32 <= byte <= 126 else ord(".") for byte in range(256))
+
+
+def hexdump(data: bytes, base_offset: int, width: int = 16) -> str:
+    """Classic ``OFFSET: HH HH ..  ascii`` dump of ``data`` (bytes, bytearray or memoryview)."""
+    data = bytes(data)
+    pad = width * 3 - 1
+    lines: List[str] = []
+    for idx in range(0, len(data), width):
+        chunk = data[idx : idx + width]
+        hex_part = chunk.hex(" ").upper()
+        ascii_part = chunk.translate(HEXDUMP_ASCII_TABLE).decode("ascii")
+        lines.append(f"{base_offset + idx:08X}: {hex_part:<{pad}}  {ascii_part}")
+    return "\n".join(lines)
+
+
+def write_lines(lines: Iterable[str], destination: Path) -> int:
+    """Write each line to ``destination`` as soon as it is produced; returns the line count."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with destination.open("w", encoding="utf-8") as handle:
+        for line in lines:
+            handle.write(line)
+            handle.write("\n")
+            count += 1
+    return count
+
+
+def write_jsonl(records: Iterable[dict], destination: Path) -> int:
+    """Stream ``records`` as one compact JSON object per line; returns the record count."""
+    return write_lines((json.dumps(record, ensure_ascii=False) for record in records), destination)
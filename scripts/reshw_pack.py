@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Replace or add glyphs in a RES-HW container with minimal rewriting.
+
+Edits whose encoded entry keeps its size are written through a writable
+memory map, touching only the byte ranges that actually differ.  Any edit
+that changes an entry's size (or adds a glyph) rewrites the container from
+the first resized entry onward: the new tail is streamed to a temporary
+file from the old mapping, then spliced in and the file truncated.  Bytes
+before that entry are only touched by same-size edits, patched as above,
+and data after the entry table (terminator, padding) is carried over
+unchanged.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+if __package__ in (None, ""):  # executed as `python3 scripts/reshw_pack.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.reshw_parse import (
+    DEFAULT_INPUT,
+    ENTRY_PREFIX_STRUCT,
+    HEADER_STRUCT,
+    ResHwEntry,
+    configure_logging,
+    parse_container,
+)
+
+LOGGER = logging.getLogger("reshw_pack")
+
+COPY_BLOCK_SIZE = 1024 * 1024
+ENTRY_COUNT_OFFSET = HEADER_STRUCT.size - 4
+# Values are 16-bit words, given either signed or unsigned.
+VALUE_RANGE = (-0x8000, 0xFFFF)
+
+
+@dataclass(frozen=True)
+class GlyphEdit:
+    """New content for the entry named ``char`` (added if it does not exist)."""
+
+    char: str
+    part_count: int
+    values: Tuple[int, ...]
+
+    def __post_init__(self) -> None:
+        validate_entry(self.char, self.part_count, self.values)
+
+    def encode(self) -> bytes:
+        return encode_entry(self.char, self.part_count, self.values)
+
+
+@dataclass
+class PackReport:
+    mode: str = "noop"
+    replaced: int = 0
+    added: int = 0
+    bytes_written: int = 0
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+
+
+def validate_entry(char: str, part_count: int, values: Sequence[int]) -> None:
+    """Raise ``ValueError`` unless the entry can be stored and parsed back unchanged."""
+    if len(char) != 1 or char == "\x00":
+        raise ValueError(f"Entry name must be a single non-NUL character, got {char!r}.")
+    if not 0 <= part_count <= 0xFFFF_FFFF:
+        raise ValueError(f"Entry {char!r}: part count {part_count} does not fit in 32 bits.")
+    for value in values:
+        if not VALUE_RANGE[0] <= value <= VALUE_RANGE[1]:
+            raise ValueError(f"Entry {char!r}: value {value} is outside the 16-bit range.")
+
+
+def encode_entry(char: str, part_count: int, values: Sequence[int]) -> bytes:
+    """Serialize one entry (values are 16-bit words; negative ints are stored two's complement)."""
+    validate_entry(char, part_count, values)
+    name = char.encode("utf-8")
+    words = struct.pack(f"<{len(values)}H", *(value & 0xFFFF for value in values))
+    return name + b"\x00" + ENTRY_PREFIX_STRUCT.pack(part_count, len(values)) + words
+
+
+def entry_span(entry: ResHwEntry) -> Tuple[int, int]:
+    return entry.name_offset, entry.values_offset + entry.values_length
+
+
+def _span_size(entry: ResHwEntry) -> int:
+    start, end = entry_span(entry)
+    return end - start
+
+
+def diff_ranges(old: bytes, new: bytes, base: int) -> List[Tuple[int, int]]:
+    """Absolute ``[start, end)`` ranges where equal-length ``old`` and ``new`` differ."""
+    ranges: List[Tuple[int, int]] = []
+    start = None
+    for idx, (left, right) in enumerate(zip(old, new)):
+        if left != right and start is None:
+            start = idx
+        elif left == right and start is not None:
+            ranges.append((base + start, base + idx))
+            start = None
+    if start is not None:
+        ranges.append((base + start, base + len(new)))
+    return ranges
+
+
+def apply_edits(path: Path, edits: Iterable[GlyphEdit]) -> PackReport:
+    """Apply ``edits`` to the container at ``path`` in place (all edits are encoded before it is opened)."""
+    encoded_edits = [(edit.char, edit.encode()) for edit in edits]
+    with path.open("rb") as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        header, entries = parse_container(mapping)
+    except Exception:
+        mapping.close()
+        raise
+
+    by_char: Dict[str, ResHwEntry] = {}
+    for entry in entries:
+        by_char.setdefault(entry.char, entry)
+    replacements: Dict[int, bytes] = {}
+    added: Dict[str, bytes] = {}
+    for char, encoded in encoded_edits:
+        if char in by_char:
+            replacements[by_char[char].index] = encoded
+        else:
+            added[char] = encoded
+    additions = list(added.values())
+
+    table_end = entry_span(entries[-1])[1] if entries else HEADER_STRUCT.size
+    resized = [index for index, data in replacements.items() if len(data) != _span_size(entries[index])]
+    report = PackReport(replaced=len(replacements), added=len(additions))
+    if not resized and not additions:
+        mapping.close()
+        _patch_in_place(path, entries, replacements, report)
+        return report
+
+    first = min(resized) if resized else len(entries)
+    rewrite_from = entry_span(entries[first])[0] if first < len(entries) else table_end
+    patches = {index: data for index, data in replacements.items() if index < first}
+    if patches:
+        _patch_in_place(path, entries, patches, report)
+    with tempfile.TemporaryFile() as tail:
+        for entry in entries[first:]:
+            start, end = entry_span(entry)
+            tail.write(replacements.get(entry.index, mapping[start:end]))
+        for data in additions:
+            tail.write(data)
+        for offset in range(table_end, len(mapping), COPY_BLOCK_SIZE):
+            tail.write(mapping[offset : min(len(mapping), offset + COPY_BLOCK_SIZE)])
+        mapping.close()
+
+        tail.seek(0)
+        with path.open("r+b") as handle:
+            if additions and header.entry_count:
+                handle.seek(ENTRY_COUNT_OFFSET)
+                handle.write(struct.pack("<I", len(entries) + len(additions)))
+            handle.seek(rewrite_from)
+            shutil.copyfileobj(tail, handle, COPY_BLOCK_SIZE)
+            handle.truncate()
+            end = handle.tell()
+    report.mode = "tail"
+    report.bytes_written += end - rewrite_from
+    report.ranges.append((rewrite_from, end))
+    return report
+
+
+def _patch_in_place(
+    path: Path,
+    entries: Sequence[ResHwEntry],
+    replacements: Dict[int, bytes],
+    report: PackReport,
+) -> None:
+    with path.open("r+b") as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_WRITE)
+        try:
+            for index, data in sorted(replacements.items()):
+                start, end = entry_span(entries[index])
+                for range_start, range_end in diff_ranges(mapping[start:end], data, start):
+                    mapping[range_start:range_end] = data[range_start - start : range_end - start]
+                    report.ranges.append((range_start, range_end))
+                    report.bytes_written += range_end - range_start
+            mapping.flush()
+        finally:
+            mapping.close()
+    report.mode = "patch" if report.ranges else "noop"
+
+
+def load_edits(path: Path) -> List[GlyphEdit]:
+    """Read ``[{"char": "A", "part_count": 1, "values": [...]}, ...]`` from JSON."""
+    items = json.loads(path.read_text(encoding="utf-8"))
+    return [
+        GlyphEdit(item["char"], int(item["part_count"]), tuple(int(value) for value in item["values"]))
+        for item in items
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-i", "--input", type=Path, default=DEFAULT_INPUT, help="RES-HW container to patch.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the result here (copying --input first) instead of patching --input in place.",
+    )
+    parser.add_argument("--edits", type=Path, required=True, help="JSON list of {char, part_count, values} glyphs.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+
+    target = args.input
+    if args.output is not None:
+        LOGGER.info("Copying %s to %s", args.input, args.output)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(args.input, args.output)
+        target = args.output
+
+    edits = load_edits(args.edits)
+    LOGGER.info("Applying %d glyph edit(s) to %s", len(edits), target)
+    report = apply_edits(target, edits)
+    LOGGER.info(
+        "%s: %d replaced, %d added, %d bytes written in %d range(s)",
+        report.mode,
+        report.replaced,
+        report.added,
+        report.bytes_written,
+        len(report.ranges),
+    )
+
+
+if __name__ == "__main__":
+    main()
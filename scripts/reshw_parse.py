@@ -6,11 +6,22 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import mmap
 import statistics
 import struct
-from dataclasses import asdict, dataclass
+import sys
+from array import array
+from dataclasses import asdict, astuple, dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if __package__ in (None, ""):  # executed as `python3 scripts/reshw_parse.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.mapped_input import Buffer
+
+if TYPE_CHECKING:
+    import numpy as np
 
 LOGGER = logging.getLogger("reshw_parse")
 
@@ -18,6 +29,15 @@ DEFAULT_INPUT = Path("data/raw/ZK-INKJET-RES-HW.zkml")
 DEFAULT_OUTPUT = Path("data/processed/reshw_index.json")
 HEADER_STRUCT = struct.Struct("<6I")
 ENTRY_PREFIX_STRUCT = struct.Struct("<2I")
+FORMATS = ("json", "npz", "bin")
+# Compact index: magic, format version, entry count, column count, then the
+# six container header words; columns follow as little-endian uint32 arrays.
+INDEX_MAGIC = b"RHWI"
+INDEX_VERSION = 1
+INDEX_HEADER_STRUCT = struct.Struct("<4s3I6I")
+INDEX_COLUMNS = ("codepoint", "part_count", "value_count", "name_offset", "values_offset")
+
+EntryLayout = Tuple[int, str, int, int, int]
 
 
 @dataclass(frozen=True)
@@ -58,60 +78,176 @@ def parse_header(payload: bytes) -> ResHwHeader:
     return ResHwHeader(version, flags, width, height, grouping_hint, entry_count)
 
 
-def parse_entries(payload: bytes, start_offset: int, expected_count: int) -> Tuple[List[ResHwEntry], int]:
-    entries: List[ResHwEntry] = []
+def iter_entry_layout(payload: Buffer, start_offset: int, expected_count: int) -> Iterator[EntryLayout]:
+    """Walk the entry table yielding ``(name_offset, name, part_count, value_count, values_offset)``.
+
+    Only names and the two count words are read; glyph values are skipped.
+    """
+    index = 0
     offset = start_offset
     total = len(payload)
 
     while offset < total:
-        if expected_count and len(entries) >= expected_count:
+        if expected_count and index >= expected_count:
             break
         if payload[offset] == 0:
             break
 
         name_end = payload.find(b"\x00", offset)
         if name_end == -1:
-            raise ValueError(f"Missing NUL terminator for entry {len(entries)} (offset 0x{offset:X}).")
+            raise ValueError(f"Missing NUL terminator for entry {index} (offset 0x{offset:X}).")
         name_bytes = payload[offset:name_end]
         try:
             name = name_bytes.decode("utf-8")
         except UnicodeDecodeError as exc:
-            raise ValueError(f"Entry {len(entries)} has non-UTF-8 name at 0x{offset:X}.") from exc
+            raise ValueError(f"Entry {index} has non-UTF-8 name at 0x{offset:X}.") from exc
         if not name:
-            raise ValueError(f"Entry {len(entries)} contains empty name at 0x{offset:X}.")
+            raise ValueError(f"Entry {index} contains empty name at 0x{offset:X}.")
 
         entry_start = offset
         offset = name_end + 1
         if offset + ENTRY_PREFIX_STRUCT.size > total:
-            raise ValueError(f"Entry {len(entries)} truncated before counts at 0x{offset:X}.")
+            raise ValueError(f"Entry {index} truncated before counts at 0x{offset:X}.")
 
         part_count, value_count = ENTRY_PREFIX_STRUCT.unpack_from(payload, offset)
         offset += ENTRY_PREFIX_STRUCT.size
 
         value_bytes = value_count * 2
-        values_offset = offset
-        end = offset + value_bytes
-        if end > total:
-            raise ValueError(f"Entry {len(entries)} payload overruns container: need {value_bytes} bytes.")
-
-        entries.append(
-            ResHwEntry(
-                index=len(entries),
-                char=name,
-                codepoint=ord(name),
-                part_count=part_count,
-                value_count=value_count,
-                point_count=value_count // 2,
-                name_offset=entry_start,
-                values_offset=values_offset,
-                values_length=value_bytes,
-            )
-        )
-        offset = end
+        if offset + value_bytes > total:
+            raise ValueError(f"Entry {index} payload overruns container: need {value_bytes} bytes.")
+
+        yield entry_start, name, part_count, value_count, offset
+        index += 1
+        offset += value_bytes
+
+
+def _make_entry(index: int, layout: EntryLayout) -> ResHwEntry:
+    name_offset, name, part_count, value_count, values_offset = layout
+    return ResHwEntry(
+        index=index,
+        char=name,
+        codepoint=ord(name),
+        part_count=part_count,
+        value_count=value_count,
+        point_count=value_count // 2,
+        name_offset=name_offset,
+        values_offset=values_offset,
+        values_length=value_count * 2,
+    )
 
+
+def parse_entries(payload: bytes, start_offset: int, expected_count: int) -> Tuple[List[ResHwEntry], int]:
+    entries: List[ResHwEntry] = []
+    offset = start_offset
+    for layout in iter_entry_layout(payload, start_offset, expected_count):
+        entries.append(_make_entry(len(entries), layout))
+        offset = layout[4] + layout[3] * 2
     return entries, offset
 
 
+class ResHwContainer:
+    """Lazily indexed RES-HW container over a (usually memory-mapped) buffer.
+
+    The entry table is walked once to record each entry's name, counts and
+    value offset plus a codepoint -> entry index map; nothing else is parsed
+    or copied.  ``values`` returns a zero-copy ``memoryview`` of an entry's
+    value bytes and ``points`` a NumPy ``int16`` view of them.  Views keep
+    the mapping alive, so release them before :meth:`close`.  When a
+    codepoint appears more than once the first entry wins the index.
+    """
+
+    def __init__(self, payload: Buffer, mapping: Optional[mmap.mmap] = None) -> None:
+        self._payload = payload
+        self._mapping = mapping
+        self.header = parse_header(payload)
+        self._names: List[str] = []
+        self._name_offsets = array("q")
+        self._part_counts = array("q")
+        self._value_counts = array("q")
+        self._values_offsets = array("q")
+        self._by_codepoint: Dict[int, int] = {}
+        end = HEADER_STRUCT.size
+        for name_offset, name, part_count, value_count, values_offset in iter_entry_layout(
+            payload, HEADER_STRUCT.size, self.header.entry_count
+        ):
+            self._by_codepoint.setdefault(ord(name), len(self._names))
+            self._names.append(name)
+            self._name_offsets.append(name_offset)
+            self._part_counts.append(part_count)
+            self._value_counts.append(value_count)
+            self._values_offsets.append(values_offset)
+            end = values_offset + value_count * 2
+        self.consumed = end
+
+    @classmethod
+    def open(cls, path: Path) -> "ResHwContainer":
+        with path.open("rb") as handle:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapping, mapping)
+        except Exception:
+            mapping.close()
+            raise
+
+    def close(self) -> None:
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self) -> "ResHwContainer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, codepoint: object) -> bool:
+        return codepoint in self._by_codepoint
+
+    def codepoints(self) -> List[int]:
+        return list(self._by_codepoint)
+
+    def index_of(self, codepoint: int) -> int:
+        try:
+            return self._by_codepoint[codepoint]
+        except KeyError:
+            raise KeyError(f"No RES-HW entry for U+{codepoint:04X}.") from None
+
+    def entry_at(self, index: int) -> ResHwEntry:
+        layout = (
+            self._name_offsets[index],
+            self._names[index],
+            self._part_counts[index],
+            self._value_counts[index],
+            self._values_offsets[index],
+        )
+        return _make_entry(index, layout)
+
+    def entry(self, codepoint: int) -> ResHwEntry:
+        return self.entry_at(self.index_of(codepoint))
+
+    def entries(self) -> Iterator[ResHwEntry]:
+        for index in range(len(self)):
+            yield self.entry_at(index)
+
+    def values(self, codepoint: int) -> memoryview:
+        """Zero-copy view of the entry's raw value bytes (``value_count * 2`` bytes)."""
+        index = self.index_of(codepoint)
+        start = self._values_offsets[index]
+        return memoryview(self._payload)[start : start + self._value_counts[index] * 2]
+
+    def points(self, codepoint: int) -> "np.ndarray":
+        """Entry values as a read-only little-endian ``int16`` NumPy view (no copy)."""
+        import numpy as np
+
+        index = self.index_of(codepoint)
+        return np.frombuffer(
+            self._payload, dtype="<i2", count=self._value_counts[index], offset=self._values_offsets[index]
+        )
+
+
 def compute_stats(entries: Sequence[ResHwEntry]) -> dict:
     if not entries:
         return {"entries": 0}
@@ -178,7 +314,7 @@ def parse_container(payload: bytes) -> Tuple[ResHwHeader, List[ResHwEntry]]:
     entries, consumed = parse_entries(payload, HEADER_STRUCT.size, header.entry_count)
     if header.entry_count and len(entries) != header.entry_count:
         LOGGER.warning(
-            "Header promised %d entries but parser recovered %d (consumed 0x%X bytes).",
+            "Header promised %d entries but parser recovered %d (consumed 0x%X bytes); try --recover.",
             header.entry_count,
             len(entries),
             consumed,
@@ -186,29 +322,120 @@ def parse_container(payload: bytes) -> Tuple[ResHwHeader, List[ResHwEntry]]:
     return header, entries
 
 
+def recover_container(payload: bytes) -> Tuple[ResHwHeader, List[ResHwEntry]]:
+    from scripts.reshw_recover import recover_entries
+
+    header = parse_header(payload)
+    result = recover_entries(payload)
+    for start, end in result.skipped(HEADER_STRUCT.size, len(payload)):
+        LOGGER.warning("Skipped 0x%X bytes at 0x%X (no consistent entry chain).", end - start, start)
+    if header.entry_count and len(result.entries) != header.entry_count:
+        LOGGER.warning("Header promised %d entries; recovery stitched %d.", header.entry_count, len(result.entries))
+    return header, result.entries
+
+
 def write_json(path: Path, payload: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
 
+def index_columns(entries: Sequence[ResHwEntry]) -> Dict[str, "np.ndarray"]:
+    import numpy as np
+
+    return {
+        name: np.fromiter((getattr(entry, name) for entry in entries), dtype="<u4", count=len(entries))
+        for name in INDEX_COLUMNS
+    }
+
+
+def write_npz(path: Path, header: ResHwHeader, entries: Sequence[ResHwEntry]) -> None:
+    import numpy as np
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header_words = np.array(astuple(header), dtype="<u4")
+    with path.open("wb") as handle:
+        np.savez(handle, header=header_words, **index_columns(entries))
+
+
+def write_bin(path: Path, header: ResHwHeader, entries: Sequence[ResHwEntry]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    columns = index_columns(entries)
+    with path.open("wb") as handle:
+        prefix = INDEX_HEADER_STRUCT.pack(
+            INDEX_MAGIC, INDEX_VERSION, len(entries), len(INDEX_COLUMNS), *astuple(header)
+        )
+        handle.write(prefix)
+        for name in INDEX_COLUMNS:
+            handle.write(columns[name].tobytes())
+
+
+def load_index(path: Path) -> Tuple[ResHwHeader, Dict[str, "np.ndarray"]]:
+    """Load an ``npz`` or ``bin`` index; ``bin`` columns are read-only memory maps."""
+    import numpy as np
+
+    if path.suffix == ".npz":
+        with np.load(path) as archive:
+            return ResHwHeader(*archive["header"].tolist()), {name: archive[name] for name in INDEX_COLUMNS}
+
+    with path.open("rb") as handle:
+        prefix = handle.read(INDEX_HEADER_STRUCT.size)
+    if len(prefix) < INDEX_HEADER_STRUCT.size:
+        raise ValueError(f"{path} is too small to be a RES-HW index.")
+    magic, version, count, column_count, *header_words = INDEX_HEADER_STRUCT.unpack(prefix)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION or column_count != len(INDEX_COLUMNS):
+        raise ValueError(f"{path} is not a version {INDEX_VERSION} RES-HW index.")
+    if count == 0:
+        return ResHwHeader(*header_words), {name: np.zeros(0, dtype="<u4") for name in INDEX_COLUMNS}
+    shape = (len(INDEX_COLUMNS), count)
+    table = np.memmap(path, dtype="<u4", mode="r", offset=INDEX_HEADER_STRUCT.size, shape=shape)
+    return ResHwHeader(*header_words), dict(zip(INDEX_COLUMNS, table))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("-i", "--input", type=Path, default=DEFAULT_INPUT, help="RES-HW container path.")
-    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="Destination JSON index path.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help=f"Destination index path (default: {DEFAULT_OUTPUT} with the format's suffix).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="Human-readable JSON, or packed columns as NumPy npz / memory-mappable bin (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--recover",
+        action="store_true",
+        help="Scan the whole file for consistent entry chains instead of trusting the header/table walk.",
+    )
     parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
     args = parser.parse_args()
 
     configure_logging(args.log_level)
+    output = args.output or DEFAULT_OUTPUT.with_suffix(f".{args.format}")
 
     LOGGER.info("Reading %s", args.input)
     payload = args.input.read_bytes()
 
-    LOGGER.info("Parsing header + entries")
-    header, entries = parse_container(payload)
+    if args.recover:
+        LOGGER.info("Parsing header, recovering entries from the whole file")
+        header, entries = recover_container(payload)
+    else:
+        LOGGER.info("Parsing header + entries")
+        header, entries = parse_container(payload)
     LOGGER.info("Recovered %d entries", len(entries))
 
-    LOGGER.info("Writing index to %s", args.output)
-    write_json(args.output, build_output(header, entries))
+    LOGGER.info("Writing %s index to %s", args.format, output)
+    if args.format == "npz":
+        write_npz(output, header, entries)
+    elif args.format == "bin":
+        write_bin(output, header, entries)
+    else:
+        write_json(output, build_output(header, entries))
 
 
 if __name__ == "__main__":
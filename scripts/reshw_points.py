@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Bulk-decode RES-HW glyph values into packed point arrays.
+
+Every entry stores ``value_count`` little-endian 16-bit values, read here as
+``point_count`` ``(x, y)`` pairs (a trailing odd value is dropped, matching
+``ResHwEntry.point_count``).  All entries are gathered with one NumPy fancy
+index into a CSR layout: ``points`` is ``(N_points, 2)`` and entry ``i`` owns
+``points[offsets[i]:offsets[i + 1]]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+if __package__ in (None, ""):  # executed as `python3 scripts/reshw_points.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.mapped_input import Buffer, open_mapped
+from scripts.reshw_parse import DEFAULT_INPUT, ResHwEntry, configure_logging, parse_container, write_json
+
+LOGGER = logging.getLogger("reshw_points")
+
+DEFAULT_OUTPUT = Path("data/processed/reshw_points.json")
+
+
+@dataclass(frozen=True)
+class PackedPoints:
+    """CSR-packed glyph points for a whole container."""
+
+    points: np.ndarray
+    offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return self.offsets.size - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def entry(self, index: int) -> np.ndarray:
+        return self.points[self.offsets[index] : self.offsets[index + 1]]
+
+
+def decode_points(payload: Buffer, entries: Iterable[ResHwEntry]) -> PackedPoints:
+    """Gather the points of all ``entries`` from ``payload`` in one vectorized pass."""
+    layout = np.array([(entry.values_offset, entry.point_count) for entry in entries], dtype=np.int64).reshape(-1, 2)
+    starts, counts = layout[:, 0], layout[:, 1]
+    offsets = np.zeros(counts.size + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    total = int(offsets[-1])
+    within = np.arange(total, dtype=np.int64) - np.repeat(offsets[:-1], counts)
+    byte_pos = np.repeat(starts, counts) + within * 4
+    # Values may start at odd offsets (names are unpadded), so read the two
+    # little-endian bytes of each coordinate rather than viewing as <i2.
+    raw = np.frombuffer(payload, dtype=np.uint8)
+    columns = [
+        raw[byte_pos + shift].astype(np.uint16) | (raw[byte_pos + shift + 1].astype(np.uint16) << 8)
+        for shift in (0, 2)
+    ]
+    points = np.stack(columns, axis=1).view(np.int16)
+    return PackedPoints(points=points, offsets=offsets)
+
+
+def bounding_boxes(packed: PackedPoints) -> np.ndarray:
+    """Per-entry ``(min_x, min_y, max_x, max_y)``; entries without points get zeros."""
+    boxes = np.zeros((len(packed), 4), dtype=np.int32)
+    filled = packed.counts > 0
+    if not filled.any() or packed.points.size == 0:
+        return boxes
+    starts = packed.offsets[:-1][filled]
+    boxes[filled, :2] = np.minimum.reduceat(packed.points, starts, axis=0)
+    boxes[filled, 2:] = np.maximum.reduceat(packed.points, starts, axis=0)
+    return boxes
+
+
+def normalise(packed: PackedPoints) -> np.ndarray:
+    """Scale each entry's points into ``[0, 1]`` of its own bounding box (float32, aspect kept)."""
+    boxes = bounding_boxes(packed)
+    owner = np.repeat(np.arange(len(packed)), packed.counts)
+    origin = boxes[owner, :2]
+    extent = np.maximum(boxes[owner, 2:] - origin, 1).max(axis=1, keepdims=True)
+    return ((packed.points - origin) / extent).astype(np.float32)
+
+
+def compute_point_stats(packed: PackedPoints) -> dict:
+    if packed.points.size == 0:
+        return {"entries": len(packed), "points": 0}
+    boxes = bounding_boxes(packed)
+    filled = packed.counts > 0
+    widths = boxes[filled, 2] - boxes[filled, 0]
+    heights = boxes[filled, 3] - boxes[filled, 1]
+    return {
+        "entries": len(packed),
+        "points": int(packed.points.shape[0]),
+        "x": {"min": int(packed.points[:, 0].min()), "max": int(packed.points[:, 0].max())},
+        "y": {"min": int(packed.points[:, 1].min()), "max": int(packed.points[:, 1].max())},
+        "bbox_width": {"min": int(widths.min()), "max": int(widths.max()), "mean": float(widths.mean())},
+        "bbox_height": {"min": int(heights.min()), "max": int(heights.max()), "mean": float(heights.mean())},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-i", "--input", type=Path, default=DEFAULT_INPUT, help="RES-HW container path.")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="Destination JSON stats path.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+
+    LOGGER.info("Mapping %s", args.input)
+    with open_mapped(args.input) as payload:
+        _, entries = parse_container(payload)
+        packed = decode_points(payload, entries)
+        LOGGER.info("Decoded %d points across %d entries", packed.points.shape[0], len(packed))
+        stats = compute_point_stats(packed)
+
+    LOGGER.info("Writing stats to %s", args.output)
+    write_json(args.output, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,50 @@
 from __future__ import annotations
 
 import argparse
+import heapq
 import logging
 import math
+import sys
 from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+if __package__ in (None, ""):  # executed as `python3 scripts/reshw_probe.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.app_message_table import DEFAULT_BASE_ADDR
+from scripts.mapped_input import DEFAULT_CHUNK_SIZE, Buffer, iter_overlapping_chunks, open_mapped
+
+if TYPE_CHECKING:
+    import numpy as np
 
 LOGGER = logging.getLogger("reshw_probe")
 
 DEFAULT_INPUT = Path("data/raw/ZK-INKJET-RES-HW.zkml")
 DEFAULT_REPORT = Path("data/processed/reshw_probe_report.md")
 DEFAULT_SAMPLE_DIR = Path("data/processed/samples")
+ENGINES = ("legacy", "fast")
+MODES = ("entropy", "pointers", "heatmap")
+DEFAULT_MIN_RUN = 4
+MAX_REPORTED_RUNS = 50
+FAST_BATCH_WINDOWS = 4096
+# Per-batch budget for the block histograms (256 bins per block) plus the widened block bytes.
+FAST_BATCH_CELLS = 1 << 20
+# Past this many blocks per step, sliding one histogram is cheaper than 256 bins per block.
+ROLLING_BLOCKS_PER_STEP = 128
+WORD_SUMMARY_BYTES = 64
+HIGH_ENTROPY = 7.2
+
+
+@dataclass(frozen=True)
+class PointerRun:
+    """Consecutive aligned words that all point into the image (a table candidate)."""
+
+    offset: int
+    count: int
+    va: int
+    targets: Tuple[int, ...]
 
 
 @dataclass
@@ -46,6 +78,51 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--window", type=int, default=4096, help="Sliding window size (bytes).")
     parser.add_argument("--step", type=int, default=512, help="Sliding window stride (bytes).")
     parser.add_argument("--top", type=int, default=6, help="Number of candidate offsets to highlight.")
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="entropy",
+        help=(
+            "'entropy' ranks windows by content statistics; 'pointers' maps pointer density and tables; "
+            "'heatmap' writes per-metric PNG strips and an .npz at several window sizes."
+        ),
+    )
+    parser.add_argument(
+        "--levels",
+        default="256,1024,4096,16384,65536",
+        help="Comma-separated window sizes for --mode heatmap; each a multiple of the smallest (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--heatmap-width",
+        type=int,
+        default=1024,
+        help="Pixel width of the --mode heatmap strips (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--base-addr",
+        type=lambda value: int(value, 0),
+        default=DEFAULT_BASE_ADDR,
+        help=f"Load address of the image for --mode pointers (default: 0x{DEFAULT_BASE_ADDR:08X}).",
+    )
+    parser.add_argument(
+        "--min-run",
+        type=int,
+        default=DEFAULT_MIN_RUN,
+        help="Consecutive in-image words needed to flag a table candidate (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="fast",
+        help="Window statistics engine; 'legacy' recounts every window in Python (default: %(default)s).",
+    )
+    parser.add_argument("--mmap", action="store_true", help="Memory-map the input and stream windows chunk by chunk.")
+    parser.add_argument(
+        "--chunk-size",
+        type=lambda value: int(value, 0),
+        default=DEFAULT_CHUNK_SIZE,
+        help="Chunk size in bytes for --mmap probing (rounded down to a multiple of --step).",
+    )
     parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
     return parser.parse_args()
 
@@ -84,22 +161,153 @@ def word_histogram(data: bytes) -> Counter:
     return words
 
 
-def compute_windows(payload: bytes, window: int, step: int) -> List[WindowStats]:
-    stats: List[WindowStats] = []
+def iter_windows(payload: Buffer, window: int, step: int) -> Iterator[WindowStats]:
     for offset in range(0, len(payload), step):
         chunk = payload[offset : offset + window]
         if len(chunk) < window:
             break
-        stats.append(
-            WindowStats(
-                offset=offset,
-                entropy=shannon_entropy(chunk),
-                ascii_ratio=ascii_ratio(chunk),
-                zero_ratio=zero_ratio(chunk),
-                word_counts=word_histogram(chunk[: 64]),
+        yield WindowStats(
+            offset=offset,
+            entropy=shannon_entropy(chunk),
+            ascii_ratio=ascii_ratio(chunk),
+            zero_ratio=zero_ratio(chunk),
+            word_counts=word_histogram(chunk[:WORD_SUMMARY_BYTES]),
+        )
+
+
+def iter_windows_fast(
+    payload: Buffer,
+    window: int,
+    step: int,
+    batch_windows: int = FAST_BATCH_WINDOWS,
+    batch_cells: int = FAST_BATCH_CELLS,
+) -> Iterator[WindowStats]:
+    """Vectorized :func:`iter_windows` with O(n) total work regardless of window/step overlap.
+
+    The payload is cut into blocks of ``gcd(window, step)`` bytes; one
+    ``bincount`` gives every block's 256-bin histogram, a cumulative sum over
+    blocks turns each window's histogram into a single subtraction, and
+    entropy, ASCII and zero ratios all come from those histograms.  Batches
+    are sized so their histograms stay within ``batch_cells``.  When blocks
+    are tiny relative to the step (e.g. coprime window and step), or a batch
+    would cover little more than one window, a rolling histogram updated by
+    ``step`` bytes per window is used instead.  ``word_counts`` is left
+    empty; :func:`fill_word_counts` adds it for the windows that are reported.
+    """
+    import numpy as np
+
+    total = len(payload)
+    if window <= 0 or step <= 0 or total < window:
+        return
+    count = (total - window) // step + 1
+    block = math.gcd(window, step)
+    blocks_per_step = step // block
+    blocks_per_window = window // block
+
+    data = np.frombuffer(payload, dtype=np.uint8)
+    sizes = np.arange(window + 1, dtype=np.float64)
+    plogp = np.zeros(window + 1)
+    plogp[1:] = sizes[1:] * np.log2(sizes[1:])
+    log_window = math.log2(window)
+
+    budget_blocks = batch_cells // (256 + block)
+    batch_windows = min(batch_windows, max(0, (budget_blocks - blocks_per_window) // blocks_per_step + 1))
+    if blocks_per_step > ROLLING_BLOCKS_PER_STEP or batch_windows * blocks_per_step < blocks_per_window:
+        yield from _iter_windows_rolling(data, window, step, count, plogp, log_window)
+        return
+
+    for first in range(0, count, batch_windows):
+        batch = min(count, first + batch_windows) - first
+        block_count = (batch - 1) * blocks_per_step + blocks_per_window
+        chunk = data[first * step : first * step + block_count * block]
+        # Byte-major layout keeps the cumulative sum running along contiguous memory.
+        bins = chunk.astype(np.int64) * block_count + np.repeat(np.arange(block_count, dtype=np.int64), block)
+        histograms = np.bincount(bins, minlength=256 * block_count).reshape(256, block_count).astype(np.int32)
+        cumulative = np.zeros((256, block_count + 1), dtype=np.int32)
+        np.cumsum(histograms, axis=1, out=cumulative[:, 1:])
+
+        last_start = batch * blocks_per_step
+        counts = (
+            cumulative[:, blocks_per_window : blocks_per_window + last_start : blocks_per_step]
+            - cumulative[:, :last_start:blocks_per_step]
+        )
+        entropy = np.maximum(log_window - plogp[counts].sum(axis=0) / window, 0.0)
+        ascii = counts[32:127].sum(axis=0) / window
+        zeros = counts[0] / window
+        for index, (ent, asc, zero) in enumerate(zip(entropy.tolist(), ascii.tolist(), zeros.tolist())):
+            yield WindowStats(
+                offset=(first + index) * step,
+                entropy=ent,
+                ascii_ratio=asc,
+                zero_ratio=zero,
+                word_counts=Counter(),
             )
+
+
+def _iter_windows_rolling(
+    data: "np.ndarray",
+    window: int,
+    step: int,
+    count: int,
+    plogp: "np.ndarray",
+    log_window: float,
+) -> Iterator[WindowStats]:
+    """One 256-bin histogram slid ``step`` bytes at a time; O(n) work and O(window) memory."""
+    import numpy as np
+
+    counts = np.bincount(data[:window], minlength=256)
+    for index in range(count):
+        offset = index * step
+        if index:
+            leaving = data[offset - step : min(offset, offset - step + window)]
+            entering = data[max(offset - step + window, offset) : offset + window]
+            counts -= np.bincount(leaving, minlength=256)
+            counts += np.bincount(entering, minlength=256)
+        yield WindowStats(
+            offset=offset,
+            entropy=max(log_window - float(plogp[counts].sum()) / window, 0.0),
+            ascii_ratio=int(counts[32:127].sum()) / window,
+            zero_ratio=int(counts[0]) / window,
+            word_counts=Counter(),
         )
-    return stats
+
+
+def select_engine(engine: str) -> Callable[[Buffer, int, int], Iterator[WindowStats]]:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}.")
+    return iter_windows_fast if engine == "fast" else iter_windows
+
+
+def fill_word_counts(payload: Buffer, stats: Iterable[WindowStats]) -> None:
+    for stat in stats:
+        stat.word_counts = word_histogram(payload[stat.offset : stat.offset + WORD_SUMMARY_BYTES])
+
+
+def iter_windows_chunked(
+    payload: Buffer,
+    window: int,
+    step: int,
+    chunk_size: int,
+    engine: str = "legacy",
+) -> Iterator[WindowStats]:
+    """Stream :func:`iter_windows` over ``payload`` without materialising it.
+
+    Chunks are a multiple of ``step`` and overlap by ``window - step`` bytes,
+    so every window starts inside exactly one chunk and is never truncated.
+    """
+    stride = max(step, chunk_size - chunk_size % step)
+    overlap = max(0, window - step)
+    windows = select_engine(engine)
+    for base, chunk in iter_overlapping_chunks(payload, stride, overlap):
+        for stat in windows(chunk, window, step):
+            if stat.offset >= stride:
+                break
+            stat.offset += base
+            yield stat
+
+
+def compute_windows(payload: bytes, window: int, step: int) -> List[WindowStats]:
+    return list(iter_windows(payload, window, step))
 
 
 def score_window(stat: WindowStats) -> float:
@@ -111,12 +319,12 @@ def score_window(stat: WindowStats) -> float:
     return score
 
 
-def select_candidates(stats: Sequence[WindowStats], top: int) -> List[WindowStats]:
-    ranked = sorted(stats, key=score_window, reverse=True)
-    return ranked[:top]
+def select_candidates(stats: Iterable[WindowStats], top: int) -> List[WindowStats]:
+    # nlargest keeps only `top` windows alive, so streamed stats stay bounded.
+    return heapq.nlargest(top, stats, key=score_window)
 
 
-def write_samples(payload: bytes, candidates: Sequence[WindowStats], samples_dir: Path, size: int = 2048) -> List[Path]:
+def write_samples(payload: Buffer, candidates: Sequence[WindowStats], samples_dir: Path, size: int = 2048) -> List[Path]:
     samples_dir.mkdir(parents=True, exist_ok=True)
     written: List[Path] = []
     for idx, stat in enumerate(candidates, start=1):
@@ -129,7 +337,7 @@ def write_samples(payload: bytes, candidates: Sequence[WindowStats], samples_dir
 
 def build_report(
     input_path: Path,
-    payload: bytes,
+    payload: Buffer,
     stats: Sequence[WindowStats],
     candidates: Sequence[WindowStats],
     sample_paths: Sequence[Path],
@@ -168,7 +376,7 @@ def build_report(
             notes.append("significant ASCII text")
         if stat.entropy < 5.0:
             notes.append("low entropy (possible header/table)")
-        if stat.entropy > 7.2:
+        if stat.entropy > HIGH_ENTROPY:
             notes.append("high entropy (compressed/bitmap region)")
         if stat.zero_ratio > 0.1:
             notes.append("padding present")
@@ -185,31 +393,178 @@ def build_report(
     return "\n".join(lines)
 
 
-def main() -> None:
-    args = parse_args()
-    configure_logging(args.log_level)
+def pointer_mask(payload: Buffer, base_addr: int) -> "np.ndarray":
+    """Aligned ``uint32`` words whose value (Thumb bit masked) lies inside the image's VA range."""
+    from scripts.string_xrefs import u32_view
+
+    words = u32_view(payload) & 0xFFFFFFFE
+    return (words >= base_addr) & (words < base_addr + len(payload))
+
+
+def pointer_density(mask: "np.ndarray", window: int, step: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """``(offsets, counts)`` of in-image words fully inside each sliding window (cumulative sums)."""
+    import numpy as np
+
+    total = mask.size * 4
+    if total < window:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cumulative = np.zeros(mask.size + 1, dtype=np.int64)
+    np.cumsum(mask, out=cumulative[1:])
+    offsets = np.arange(0, total - window + 1, step, dtype=np.int64)
+    counts = cumulative[(offsets + window) // 4] - cumulative[(offsets + 3) // 4]
+    return offsets, counts
+
 
-    LOGGER.info("Reading %s", args.input)
-    payload = args.input.read_bytes()
+def find_pointer_runs(payload: Buffer, mask: "np.ndarray", base_addr: int, min_run: int) -> List[PointerRun]:
+    """Runs of at least ``min_run`` consecutive in-image words, longest first."""
+    import numpy as np
 
-    LOGGER.info("Computing sliding-window statistics")
-    windows = compute_windows(payload, args.window, args.step)
-    if not windows:
+    from scripts.string_xrefs import u32_view
+
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    keep = lengths >= min_run
+    starts, lengths = starts[keep], lengths[keep]
+    order = np.lexsort((starts, -lengths))
+    words = u32_view(payload)
+    return [
+        PointerRun(
+            offset=int(start) * 4,
+            count=int(length),
+            va=base_addr + int(start) * 4,
+            targets=tuple(int(word) for word in words[start : start + min(length, 4)]),
+        )
+        for start, length in zip(starts[order].tolist(), lengths[order].tolist())
+    ]
+
+
+def build_pointer_report(
+    input_path: Path,
+    payload: Buffer,
+    base_addr: int,
+    window: int,
+    step: int,
+    dense: Sequence[Tuple[int, int]],
+    runs: Sequence[PointerRun],
+    min_run: int,
+) -> str:
+    words_per_window = max(1, window // 4)
+    lines: List[str] = [
+        "# Pointer Density Probe",
+        "",
+        f"- Source: `{input_path}`",
+        f"- Size: {len(payload):,} bytes",
+        f"- Image VA range: `0x{base_addr:08X}`–`0x{base_addr + len(payload):08X}` (Thumb bit masked)",
+        f"- Sliding window: {window} bytes (step {step})",
+        f"- Table candidates: {len(runs)} (runs of ≥{min_run} consecutive pointers)",
+        "",
+        "## Densest windows",
+        "",
+        "| Offset | VA | Pointers | Density |",
+        "|--------|----|----------|---------|",
+    ]
+    for offset, count in dense:
+        lines.append(
+            f"| `0x{offset:06X}` | `0x{base_addr + offset:08X}` | {count} | {count / words_per_window * 100:5.1f}% |"
+        )
+    lines.extend(
+        [
+            "",
+            "## Table candidates",
+            "",
+            "| Offset | VA | Entries | First targets |",
+            "|--------|----|---------|---------------|",
+        ]
+    )
+    for run in runs[:MAX_REPORTED_RUNS]:
+        targets = ", ".join(f"0x{target:08X}" for target in run.targets)
+        lines.append(f"| `0x{run.offset:06X}` | `0x{run.va:08X}` | {run.count} | {targets} |")
+    if len(runs) > MAX_REPORTED_RUNS:
+        lines.append(f"| … | | {len(runs) - MAX_REPORTED_RUNS} more | |")
+    return "\n".join(lines)
+
+
+def run_pointer_probe(args: argparse.Namespace, payload: Buffer) -> None:
+    import numpy as np
+
+    LOGGER.info("Classifying u32 words against VA range from 0x%08X", args.base_addr)
+    mask = pointer_mask(payload, args.base_addr)
+    offsets, counts = pointer_density(mask, args.window, args.step)
+    top = np.argsort(-counts, kind="stable")[: args.top]
+    dense = [(int(offsets[idx]), int(counts[idx])) for idx in top if counts[idx] > 0]
+    runs = find_pointer_runs(payload, mask, args.base_addr, args.min_run)
+    LOGGER.info("Found %d table candidates", len(runs))
+
+    report = build_pointer_report(
+        args.input, payload, args.base_addr, args.window, args.step, dense, runs, args.min_run
+    )
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(report, encoding="utf-8")
+
+
+def run_heatmap_probe(args: argparse.Namespace, payload: Buffer) -> None:
+    from scripts.blob_heatmap import compute_pyramid, parse_levels, write_heatmaps
+
+    try:
+        levels = parse_levels(args.levels)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    if len(payload) < levels[0]:
+        raise SystemExit("Input is smaller than the finest heatmap level.")
+    # The Markdown default makes no sense for image output; derive a prefix from the input instead.
+    if args.output == DEFAULT_REPORT:
+        prefix = DEFAULT_REPORT.with_name(f"{args.input.stem}_heatmap")
+    else:
+        prefix = args.output.with_suffix("")
+    LOGGER.info("Computing %d-level pyramid (%s bytes)", len(levels), ", ".join(map(str, levels)))
+    series = compute_pyramid(payload, levels, args.base_addr)
+    for path in write_heatmaps(series, prefix, args.heatmap_width):
+        LOGGER.info("Wrote %s", path)
+
+
+def run_probe(args: argparse.Namespace, payload: Buffer, windows: Iterable[WindowStats]) -> None:
+    if len(payload) < args.window:
         raise SystemExit("No windows computed; adjust window/step sizes.")
 
-    LOGGER.info("Ranking candidate offsets")
+    LOGGER.info("Computing sliding-window statistics and ranking candidate offsets")
     candidates = select_candidates(windows, args.top)
     if not candidates:
         raise SystemExit("Could not identify candidate regions.")
+    fill_word_counts(payload, candidates)
 
     LOGGER.info("Writing sample snippets")
     samples = write_samples(payload, candidates, args.samples)
 
     LOGGER.info("Building report")
-    report = build_report(args.input, payload, windows, candidates, samples, args.window, args.step)
+    report = build_report(args.input, payload, candidates, candidates, samples, args.window, args.step)
     args.output.parent.mkdir(parents=True, exist_ok=True)
     args.output.write_text(report, encoding="utf-8")
 
+
+def main() -> None:
+    args = parse_args()
+    configure_logging(args.log_level)
+
+    if args.mode == "heatmap":
+        LOGGER.info("Mapping %s", args.input)
+        with open_mapped(args.input) as payload:
+            run_heatmap_probe(args, payload)
+        return
+    if args.mode == "pointers":
+        LOGGER.info("Mapping %s", args.input)
+        with open_mapped(args.input) as payload:
+            run_pointer_probe(args, payload)
+    elif args.mmap:
+        LOGGER.info("Mapping %s", args.input)
+        with open_mapped(args.input) as payload:
+            windows = iter_windows_chunked(payload, args.window, args.step, args.chunk_size, args.engine)
+            run_probe(args, payload, windows)
+    else:
+        LOGGER.info("Reading %s", args.input)
+        payload = args.input.read_bytes()
+        run_probe(args, payload, select_engine(args.engine)(payload, args.window, args.step))
+
     LOGGER.info("Wrote %s", args.output)
 
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Recover RES-HW entries from damaged or mis-counted containers.
+
+Instead of walking the entry table from the header and stopping at the
+first inconsistency, every NUL byte in the file is tested at once (NumPy)
+as the end of an entry name: a single UTF-8 codepoint before it, then
+``<2I`` part/value counts within limits whose values fit in the file.
+Each candidate links to the candidate starting exactly where it ends;
+chain lengths are computed for all candidates together by pointer
+jumping, and the chains that survive are stitched front to back, skipping
+the damaged ranges between them.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from scripts.mapped_input import Buffer
+from scripts.reshw_parse import HEADER_STRUCT, ResHwEntry
+
+LOGGER = logging.getLogger("reshw_recover")
+
+MAX_PART_COUNT = 0xFFFF
+MAX_VALUE_COUNT = 0x100000
+MIN_CHAIN = 4
+# (name length, lowest lead byte, highest lead byte) for single UTF-8 codepoints.
+UTF8_LEADS = ((1, 0x01, 0x7F), (2, 0xC2, 0xDF), (3, 0xE0, 0xEF), (4, 0xF0, 0xF4))
+
+
+@dataclass(frozen=True)
+class Candidates:
+    """Plausible entries sorted by start offset (all columns are parallel arrays)."""
+
+    starts: np.ndarray
+    ends: np.ndarray
+    name_ends: np.ndarray
+    part_counts: np.ndarray
+    value_counts: np.ndarray
+
+    def __len__(self) -> int:
+        return self.starts.size
+
+
+@dataclass(frozen=True)
+class RecoveryResult:
+    entries: List[ResHwEntry]
+    segments: List[Tuple[int, int]]
+    candidate_count: int
+
+    def skipped(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Byte ranges in ``[start, end)`` not covered by any recovered segment."""
+        gaps: List[Tuple[int, int]] = []
+        cursor = start
+        for seg_start, seg_end in self.segments:
+            if seg_start > cursor:
+                gaps.append((cursor, seg_start))
+            cursor = max(cursor, seg_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+
+def _u32_at(raw: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    word = np.zeros(positions.size, dtype=np.int64)
+    for shift in range(4):
+        word |= raw[positions + shift].astype(np.int64) << (8 * shift)
+    return word
+
+
+def find_candidates(
+    payload: Buffer,
+    start: int = HEADER_STRUCT.size,
+    max_part_count: int = MAX_PART_COUNT,
+    max_value_count: int = MAX_VALUE_COUNT,
+) -> Candidates:
+    raw = np.frombuffer(payload, dtype=np.uint8)
+    total = raw.size
+    nuls = np.flatnonzero(raw == 0)
+    nuls = nuls[nuls + 1 + 8 <= total]
+
+    columns: List[Tuple[np.ndarray, np.ndarray]] = []
+    for length, low, high in UTF8_LEADS:
+        name_ends = nuls[nuls - length >= start]
+        lead = raw[name_ends - length]
+        ok = (lead >= low) & (lead <= high)
+        for tail in range(1, length):
+            follow = raw[name_ends - length + tail]
+            ok &= (follow >= 0x80) & (follow <= 0xBF)
+        columns.append((name_ends[ok] - length, name_ends[ok]))
+    starts = np.concatenate([column[0] for column in columns])
+    name_ends = np.concatenate([column[1] for column in columns])
+
+    part_counts = _u32_at(raw, name_ends + 1)
+    value_counts = _u32_at(raw, name_ends + 5)
+    ends = name_ends + 9 + value_counts * 2
+    sane = (part_counts <= max_part_count) & (value_counts <= max_value_count) & (ends <= total)
+
+    order = np.argsort(starts[sane], kind="stable")
+    return Candidates(
+        starts=starts[sane][order],
+        ends=ends[sane][order],
+        name_ends=name_ends[sane][order],
+        part_counts=part_counts[sane][order],
+        value_counts=value_counts[sane][order],
+    )
+
+
+def chain_links(candidates: Candidates) -> np.ndarray:
+    """Index of the candidate starting where each candidate ends (``-1`` if none)."""
+    following = np.searchsorted(candidates.starts, candidates.ends)
+    following = np.minimum(following, max(len(candidates) - 1, 0))
+    linked = candidates.starts[following] == candidates.ends if len(candidates) else np.zeros(0, dtype=bool)
+    return np.where(linked, following, -1)
+
+
+def chain_lengths(links: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entries in, and last candidate of, the chain starting at every candidate.
+
+    Pointer jumping: every round each node adds the length of the node it
+    points at and then points twice as far, so ``log2(longest chain)`` rounds
+    cover all chains at once.
+    """
+    lengths = np.ones(links.size, dtype=np.int64)
+    last = np.arange(links.size, dtype=np.int64)
+    jump = links.copy()
+    active = jump >= 0
+    while active.any():
+        target = jump[active]
+        lengths[active] += lengths[target]
+        last[active] = last[target]
+        jump[active] = jump[target]
+        active = jump >= 0
+    return lengths, last
+
+
+def recover_entries(payload: Buffer, start: int = HEADER_STRUCT.size, min_chain: int = MIN_CHAIN) -> RecoveryResult:
+    """Stitch consistent entry chains from ``start`` to the end of ``payload``.
+
+    From the current position the earliest chain of at least ``min_chain``
+    entries is taken, then the scan resumes where it ends.  Containers too
+    small for any such chain fall back to the single longest chain.
+    """
+    candidates = find_candidates(payload, start)
+    if not len(candidates):
+        return RecoveryResult(entries=[], segments=[], candidate_count=0)
+    links = chain_links(candidates)
+    lengths, last = chain_lengths(links)
+
+    heads: List[int] = []
+    qualified = np.flatnonzero(lengths >= min_chain)
+    if qualified.size == 0:
+        heads.append(int(np.argmax(lengths)))
+    else:
+        cursor = start
+        while True:
+            pick = np.searchsorted(candidates.starts[qualified], cursor)
+            if pick >= qualified.size:
+                break
+            head = int(qualified[pick])
+            heads.append(head)
+            cursor = int(candidates.ends[last[head]])
+
+    entries: List[ResHwEntry] = []
+    segments: List[Tuple[int, int]] = []
+    for head in heads:
+        node = head
+        while node >= 0:
+            entries.append(_entry_from_candidate(payload, candidates, node, len(entries)))
+            node = int(links[node])
+        segments.append((int(candidates.starts[head]), int(candidates.ends[last[head]])))
+    LOGGER.debug("Stitched %d segment(s) from %d candidates", len(segments), len(candidates))
+    return RecoveryResult(entries=entries, segments=segments, candidate_count=len(candidates))
+
+
+def _entry_from_candidate(payload: Buffer, candidates: Candidates, node: int, index: int) -> ResHwEntry:
+    start = int(candidates.starts[node])
+    name_end = int(candidates.name_ends[node])
+    value_count = int(candidates.value_counts[node])
+    # Lead/continuation masks admit a few overlong or surrogate sequences.
+    name = bytes(payload[start:name_end]).decode("utf-8", errors="replace")
+    return ResHwEntry(
+        index=index,
+        char=name,
+        codepoint=ord(name[0]),
+        part_count=int(candidates.part_counts[node]),
+        value_count=value_count,
+        point_count=value_count // 2,
+        name_offset=start,
+        values_offset=name_end + 9,
+        values_length=value_count * 2,
+    )
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Rasterize RES-HW handwriting glyphs for previews, diffs and atlas sheets.
+
+Glyph points come from :mod:`scripts.reshw_points`.  The stroke layout is
+not confirmed yet, so each glyph's points are joined in stored order as one
+polyline (``--dots`` plots the raw points instead).  All glyphs share one
+frame, the font-wide point bounding box, so sizes and baselines stay
+comparable between glyphs.  Rendered bitmaps are kept in an LRU cache keyed
+by ``(entry index, size)``; atlas export fans out to a process pool for
+large fonts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+if __package__ in (None, ""):  # executed as `python3 scripts/reshw_render.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.mapped_input import Buffer, open_mapped
+from scripts.reshw_parse import DEFAULT_INPUT, ResHwEntry, configure_logging, parse_container
+from scripts.reshw_points import PackedPoints, decode_points
+
+LOGGER = logging.getLogger("reshw_render")
+
+DEFAULT_OUTPUT = Path("data/processed/reshw_atlas.png")
+DEFAULT_SIZE = 32
+DEFAULT_CACHE_SIZE = 4096
+PARALLEL_THRESHOLD = 2048
+BATCH_SIZE = 256
+
+Frame = Tuple[int, int, int, int]
+
+
+class GlyphRasterizer:
+    """Render glyphs to 8-bit grayscale bitmaps (ink = 255) with a size-keyed LRU cache.
+
+    Cached images are shared between callers; copy them before drawing on them.
+    """
+
+    def __init__(
+        self,
+        packed: PackedPoints,
+        entries: Sequence[ResHwEntry],
+        frame: Optional[Frame] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        dots: bool = False,
+    ) -> None:
+        self.packed = packed
+        self.entries = entries
+        self.dots = dots
+        self._by_codepoint: Dict[int, int] = {}
+        for entry in entries:
+            self._by_codepoint.setdefault(entry.codepoint, entry.index)
+        self.frame = frame if frame is not None else font_frame(packed)
+        self._cached = lru_cache(maxsize=cache_size)(self._render_index)
+
+    @classmethod
+    def from_container(cls, payload: Buffer, **kwargs: object) -> "GlyphRasterizer":
+        _, entries = parse_container(payload)
+        return cls(decode_points(payload, entries), entries, **kwargs)  # type: ignore[arg-type]
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def render(self, codepoint: int, size: int = DEFAULT_SIZE) -> Image.Image:
+        try:
+            index = self._by_codepoint[codepoint]
+        except KeyError:
+            raise KeyError(f"No RES-HW entry for U+{codepoint:04X}.") from None
+        return self._cached(index, size)
+
+    def render_index(self, index: int, size: int = DEFAULT_SIZE) -> Image.Image:
+        return self._cached(index, size)
+
+    def render_text(self, text: str, size: int = DEFAULT_SIZE) -> Image.Image:
+        """Lay glyphs out left to right; characters without an entry leave a blank cell."""
+        line = Image.new("L", (max(1, len(text)) * size, size), 0)
+        for column, char in enumerate(text):
+            if ord(char) in self._by_codepoint:
+                line.paste(self.render(ord(char), size), (column * size, 0))
+        return line
+
+    def _render_index(self, index: int, size: int) -> Image.Image:
+        image = Image.new("L", (size, size), 0)
+        points = self.packed.entry(index)
+        if points.shape[0] == 0:
+            return image
+        min_x, min_y, max_x, max_y = self.frame
+        scale = (size - 1) / max(max_x - min_x, max_y - min_y, 1)
+        scaled = (points.astype(np.float32) - (min_x, min_y)) * scale
+        coords = [tuple(point) for point in scaled.round().tolist()]
+        draw = ImageDraw.Draw(image)
+        if self.dots or len(coords) == 1:
+            draw.point(coords, fill=255)
+        else:
+            draw.line(coords, fill=255, width=max(1, size // 32))
+        return image
+
+
+def font_frame(packed: PackedPoints) -> Frame:
+    if packed.points.size == 0:
+        return (0, 0, 1, 1)
+    low = packed.points.min(axis=0)
+    high = packed.points.max(axis=0)
+    return (int(low[0]), int(low[1]), int(high[0]), int(high[1]))
+
+
+_WORKER: Optional[GlyphRasterizer] = None
+
+
+def _init_worker(path: str, dots: bool) -> None:
+    global _WORKER
+    with open_mapped(Path(path)) as payload:
+        _WORKER = GlyphRasterizer.from_container(payload, dots=dots)
+
+
+def _render_batch(indices: Sequence[int], size: int) -> List[bytes]:
+    assert _WORKER is not None
+    return [_WORKER.render_index(index, size).tobytes() for index in indices]
+
+
+def build_atlas(
+    rasterizer: GlyphRasterizer,
+    size: int,
+    columns: int,
+    workers: int = 1,
+    source: Optional[Path] = None,
+) -> Image.Image:
+    """Tile every glyph (in entry order) into one sheet.
+
+    With ``workers > 1`` and a ``source`` path, glyphs are rendered in batches
+    by a process pool whose workers load the container once each.
+    """
+    count = len(rasterizer.entries)
+    rows = max(1, math.ceil(count / columns))
+    atlas = Image.new("L", (columns * size, rows * size), 0)
+
+    def place(index: int, image: Image.Image) -> None:
+        atlas.paste(image, ((index % columns) * size, (index // columns) * size))
+
+    if workers > 1 and source is not None:
+        batches = [list(range(start, min(count, start + BATCH_SIZE))) for start in range(0, count, BATCH_SIZE)]
+        init_args = (str(source), rasterizer.dots)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            for batch, bitmaps in zip(batches, pool.map(_render_batch, batches, [size] * len(batches))):
+                for index, bitmap in zip(batch, bitmaps):
+                    place(index, Image.frombytes("L", (size, size), bitmap))
+    else:
+        for index in range(count):
+            place(index, rasterizer.render_index(index, size))
+    return atlas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-i", "--input", type=Path, default=DEFAULT_INPUT, help="RES-HW container path.")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="Destination PNG path.")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Glyph cell size (default: %(default)s px).")
+    parser.add_argument("--columns", type=int, default=64, help="Atlas columns (default: %(default)s).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help=f"Render processes for the atlas (default: 0 = auto, parallel above {PARALLEL_THRESHOLD} glyphs).",
+    )
+    parser.add_argument("--text", default=None, help="Render this string as a single line instead of the atlas.")
+    parser.add_argument("--dots", action="store_true", help="Plot raw points instead of joining them.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+
+    LOGGER.info("Mapping %s", args.input)
+    with open_mapped(args.input) as payload:
+        rasterizer = GlyphRasterizer.from_container(payload, dots=args.dots)
+    LOGGER.info("Loaded %d glyphs (frame %s)", len(rasterizer.entries), rasterizer.frame)
+
+    if args.text is not None:
+        image = rasterizer.render_text(args.text, args.size)
+    else:
+        workers = args.workers
+        if workers <= 0:
+            workers = (os.cpu_count() or 1) if len(rasterizer.entries) >= PARALLEL_THRESHOLD else 1
+        LOGGER.info("Rendering atlas with %d worker(s)", workers)
+        image = build_atlas(rasterizer, args.size, args.columns, workers, args.input)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    image.save(args.output)
+    LOGGER.info("Wrote %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
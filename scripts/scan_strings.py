@@ -6,9 +6,29 @@ from __future__ import annotations
 import argparse
 import logging
 import re
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Mapping, Optional, Pattern, Sequence, Tuple
+
+if __package__ in (None, ""):  # executed as `python3 scripts/scan_strings.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.app_message_table import DEFAULT_BASE_ADDR
+from scripts.mapped_input import DEFAULT_CHUNK_SIZE, Buffer, open_mapped, release_range
+from scripts.report_format import hexdump, write_jsonl, write_lines
+from scripts.string_index import DEFAULT_INDEX_DIR, load_or_build
+from scripts.string_sweep import (
+    LINE_FOLD_TABLE,
+    WIDE_TAIL_REGEX,
+    WIDE_TAIL_WINDOW,
+    compile_run_regex,
+    compile_sweep,
+    iter_wide_runs,
+)
+
+if TYPE_CHECKING:
+    from scripts.string_xrefs import StringXref, XrefIndex
 
 LOGGER = logging.getLogger("scan_strings")
 
@@ -17,6 +37,19 @@ DEFAULT_OUTPUT = Path("data/processed/app_strings_report.md")
 DEFAULT_MIN_LENGTH = 5
 DEFAULT_PATTERN = r"/dev/tty.*|baud|115200|UART|update|BIN|ZK-INKJET|\.zkml|\.ttf|\.bmp|\.png"
 CONTEXT_RADIUS = 64
+# --mmap chunks grow at most this much to keep a printable run whole.
+MAX_CHUNK_GROWTH = 4
+ENGINES = ("legacy", "fast")
+FORMATS = ("md", "jsonl")
+ENCODING_FAMILIES = ("8bit", "utf-16le", "gb2312")
+NARROW_ONLY = ("8bit",)
+ENCODING_FAMILY = {
+    "ascii": "8bit",
+    "utf-8": "8bit",
+    "latin-1": "8bit",
+    "gb2312": "gb2312",
+    "utf-16le": "utf-16le",
+}
 
 
 @dataclass(frozen=True)
@@ -24,6 +57,7 @@ class StringMatch:
     offset: int
     text: str
     raw: bytes
+    encoding: str
 
 
 def configure_logging(level: str) -> None:
@@ -33,6 +67,19 @@ def configure_logging(level: str) -> None:
     )
 
 
+def parse_encodings(value: str) -> Tuple[str, ...]:
+    """``argparse`` type for ``--encodings``: a comma-separated subset of :data:`ENCODING_FAMILIES`."""
+    families = tuple(part.strip() for part in value.split(",") if part.strip())
+    unknown = sorted(set(families) - set(ENCODING_FAMILIES))
+    if unknown or not families:
+        raise argparse.ArgumentTypeError(
+            f"unknown encoding families {', '.join(unknown)} (choose from {', '.join(ENCODING_FAMILIES)})"
+            if unknown
+            else "expected at least one encoding family"
+        )
+    return families
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
@@ -46,8 +93,14 @@ def parse_args() -> argparse.Namespace:
         "-o",
         "--output",
         type=Path,
-        default=DEFAULT_OUTPUT,
-        help="Markdown report path (default: %(default)s).",
+        default=None,
+        help=f"Report path (default: {DEFAULT_OUTPUT}, or .jsonl with --format jsonl).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="md",
+        help="Markdown report, or one JSON record per match streamed as it is found (default: %(default)s).",
     )
     parser.add_argument(
         "--min-length",
@@ -60,6 +113,71 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_PATTERN,
         help="Regex used to filter strings of interest (default: %(default)s).",
     )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="fast",
+        help=(
+            "String extraction engine; 'legacy' is the byte-by-byte reference. 'fast' reports the same 8-bit "
+            "matches for any --pattern (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--encodings",
+        type=parse_encodings,
+        default=None,
+        help=(
+            f"Comma-separated encoding families for the fast engine and index ({', '.join(ENCODING_FAMILIES)}; "
+            "default: 8bit, matching --engine legacy)."
+        ),
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Memory-map the input and scan it in chunks (bounded memory for SD card images).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=lambda value: int(value, 0),
+        default=DEFAULT_CHUNK_SIZE,
+        help="Chunk size in bytes for --mmap scans (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--index-dir",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_INDEX_DIR,
+        default=None,
+        help=f"Answer queries from a persistent string index (built on first use; default dir: {DEFAULT_INDEX_DIR}).",
+    )
+    parser.add_argument(
+        "--contains",
+        default=None,
+        help="Case-insensitive substring filter (requires --index-dir).",
+    )
+    parser.add_argument(
+        "--start",
+        type=lambda value: int(value, 0),
+        default=None,
+        help="Only report strings at or after this file offset (requires --index-dir).",
+    )
+    parser.add_argument(
+        "--end",
+        type=lambda value: int(value, 0),
+        default=None,
+        help="Only report strings before this file offset (requires --index-dir).",
+    )
+    parser.add_argument(
+        "--xrefs",
+        action="store_true",
+        help="Annotate matches with the literal pools and LDR/ADR instructions that reference them.",
+    )
+    parser.add_argument(
+        "--base-addr",
+        type=lambda value: int(value, 0),
+        default=DEFAULT_BASE_ADDR,
+        help=f"Load address of the binary used for --xrefs (default: 0x{DEFAULT_BASE_ADDR:08X}).",
+    )
     parser.add_argument(
         "--log-level",
         choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
@@ -82,27 +200,235 @@ def extract_strings(payload: bytes, min_length: int) -> List[StringMatch]:
             continue
 
         if start is not None and len(buffer) >= min_length:
-            text = decode_string(bytes(buffer))
-            matches.append(StringMatch(offset=start, text=text, raw=bytes(buffer)))
+            text, encoding = decode_narrow(bytes(buffer))
+            matches.append(StringMatch(offset=start, text=text, raw=bytes(buffer), encoding=encoding))
         start = None
         buffer.clear()
 
     if start is not None and len(buffer) >= min_length:
-        text = decode_string(bytes(buffer))
-        matches.append(StringMatch(offset=start, text=text, raw=bytes(buffer)))
+        text, encoding = decode_narrow(bytes(buffer))
+        matches.append(StringMatch(offset=start, text=text, raw=bytes(buffer), encoding=encoding))
+
+    return matches
+
+
+def extract_strings_fast(
+    payload: bytes,
+    min_length: int,
+    pattern: Optional[str] = None,
+    encodings: Sequence[str] = NARROW_ONLY,
+) -> List[StringMatch]:
+    """Bulk equivalent of :func:`extract_strings` with an optional in-pass filter.
+
+    Printable runs are located by a compiled byte-class regex instead of a
+    Python loop.  Matches are always decided by the text regex on decoded
+    runs, as in the legacy engine.  When the bytes form of ``pattern`` is
+    guaranteed to hit every run the text form matches (see
+    :func:`scripts.string_sweep.sweep_pattern`), it is first swept over the
+    whole payload (non-printable bytes folded to line breaks,
+    ``re.MULTILINE`` so ``^``/``$`` anchor on run edges) and only the runs
+    touched by a sweep hit are decoded.  Other patterns (``.`` on its own,
+    character classes, ``\\w``-style escapes, ...) are checked run by run.
+
+    ``encodings`` selects from :data:`ENCODING_FAMILIES`.  ``gb2312`` re-tags
+    high-byte runs that decode as GB2312 (instead of falling back to
+    latin-1) and ``utf-16le`` adds a companion regex for wide runs over the
+    same buffer.  With the default 8-bit family and no ``pattern`` the result
+    is identical to the legacy engine.
+    """
+    unknown = set(encodings) - set(ENCODING_FAMILIES)
+    if unknown:
+        raise ValueError(f"Unknown encoding families: {', '.join(sorted(unknown))}")
+    cjk = "gb2312" in encodings
+    text_filter = re.compile(pattern, re.IGNORECASE) if pattern else None
+
+    matches: List[StringMatch] = []
+    if "8bit" in encodings or cjk:
+        matches.extend(_extract_narrow(payload, min_length, text_filter, cjk))
+        if "8bit" not in encodings:
+            matches = [match for match in matches if match.encoding == "gb2312"]
+    if "utf-16le" in encodings:
+        wide = (_make_wide_match(found) for found in iter_wide_runs(payload, min_length))
+        matches.extend(match for match in wide if text_filter is None or text_filter.search(match.text))
+        matches.sort(key=lambda item: item.offset)
+    return matches
 
+
+def _extract_narrow(
+    payload: bytes,
+    min_length: int,
+    text_filter: Optional[Pattern[str]],
+    cjk: bool,
+) -> List[StringMatch]:
+    run_regex = compile_run_regex(min_length)
+    sweep = compile_sweep(text_filter.pattern) if text_filter is not None else None
+    if text_filter is None or sweep is None:
+        matches = (_make_match(found, cjk) for found in run_regex.finditer(payload))
+        return [match for match in matches if text_filter is None or text_filter.search(match.text)]
+
+    folded = sweep.fold(payload)
+    matches: List[StringMatch] = []
+    scanned_until = 0
+    for hit in sweep.regex.finditer(folded):
+        limit = max(hit.end(), hit.start() + 1)
+        if limit <= scanned_until:
+            continue
+        cursor = max(scanned_until, folded.rfind(b"\n", 0, hit.start() + 1) + 1)
+        while True:
+            found = run_regex.search(payload, cursor)
+            if found is None or found.start() >= limit:
+                break
+            match = _make_match(found, cjk)
+            if text_filter.search(match.text):
+                matches.append(match)
+            cursor = found.end()
+        scanned_until = max(cursor, limit)
     return matches
 
 
+def _make_match(found: "re.Match[bytes]", cjk: bool = False) -> StringMatch:
+    raw = found.group()
+    text, encoding = decode_narrow(raw, cjk)
+    return StringMatch(offset=found.start(), text=text, raw=raw, encoding=encoding)
+
+
+def _make_wide_match(found: "re.Match[bytes]") -> StringMatch:
+    raw = found.group()
+    return StringMatch(offset=found.start(), text=raw.decode("utf-16-le"), raw=raw, encoding="utf-16le")
+
+
+def iter_string_chunks(
+    buffer: Buffer,
+    chunk_size: int,
+    max_chunk_size: Optional[int] = None,
+) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, chunk)`` slices of ``buffer`` that never split a printable run.
+
+    Each chunk ends just after its last non-printable byte; the trailing
+    partial run is carried over as the head of the next chunk.  A chunk that
+    is printable end-to-end is grown until a boundary (or EOF) is found, but
+    never past ``max_chunk_size`` (default: ``MAX_CHUNK_GROWTH`` times
+    ``chunk_size``).  A run still open at that size is cut there and reported
+    as separate strings, so memory stays bounded on text or padding regions.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    max_chunk_size = max(chunk_size, max_chunk_size or chunk_size * MAX_CHUNK_GROWTH)
+    total = len(buffer)
+    offset = 0
+    while offset < total:
+        size = chunk_size
+        while True:
+            chunk = buffer[offset : offset + size]
+            if offset + len(chunk) >= total:
+                cut = len(chunk)
+                break
+            cut = _safe_cut(chunk)
+            if cut:
+                break
+            if size >= max_chunk_size:
+                LOGGER.debug("Splitting a printable run longer than %d bytes at 0x%08X", size, offset + size)
+                cut = len(chunk)
+                break
+            size = min(size * 2, max_chunk_size)
+        yield offset, chunk[:cut]
+        release_range(buffer, offset, offset + cut)
+        offset += cut
+
+
+def _safe_cut(chunk: bytes) -> int:
+    """Offset just past the last non-printable byte that does not sit inside a
+    trailing 8-bit or UTF-16LE run (0 if the whole chunk is one run)."""
+    tail_start = max(0, len(chunk) - WIDE_TAIL_WINDOW)
+    wide_tail = WIDE_TAIL_REGEX.search(chunk, tail_start)
+    boundary = wide_tail.start() if wide_tail is not None and wide_tail.end() > wide_tail.start() else len(chunk)
+    if tail_start > 0 and boundary <= tail_start + 1:
+        return 0
+    return chunk.translate(LINE_FOLD_TABLE).rfind(b"\n", 0, boundary) + 1
+
+
+def scan_chunked(
+    buffer: Buffer,
+    min_length: int,
+    pattern: str,
+    engine: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encodings: Sequence[str] = NARROW_ONLY,
+) -> List[StringMatch]:
+    """Run the selected engine over ``buffer`` chunk by chunk with absolute offsets."""
+    return list(iter_scan_chunked(buffer, min_length, pattern, engine, chunk_size, encodings))
+
+
+def iter_scan_chunked(
+    buffer: Buffer,
+    min_length: int,
+    pattern: str,
+    engine: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encodings: Sequence[str] = NARROW_ONLY,
+) -> Iterator[StringMatch]:
+    """Streaming form of :func:`scan_chunked`; each chunk's matches are yielded before the next is read."""
+    for base, chunk in iter_string_chunks(buffer, chunk_size):
+        if engine == "legacy":
+            found = filter_matches(extract_strings(chunk, min_length), pattern)
+        else:
+            found = extract_strings_fast(chunk, min_length, pattern, encodings)
+        for match in found:
+            yield replace(match, offset=match.offset + base)
+
+
+def iter_all_strings(
+    buffer: Buffer,
+    min_length: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encodings: Sequence[str] = ENCODING_FAMILIES,
+) -> Iterator[StringMatch]:
+    """Stream every string in ``buffer`` (no pattern filter), e.g. to populate an index."""
+    for base, chunk in iter_string_chunks(buffer, chunk_size):
+        for match in extract_strings_fast(chunk, min_length, encodings=encodings):
+            yield replace(match, offset=match.offset + base)
+
+
+def query_index(args: argparse.Namespace, payload: Buffer) -> List[StringMatch]:
+    index = load_or_build(
+        args.input,
+        args.min_length,
+        args.index_dir,
+        lambda: iter_all_strings(payload, args.min_length, args.chunk_size),
+    )
+    with index:
+        rows = index.query(
+            pattern=args.pattern,
+            substring=args.contains,
+            start=args.start,
+            end=args.end,
+            encodings=[tag for tag, family in ENCODING_FAMILY.items() if family in args.encodings],
+        )
+    return [StringMatch(*row) for row in rows]
+
+
 def is_printable(byte: int) -> bool:
     return 32 <= byte <= 126 or byte >= 0x80
 
 
 def decode_string(raw: bytes) -> str:
+    return decode_narrow(raw)[0]
+
+
+def decode_narrow(raw: bytes, cjk: bool = False) -> Tuple[str, str]:
+    """Decode an 8-bit run and name its encoding (GB2312 is only tried when ``cjk``)."""
+    if raw.isascii():
+        return raw.decode("ascii"), "ascii"
     try:
-        return raw.decode("utf-8")
+        return raw.decode("utf-8"), "utf-8"
     except UnicodeDecodeError:
-        return raw.decode("latin-1")
+        pass
+    if cjk:
+        try:
+            return raw.decode("gb2312"), "gb2312"
+        except UnicodeDecodeError:
+            pass
+    return raw.decode("latin-1"), "latin-1"
 
 
 def filter_matches(matches: Iterable[StringMatch], pattern: str) -> List[StringMatch]:
@@ -112,24 +438,46 @@ def filter_matches(matches: Iterable[StringMatch], pattern: str) -> List[StringM
     return filtered
 
 
-def hexdump(data: bytes, base_offset: int, width: int = 16) -> str:
-    lines: List[str] = []
-    for idx in range(0, len(data), width):
-        chunk = data[idx : idx + width]
-        hex_part = " ".join(f"{byte:02X}" for byte in chunk)
-        ascii_part = "".join(chr(byte) if 32 <= byte <= 126 else "." for byte in chunk)
-        lines.append(f"{base_offset + idx:08X}: {hex_part:<{width*3-1}}  {ascii_part}")
-    return "\n".join(lines)
+def build_xref_index(payload: Buffer, base_addr: int) -> "XrefIndex":
+    from scripts.string_xrefs import XrefIndex
 
+    LOGGER.info("Indexing literal pools and PC-relative loads (base 0x%08X)", base_addr)
+    return XrefIndex(payload, base_addr)
 
-def build_report(
+
+def resolve_xrefs(payload: Buffer, matches: Sequence[StringMatch], base_addr: int) -> Mapping[int, "StringXref"]:
+    """Cross-reference every match against one vectorized pass over ``payload``."""
+    from scripts.string_xrefs import resolve_offsets
+
+    return resolve_offsets(build_xref_index(payload, base_addr), (entry.offset for entry in matches))
+
+
+def format_xref_lines(xref: "StringXref") -> List[str]:
+    pools = ", ".join(f"0x{addr:08X}" for addr in xref.pool_addrs) or "none"
+    loaders = ", ".join(loader.describe() for loader in xref.loaders) or "none"
+    return [
+        f"- VA: 0x{xref.string_addr:08X}",
+        f"- Literal pools: {pools}",
+        f"- Loaded by: {loaders}",
+    ]
+
+
+def _context_range(entry: StringMatch, payload: Buffer) -> Tuple[int, int]:
+    start = max(0, entry.offset - CONTEXT_RADIUS)
+    end = min(len(payload), entry.offset + len(entry.raw) + CONTEXT_RADIUS)
+    return start, end
+
+
+def iter_report_md(
     matches: Sequence[StringMatch],
-    payload: bytes,
+    payload: Buffer,
     source: Path,
     pattern: str,
     min_length: int,
-) -> str:
-    lines: List[str] = [
+    xrefs: Optional[Mapping[int, "StringXref"]] = None,
+) -> Iterator[str]:
+    """Yield the Markdown report line by line (the header needs the match count up front)."""
+    yield from [
         "# APP Strings Report",
         "",
         f"- Source file: `{source}`",
@@ -139,52 +487,120 @@ def build_report(
         "",
     ]
 
-    for entry in matches:
-        start = max(0, entry.offset - CONTEXT_RADIUS)
-        end = min(len(payload), entry.offset + len(entry.raw) + CONTEXT_RADIUS)
-        context = payload[start:end]
-        lines.extend(
-            [
+    with memoryview(payload) as view:
+        for entry in matches:
+            start, end = _context_range(entry, payload)
+            yield from [
                 f"## Offset 0x{entry.offset:08X}",
                 "",
                 f"- Text: `{entry.text}`",
+                f"- Encoding: {entry.encoding}",
                 f"- Length: {len(entry.text)} characters",
                 f"- File position: {entry.offset} (decimal)",
+            ]
+            if xrefs is not None and entry.offset in xrefs:
+                yield from format_xref_lines(xrefs[entry.offset])
+            yield from [
                 "",
                 "```text",
-                hexdump(context, start),
+                hexdump(view[start:end], start),
                 "```",
                 "",
             ]
-        )
 
     if not matches:
-        lines.append("_No matches for the selected pattern._")
-
-    return "\n".join(lines)
+        yield "_No matches for the selected pattern._"
 
 
-def write_report(report: str, destination: Path) -> None:
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    destination.write_text(report, encoding="utf-8")
+def build_report(
+    matches: Sequence[StringMatch],
+    payload: Buffer,
+    source: Path,
+    pattern: str,
+    min_length: int,
+    xrefs: Optional[Mapping[int, "StringXref"]] = None,
+) -> str:
+    return "\n".join(iter_report_md(matches, payload, source, pattern, min_length, xrefs))
+
+
+def iter_report_jsonl(
+    matches: Iterable[StringMatch],
+    payload: Buffer,
+    xref_index: Optional["XrefIndex"] = None,
+) -> Iterator[dict]:
+    """Yield one record per match as soon as the match is produced."""
+    with memoryview(payload) as view:
+        for entry in matches:
+            start, end = _context_range(entry, payload)
+            record = {
+                "offset": entry.offset,
+                "text": entry.text,
+                "encoding": entry.encoding,
+                "length": len(entry.text),
+                "raw": entry.raw.hex(),
+                "context_start": start,
+                "context": view[start:end].hex(),
+            }
+            if xref_index is not None:
+                record["xrefs"] = xref_index.resolve(xref_index.base_addr + entry.offset).to_dict()
+            yield record
+
+
+def iter_matches(args: argparse.Namespace, payload: Buffer) -> Iterator[StringMatch]:
+    """Produce filtered matches for ``args``; chunked scans yield chunk by chunk."""
+    if args.index_dir is not None:
+        yield from query_index(args, payload)
+    elif args.mmap:
+        LOGGER.info("Scanning %s bytes in %s-byte chunks", len(payload), args.chunk_size)
+        yield from iter_scan_chunked(
+            payload, args.min_length, args.pattern, args.engine, args.chunk_size, args.encodings
+        )
+    elif args.engine == "legacy":
+        LOGGER.info("Scanning %s bytes", len(payload))
+        all_matches = extract_strings(payload, args.min_length)
+        LOGGER.info("Found %s candidate strings", len(all_matches))
+        yield from filter_matches(all_matches, args.pattern)
+    else:
+        LOGGER.info("Scanning %s bytes", len(payload))
+        yield from extract_strings_fast(payload, args.min_length, args.pattern, args.encodings)
+
+
+def write_output(args: argparse.Namespace, payload: Buffer, destination: Path) -> None:
+    matches = iter_matches(args, payload)
+    if args.format == "jsonl":
+        xref_index = build_xref_index(payload, args.base_addr) if args.xrefs else None
+        count = write_jsonl(iter_report_jsonl(matches, payload, xref_index), destination)
+        LOGGER.info("Streamed %s matches", count)
+        return
+
+    filtered = list(matches)
+    LOGGER.info("Filtered down to %s matches", len(filtered))
+    xrefs = resolve_xrefs(payload, filtered, args.base_addr) if args.xrefs else None
+    write_lines(iter_report_md(filtered, payload, args.input, args.pattern, args.min_length, xrefs), destination)
 
 
 def main() -> None:
     args = parse_args()
     configure_logging(args.log_level)
 
-    LOGGER.info("Reading binary %s", args.input)
-    payload = args.input.read_bytes()
-    LOGGER.info("Scanning %s bytes", len(payload))
-
-    all_matches = extract_strings(payload, args.min_length)
-    LOGGER.info("Found %s candidate strings", len(all_matches))
-    filtered = filter_matches(all_matches, args.pattern)
-    LOGGER.info("Filtered down to %s matches", len(filtered))
-
-    report = build_report(filtered, payload, args.input, args.pattern, args.min_length)
-    write_report(report, args.output)
-    LOGGER.info("Wrote %s", args.output)
+    if args.index_dir is None and (args.contains or args.start is not None or args.end is not None):
+        raise SystemExit("--contains/--start/--end require --index-dir.")
+    if args.engine == "legacy" and args.encodings not in (None, NARROW_ONLY):
+        raise SystemExit("--engine legacy only extracts 8-bit strings; drop --encodings or use --engine fast.")
+    args.encodings = args.encodings or NARROW_ONLY
+    destination = args.output
+    if destination is None:
+        destination = DEFAULT_OUTPUT.with_suffix(".jsonl") if args.format == "jsonl" else DEFAULT_OUTPUT
+
+    if args.mmap or args.index_dir is not None:
+        LOGGER.info("Mapping binary %s", args.input)
+        with open_mapped(args.input) as payload:
+            write_output(args, payload, destination)
+    else:
+        LOGGER.info("Reading binary %s", args.input)
+        write_output(args, args.input.read_bytes(), destination)
+
+    LOGGER.info("Wrote %s", destination)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk index of extracted strings (SQLite).
+
+An index file is keyed by the SHA-256 of the scanned binary and the minimum
+string length, so re-querying the same image with a different regex,
+substring or offset range never rescans it.  A new index is built only when
+the binary's hash changes.
+
+Besides the row table, every string's raw bytes are stored newline-joined in
+``corpus`` segments so regex queries can sweep one blob per segment instead
+of calling back into Python for each row.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Pattern, Sequence, Set, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.string_sweep import SweepFilter, compile_sweep
+
+LOGGER = logging.getLogger("string_index")
+
+DEFAULT_INDEX_DIR = Path("data/processed/string_index")
+SCHEMA_VERSION = 2
+HASH_CACHE_NAME = "hash_cache.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+CORPUS_SEGMENT_SIZE = 32 * 1024 * 1024
+
+StringRow = Tuple[int, str, bytes, str]
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE strings (offset INTEGER PRIMARY KEY, text TEXT NOT NULL, raw BLOB NOT NULL, encoding TEXT NOT NULL);
+CREATE TABLE corpus (segment INTEGER PRIMARY KEY, data BLOB NOT NULL, starts BLOB NOT NULL, offsets BLOB NOT NULL);
+"""
+
+
+def file_sha256(path: Path, cache_dir: Optional[Path] = None) -> str:
+    """Hash ``path`` in blocks, reusing a cached digest while size and mtime are unchanged."""
+    stat = path.stat()
+    key = str(path.resolve())
+    cache_path = cache_dir / HASH_CACHE_NAME if cache_dir is not None else None
+    cache: dict = {}
+    if cache_path is not None and cache_path.exists():
+        try:
+            cache = json.loads(cache_path.read_text(encoding="utf-8"))
+        except ValueError:
+            cache = {}
+        cached = cache.get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+
+    if cache_path is not None:
+        cache[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(cache, indent=2) + "\n", encoding="utf-8")
+    return sha256
+
+
+def index_path(index_dir: Path, sha256: str, min_length: int) -> Path:
+    return index_dir / f"{sha256}-min{min_length}.sqlite"
+
+
+@lru_cache(maxsize=32)
+def _compile(pattern: str) -> Pattern[str]:
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _regexp(pattern: str, text: str) -> bool:
+    # SQLite evaluates `text REGEXP pattern` as regexp(pattern, text).
+    return _compile(pattern).search(text) is not None
+
+
+class StringIndex:
+    """Read-only view of a built index."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self._conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+        self.meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        if int(self.meta.get("schema_version", 0)) != SCHEMA_VERSION:
+            self._conn.close()
+            raise ValueError(f"{path} uses an unsupported index schema.")
+
+    def __len__(self) -> int:
+        return int(self.meta["count"])
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "StringIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def query(
+        self,
+        pattern: Optional[str] = None,
+        substring: Optional[str] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        encodings: Optional[Sequence[str]] = None,
+    ) -> List[StringRow]:
+        """Return ``(offset, text, raw, encoding)`` rows ordered by offset.
+
+        ``pattern`` is a case-insensitive regex (same semantics as the scan
+        filter), ``substring`` an ASCII case-insensitive literal, and ``start``/``end``
+        bound the string's file offset as a half-open range.  ``encodings``
+        restricts rows to the given encoding tags.
+        """
+        clauses: List[str] = []
+        params: List[object] = []
+        if start is not None:
+            clauses.append("offset >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("offset < ?")
+            params.append(end)
+        if encodings is not None:
+            clauses.append("encoding IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(encodings)))
+        candidates: Optional[Set[int]] = None
+        if substring:
+            clauses.append("instr(lower(text), lower(?)) > 0")
+            params.append(substring)
+            candidates = self._narrow(candidates, re.escape(substring))
+        if pattern:
+            clauses.append("text REGEXP ?")
+            params.append(pattern)
+            candidates = self._narrow(candidates, pattern)
+        if candidates is not None:
+            clauses.append("offset IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sorted(candidates)))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT offset, text, raw, encoding FROM strings{where} ORDER BY offset"
+        return list(self._conn.execute(sql, params))
+
+    def _narrow(self, candidates: Optional[Set[int]], pattern: str) -> Optional[Set[int]]:
+        sweep = compile_sweep(pattern)
+        if sweep is None:
+            return candidates
+        found = self._sweep_candidates(sweep)
+        return found if candidates is None else candidates & found
+
+    def _sweep_candidates(self, sweep: SweepFilter) -> Set[int]:
+        """Offsets of every string touched by a sweep hit in the stored corpus."""
+        candidates: Set[int] = set()
+        for data, starts_blob, offsets_blob in self._conn.execute("SELECT data, starts, offsets FROM corpus"):
+            starts = array("q", starts_blob)
+            offsets = array("q", offsets_blob)
+            for hit in sweep.regex.finditer(sweep.fold(data)):
+                row = max(0, bisect_right(starts, hit.start()) - 1)
+                limit = max(hit.end(), hit.start() + 1)
+                while row < len(starts) and starts[row] < limit:
+                    candidates.add(offsets[row])
+                    row += 1
+        return candidates
+
+
+class _CorpusSegment:
+    """Newline-joined strings plus their corpus starts and file offsets.
+
+    8-bit rows contribute their raw bytes (the scan sweeps those too); wide
+    rows contribute their Latin-1 text so NUL code-unit bytes never split them.
+    """
+
+    def __init__(self, number: int = 0) -> None:
+        self.number = number
+        self.data = bytearray()
+        self.starts = array("q")
+        self.offsets = array("q")
+
+    def add(self, offset: int, text: str, raw: bytes, encoding: str) -> None:
+        self.starts.append(len(self.data))
+        self.offsets.append(offset)
+        self.data += text.encode("latin-1", "replace") if encoding == "utf-16le" else raw
+        self.data += b"\n"
+
+    def store(self, conn: sqlite3.Connection) -> None:
+        if not self.offsets:
+            return
+        conn.execute(
+            "INSERT INTO corpus VALUES (?, ?, ?, ?)",
+            (self.number, bytes(self.data), self.starts.tobytes(), self.offsets.tobytes()),
+        )
+
+
+def build_index(path: Path, rows: Iterable[object], meta: dict, batch_size: int = 10000) -> None:
+    """Write ``rows`` (objects with ``offset``, ``text``, ``raw`` and ``encoding``) into a fresh index.
+
+    The database is written next to ``path`` and renamed into place, so a
+    reader never sees a half-built index.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        count = 0
+        batch: List[StringRow] = []
+        segment = _CorpusSegment()
+        for row in rows:
+            batch.append((row.offset, row.text, row.raw, row.encoding))  # type: ignore[attr-defined]
+            segment.add(row.offset, row.text, row.raw, row.encoding)  # type: ignore[attr-defined]
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT INTO strings VALUES (?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch.clear()
+            if len(segment.data) >= CORPUS_SEGMENT_SIZE:
+                segment.store(conn)
+                segment = _CorpusSegment(segment.number + 1)
+        conn.executemany("INSERT INTO strings VALUES (?, ?, ?, ?)", batch)
+        count += len(batch)
+        segment.store(conn)
+        entries = dict(meta, schema_version=SCHEMA_VERSION, count=count)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [(key, str(value)) for key, value in entries.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def load_or_build(
+    source: Path,
+    min_length: int,
+    index_dir: Path,
+    scan: Callable[[], Iterable[object]],
+) -> StringIndex:
+    """Open the index for ``source``/``min_length``, building it with ``scan()`` if missing."""
+    sha256 = file_sha256(source, index_dir)
+    path = index_path(index_dir, sha256, min_length)
+    if path.exists():
+        try:
+            LOGGER.info("Using string index %s", path)
+            return StringIndex(path)
+        except (sqlite3.DatabaseError, ValueError) as exc:
+            LOGGER.warning("Discarding unreadable index %s (%s)", path, exc)
+            path.unlink()
+
+    LOGGER.info("Building string index %s", path)
+    build_index(path, scan(), {"sha256": sha256, "min_length": min_length, "source": str(source)})
+    return StringIndex(path)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Byte-level regex sweeps shared by the string scanner and the string index."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Pattern
+
+PRINTABLE_CLASS = rb"[\x20-\x7e\x80-\xff]"
+# Escapes that mean the same on bytes and on decoded text.
+SAFE_ESCAPES = frozenset("AZnrtfv")
+# A decoded run's start and end are line edges in the folded buffer.
+RUN_ANCHORS = {"A": b"^", "Z": b"$"}
+# ``re.IGNORECASE`` also folds these non-ASCII characters onto ASCII letters.
+UNICODE_CASE_VARIANTS = {
+    "i": ("\u0130", "\u0131"),
+    "k": ("\u212a",),
+    "s": ("\u017f",),
+}
+LINE_FOLD_TABLE = bytes(byte if 32 <= byte <= 126 or byte >= 0x80 else 0x0A for byte in range(256))
+# UTF-16LE code units restricted to printable Latin-1 (covers the Dutch UI text).
+WIDE_CHAR = rb"[\x20-\x7e\xa0-\xff]\x00"
+WIDE_TAIL_REGEX = re.compile(b"(?:" + WIDE_CHAR + rb")+[\x20-\x7e\xa0-\xff]?\Z|[\x20-\x7e\xa0-\xff]\Z")
+WIDE_TAIL_WINDOW = 4096
+# Starting on a literal NUL lets sre use its fast literal scan to find wide runs.
+WIDE_PROBE_REGEX = re.compile(rb"\x00(?:" + WIDE_CHAR + rb"){2}")
+
+
+@dataclass(frozen=True)
+class SweepFilter:
+    """Bytes regex that finds every run a case-insensitive text filter can match.
+
+    Buffers are folded so every non-printable byte becomes ``\\n`` and
+    lower-cased; with ``re.MULTILINE`` the anchors ``^``/``$`` then sit on
+    printable-run edges.  Hits are candidates only and must be re-checked
+    against the text regex, but no run the text regex matches is missed.
+    """
+
+    regex: Pattern[bytes]
+
+    def fold(self, payload: bytes) -> bytes:
+        return payload.translate(LINE_FOLD_TABLE).lower()
+
+
+def compile_run_regex(min_length: int) -> Pattern[bytes]:
+    """Byte-class regex matching printable runs of at least ``min_length`` bytes."""
+    return re.compile(PRINTABLE_CLASS + b"{%d,}" % max(1, min_length))
+
+
+def compile_wide_regex(min_length: int) -> Pattern[bytes]:
+    """Regex matching UTF-16LE runs of at least ``min_length`` characters."""
+    return re.compile(b"(?:" + WIDE_CHAR + b"){%d,}" % max(1, min_length))
+
+
+def iter_wide_runs(payload: bytes, min_length: int) -> Iterator["re.Match[bytes]"]:
+    """Yield the same matches as ``compile_wide_regex(min_length).finditer``.
+
+    Runs of three or more characters always contain ``\x00 C \x00 C \x00``, so a
+    literal-prefixed probe locates each run and the full regex is only tried
+    at the one or two possible start offsets next to the probe hit.
+    """
+    wide_regex = compile_wide_regex(min_length)
+    if min_length < 3:
+        yield from wide_regex.finditer(payload)
+        return
+    cursor = 0
+    for hit in WIDE_PROBE_REGEX.finditer(payload):
+        for start in (hit.start() - 1, hit.start() + 1):
+            if start < cursor:
+                continue
+            found = wide_regex.match(payload, start)
+            if found is not None:
+                yield found
+                cursor = found.end()
+                break
+
+
+def compile_sweep(pattern: str) -> Optional[SweepFilter]:
+    """Build a :class:`SweepFilter` for ``pattern``, or ``None`` if it cannot be swept.
+
+    Patterns the byte sweep might under-match (see :func:`sweep_pattern`)
+    and patterns that match the empty string fall back to checking every
+    run individually.
+    """
+    swept = sweep_pattern(pattern)
+    if swept is None:
+        return None
+    # Case-insensitive regexes lose sre's literal fast paths; folding both
+    # sides to lower case keeps the sweep several times faster.
+    sweep = SweepFilter(re.compile(swept, re.MULTILINE))
+    if sweep.regex.search(b"") is not None:
+        return None
+    return sweep
+
+
+def sweep_pattern(pattern: str) -> Optional[bytes]:
+    """Lower-cased bytes form of ``pattern`` that matches wherever its text form can.
+
+    Runs are swept as bytes but filtered as decoded text, where one
+    character may span several bytes (UTF-8, GB2312).  Only ASCII patterns
+    made of literals, alternation, groups, anchors, unbounded ``.*``/``.+``
+    and the escapes in :data:`SAFE_ESCAPES` qualify.  A single ``.``, ``?``
+    after ``.``, counted repeats, character sets, class escapes (``\\w``,
+    ``\\d``, ``\\s``, ``\\b`` and their negations), numeric or ``\\x``/``\\u``
+    escapes and inline flags all return ``None``.  ``\\A``/``\\Z`` become
+    ``^``/``$`` so they anchor on every run.  Letters that
+    ``re.IGNORECASE`` folds with non-ASCII characters (``İ``, ``ı``, ``K``,
+    ``ſ``) also accept those characters' UTF-8 bytes.
+    """
+    if not pattern.isascii() or "[" in pattern or "{" in pattern:
+        return None
+    pieces: List[bytes] = []
+    escaped = False
+    for index, char in enumerate(pattern):
+        if escaped:
+            if char.isalnum() and char not in SAFE_ESCAPES:
+                return None
+            pieces.append(RUN_ANCHORS.get(char, b"\\" + char.encode("ascii")))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "(" and pattern.startswith("(?", index) and not pattern.startswith("(?:", index):
+            return None
+        elif char == "." and pattern[index + 1 : index + 2] not in ("*", "+"):
+            return None
+        elif char.lower() in UNICODE_CASE_VARIANTS:
+            variants = (char.lower(),) + UNICODE_CASE_VARIANTS[char.lower()]
+            pieces.append(b"(?:" + b"|".join(re.escape(variant.encode("utf-8")) for variant in variants) + b")")
+        else:
+            pieces.append(char.lower().encode("ascii"))
+    return b"".join(pieces)
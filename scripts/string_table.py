@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Shared lookup of NUL-terminated strings by offset.
+
+Every NUL position in the buffer is found once (``np.flatnonzero``), and
+after that any pointer resolves to its terminator by binary search.  Decoded
+text is cached per offset.  Tools that dereference thousands of string
+pointers (message tables, xref reports) share one :class:`StringTable`
+instead of calling ``payload.find(b"\\x00", offset)`` for every pointer.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from scripts.mapped_input import Buffer
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def decode_text(raw: bytes) -> str:
+    """UTF-8, falling back to Latin-1 so every byte string decodes."""
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1", errors="replace")
+
+
+class StringTable:
+    """C strings of ``payload`` addressed by file offset."""
+
+    def __init__(self, payload: Buffer) -> None:
+        self.payload = payload
+        self._nuls: Optional["np.ndarray"] = None
+        self._cache: Dict[int, str] = {}
+
+    @property
+    def nuls(self) -> "np.ndarray":
+        """Sorted offsets of every NUL byte (computed on first use)."""
+        if self._nuls is None:
+            import numpy as np
+
+            self._nuls = np.flatnonzero(np.frombuffer(self.payload, dtype=np.uint8) == 0)
+        return self._nuls
+
+    def end(self, offset: int) -> int:
+        """Offset of the NUL terminating the string at ``offset``, or ``-1`` if there is none."""
+        nuls = self.nuls
+        index = int(nuls.searchsorted(offset))
+        return int(nuls[index]) if index < nuls.size else -1
+
+    def ends(self, offsets: "np.ndarray") -> "np.ndarray":
+        """Vectorized :meth:`end` for an array of offsets."""
+        import numpy as np
+
+        padded = np.append(self.nuls, -1)
+        return padded[np.searchsorted(self.nuls, offsets)]
+
+    def raw(self, offset: int) -> bytes:
+        end = self.end(offset)
+        if not 0 <= offset < len(self.payload) or end == -1:
+            raise ValueError(f"Missing NUL terminator for string at 0x{offset:X}.")
+        return bytes(self.payload[offset:end])
+
+    def text(self, offset: int) -> str:
+        """Decoded string at ``offset`` (cached)."""
+        cached = self._cache.get(offset)
+        if cached is None:
+            cached = self._cache[offset] = decode_text(self.raw(offset))
+        return cached
+
+    def texts(self, offsets: Iterable[int]) -> List[str]:
+        return [self.text(offset) for offset in offsets]
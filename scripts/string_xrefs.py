@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Resolve which literal pools and loads reference a string in a raw firmware image.
+
+The image is viewed once as little-endian ``uint32`` words to find every
+aligned word that points back into the image (a literal-pool candidate).
+PC-relative loads are decoded in bulk for both instruction sets:
+
+* ARM ``ldr rX, [pc, #±imm12]`` and ``adr`` (``add``/``sub rX, pc, #imm``).
+* Thumb ``ldr rX, [pc, #imm8*4]``, ``ldr.w rX, [pc, #±imm12]``, ``adr`` and
+  ``adr.w``.
+
+Every decoder runs at every aligned offset, so data that merely looks like
+an instruction shows up too; treat loaders as candidates to confirm in a
+disassembler.  Pools and loads are kept as arrays sorted by target address,
+so each string is answered with a couple of bisections instead of a search
+over the image.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+import numpy as np
+
+from scripts.app_message_table import DEFAULT_BASE_ADDR
+
+
+@dataclass(frozen=True)
+class Loader:
+    """An instruction that materialises a string address (directly or via a pool)."""
+
+    address: int
+    mode: str
+    kind: str
+    literal_addr: int | None = None
+
+    def describe(self) -> str:
+        via = f" via 0x{self.literal_addr:08X}" if self.literal_addr is not None else ""
+        return f"0x{self.address:08X} ({self.mode} {self.kind}{via})"
+
+
+@dataclass(frozen=True)
+class StringXref:
+    string_addr: int
+    pool_addrs: Tuple[int, ...]
+    loaders: Tuple[Loader, ...]
+
+    def to_dict(self) -> dict:
+        return {
+            "string_addr": f"0x{self.string_addr:08X}",
+            "pool_addrs": [f"0x{addr:08X}" for addr in self.pool_addrs],
+            "loaders": [
+                {
+                    "address": f"0x{loader.address:08X}",
+                    "mode": loader.mode,
+                    "kind": loader.kind,
+                    "literal_addr": None if loader.literal_addr is None else f"0x{loader.literal_addr:08X}",
+                }
+                for loader in self.loaders
+            ],
+        }
+
+
+def u32_view(payload: bytes) -> np.ndarray:
+    """Zero-copy ``<u4`` view of the word-aligned prefix of ``payload``."""
+    usable = len(payload) - len(payload) % 4
+    return np.frombuffer(payload, dtype="<u4", count=usable // 4)
+
+
+def u16_view(payload: bytes) -> np.ndarray:
+    usable = len(payload) - len(payload) % 2
+    return np.frombuffer(payload, dtype="<u2", count=usable // 2)
+
+
+def _arm_expand_imm(words: np.ndarray) -> np.ndarray:
+    rotate = ((words >> 8) & 0xF) * 2
+    imm8 = words & 0xFF
+    return ((imm8 >> rotate) | (imm8 << ((32 - rotate) & 31))) & 0xFFFFFFFF
+
+
+def _thumb2_imm12(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    return ((first & 0x0400) << 1) | ((second & 0x7000) >> 4) | (second & 0xFF)
+
+
+def decode_arm_loads(payload: bytes, base_addr: int) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+    """Return ``(site_addrs, target_addrs, kind)`` arrays for ARM ldr-literal and adr."""
+    words = u32_view(payload).astype(np.int64)
+    addrs = base_addr + np.arange(words.size, dtype=np.int64) * 4
+    pc = addrs + 8
+    results = []
+
+    ldr = (words & 0x0F7F0000) == 0x051F0000
+    sign = np.where(words & 0x00800000, 1, -1)
+    results.append((addrs[ldr], (pc + sign * (words & 0xFFF))[ldr], "ldr"))
+
+    add = (words & 0x0FFF0000) == 0x028F0000
+    sub = (words & 0x0FFF0000) == 0x024F0000
+    imm = _arm_expand_imm(words)
+    adr = add | sub
+    results.append((addrs[adr], np.where(add, pc + imm, pc - imm)[adr], "adr"))
+    return results
+
+
+def decode_thumb_loads(payload: bytes, base_addr: int) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+    """Return ``(site_addrs, target_addrs, kind)`` arrays for Thumb/Thumb-2 literal loads and adr."""
+    halves = u16_view(payload).astype(np.int64)
+    addrs = base_addr + np.arange(halves.size, dtype=np.int64) * 2
+    aligned_pc = (addrs + 4) & ~3
+    results = []
+
+    ldr16 = (halves & 0xF800) == 0x4800
+    results.append((addrs[ldr16], (aligned_pc + (halves & 0xFF) * 4)[ldr16], "ldr"))
+    adr16 = (halves & 0xF800) == 0xA000
+    results.append((addrs[adr16], (aligned_pc + (halves & 0xFF) * 4)[adr16], "adr"))
+
+    if halves.size < 2:
+        return results
+    first, second = halves[:-1], halves[1:]
+    sites, pc32 = addrs[:-1], aligned_pc[:-1]
+
+    ldrw = (first & 0xFF7F) == 0xF85F
+    sign = np.where(first & 0x0080, 1, -1)
+    results.append((sites[ldrw], (pc32 + sign * (second & 0xFFF))[ldrw], "ldr.w"))
+
+    adr_add = ((first & 0xFBFF) == 0xF20F) & ((second & 0x8000) == 0)
+    adr_sub = ((first & 0xFBFF) == 0xF2AF) & ((second & 0x8000) == 0)
+    imm12 = _thumb2_imm12(first, second)
+    adrw = adr_add | adr_sub
+    results.append((sites[adrw], np.where(adr_add, pc32 + imm12, pc32 - imm12)[adrw], "adr.w"))
+    return results
+
+
+MODES = ("arm", "thumb")
+KINDS = ("ldr", "adr", "ldr.w", "adr.w")
+
+
+class _SortedLookup:
+    """Sorted key array with parallel value columns; lookups are two bisections."""
+
+    def __init__(self, keys: np.ndarray, **columns: np.ndarray) -> None:
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.columns = {name: column[order] for name, column in columns.items()}
+
+    def rows(self, key: int) -> Dict[str, np.ndarray]:
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        hi = int(np.searchsorted(self.keys, key, side="right"))
+        return {name: column[lo:hi] for name, column in self.columns.items()}
+
+
+class XrefIndex:
+    """Literal-pool and loader lookups for one image, built in a single vectorized pass."""
+
+    def __init__(self, payload: bytes, base_addr: int = DEFAULT_BASE_ADDR) -> None:
+        self.base_addr = base_addr
+        self.size = len(payload)
+        words = u32_view(payload).astype(np.int64)
+        pool_addrs = base_addr + np.arange(words.size, dtype=np.int64) * 4
+        in_image = (words >= base_addr) & (words < base_addr + self.size)
+        self._pools = _SortedLookup(words[in_image], addr=pool_addrs[in_image])
+
+        targets, sites, modes, kinds = [], [], [], []
+        for mode, decoded in (
+            ("arm", decode_arm_loads(payload, base_addr)),
+            ("thumb", decode_thumb_loads(payload, base_addr)),
+        ):
+            for site_addrs, target_addrs, kind in decoded:
+                targets.append(target_addrs)
+                sites.append(site_addrs)
+                modes.append(np.full(site_addrs.size, MODES.index(mode), dtype=np.int8))
+                kinds.append(np.full(site_addrs.size, KINDS.index(kind), dtype=np.int8))
+        self._loads = _SortedLookup(
+            np.concatenate(targets),
+            site=np.concatenate(sites),
+            mode=np.concatenate(modes),
+            kind=np.concatenate(kinds),
+        )
+
+    def pools_for(self, address: int) -> Tuple[int, ...]:
+        return tuple(self._pools.rows(address)["addr"].tolist())
+
+    def _loaders_at(self, target: int, prefix: str, literal_addr: int | None) -> List[Loader]:
+        rows = self._loads.rows(target)
+        loaders = []
+        for site, mode, kind in zip(rows["site"].tolist(), rows["mode"].tolist(), rows["kind"].tolist()):
+            if KINDS[kind].startswith(prefix):
+                loaders.append(Loader(site, MODES[mode], KINDS[kind], literal_addr))
+        return loaders
+
+    def resolve(self, address: int) -> StringXref:
+        pools = self.pools_for(address)
+        loaders = self._loaders_at(address, "adr", None)
+        for pool in pools:
+            loaders.extend(self._loaders_at(pool, "ldr", pool))
+        loaders.sort(key=lambda loader: (loader.address, loader.mode))
+        return StringXref(string_addr=address, pool_addrs=pools, loaders=tuple(loaders))
+
+
+def resolve_offsets(index: XrefIndex, offsets: Iterable[int]) -> Mapping[int, StringXref]:
+    """Map file offsets (e.g. ``StringMatch.offset``) to their cross-references."""
+    return {offset: index.resolve(index.base_addr + offset) for offset in offsets}
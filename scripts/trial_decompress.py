@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Find compressed regions in a blob by trial decompression.
+
+High-entropy windows (the ones ``reshw_probe`` labels compressed/bitmap)
+are merged into regions.  Inside each region and a short lead-in before
+it, every offset carrying a codec signature is tried: zlib, gzip, XZ,
+LZMA-alone and bzip2.  Raw deflate has no signature, so it is tried at
+every offset of the lead-in and in the first bytes of the region only.
+Regions are spread across a process pool.  Within a region, offsets
+already covered by a successful stream are skipped.  Once ``--time-budget``
+runs out, pending regions are cancelled and running ones stop at their
+next feed block, keeping the hits found so far.  Hits are written to a JSON
+manifest, and optionally extracted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import json
+import logging
+import lzma
+import os
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if __package__ in (None, ""):  # executed as `python3 scripts/trial_decompress.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.mapped_input import Buffer, open_mapped
+from scripts.reshw_probe import HIGH_ENTROPY, configure_logging, iter_windows_fast
+
+LOGGER = logging.getLogger("trial_decompress")
+
+DEFAULT_INPUT = Path("data/raw/ZK-INKJET-NANO-APP.bin")
+DEFAULT_OUTPUT = Path("data/processed/trial_decompress_manifest.json")
+DEFAULT_WINDOW = 4096
+DEFAULT_STEP = 512
+DEFAULT_LEAD_IN = 512
+DEFAULT_RAW_SCAN = 64
+MIN_OUTPUT = 64
+MAX_OUTPUT = 64 * 1024 * 1024
+FEED_SIZE = 64 * 1024
+CODECS = ("zlib", "gzip", "xz", "lzma", "bz2", "deflate")
+ZLIB_CODECS = ("zlib", "gzip", "deflate")
+
+SIGNATURES: Dict[str, "re.Pattern[bytes]"] = {
+    "zlib": re.compile(rb"\x78[\x01\x5e\x9c\xda]"),
+    "gzip": re.compile(rb"\x1f\x8b\x08"),
+    "xz": re.compile(rb"\xfd7zXZ\x00"),
+    "lzma": re.compile(rb"\x5d\x00\x00[\x00-\xff]\x00"),
+    "bz2": re.compile(rb"BZh[1-9]1AY&SY"),
+}
+
+
+@dataclass(frozen=True)
+class Region:
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class Hit:
+    offset: int
+    codec: str
+    input_size: int
+    output_size: int
+    complete: bool
+    region_start: int
+
+
+def _decompressor(codec: str):
+    if codec == "zlib":
+        return zlib.decompressobj()
+    if codec == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if codec == "deflate":
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+    if codec == "xz":
+        return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    if codec == "lzma":
+        return lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+    if codec == "bz2":
+        return bz2.BZ2Decompressor()
+    raise ValueError(f"Unknown codec {codec!r}.")
+
+
+def try_decompress(
+    payload: Buffer,
+    offset: int,
+    codec: str,
+    max_output: int = MAX_OUTPUT,
+    sink: Optional[Callable[[bytes], None]] = None,
+    deadline: Optional[float] = None,
+) -> Optional[Tuple[int, int, bool]]:
+    """Feed ``payload[offset:]`` to ``codec``; return ``(input_size, output_size, complete)`` or ``None``.
+
+    Raw deflate only counts when the stream reaches its end, since random
+    bytes often decode a few blocks before failing.  Signature codecs also
+    accept a truncated stream of at least ``MIN_OUTPUT`` bytes.  The attempt
+    is abandoned (``None``) once ``time.monotonic()`` passes ``deadline``.
+    """
+    decoder = _decompressor(codec)
+    streaming_zlib = codec in ZLIB_CODECS
+    produced = 0
+    consumed = 0
+    position = offset
+    try:
+        while position < len(payload) and produced < max_output:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            block = payload[position : position + FEED_SIZE]
+            output = decoder.decompress(block, max_output - produced)
+            produced += len(output)
+            if sink is not None and output:
+                sink(output)
+            if streaming_zlib:
+                leftover = len(decoder.unused_data) + len(decoder.unconsumed_tail)
+            else:
+                leftover = len(decoder.unused_data) if decoder.eof else 0
+            consumed = position + len(block) - leftover - offset
+            if decoder.eof:
+                return consumed, produced, True
+            if (decoder.unconsumed_tail if streaming_zlib else not decoder.needs_input):
+                break  # output cap reached
+            position += len(block)
+    except (zlib.error, lzma.LZMAError, OSError, EOFError):
+        return None
+    if codec == "deflate" or produced < MIN_OUTPUT:
+        return None
+    return consumed, produced, False
+
+
+def find_regions(payload: Buffer, window: int, step: int, threshold: float = HIGH_ENTROPY) -> List[Region]:
+    regions: List[Region] = []
+    for stat in iter_windows_fast(payload, window, step):
+        if stat.entropy <= threshold:
+            continue
+        end = min(len(payload), stat.offset + window)
+        if regions and stat.offset <= regions[-1].end:
+            regions[-1] = Region(regions[-1].start, max(regions[-1].end, end))
+        else:
+            regions.append(Region(stat.offset, end))
+    return regions
+
+
+def candidate_offsets(payload: Buffer, region: Region, lead_in: int, raw_scan: int) -> List[Tuple[int, str]]:
+    """Signature hits in the region (plus lead-in) and raw-deflate offsets near its start, in order."""
+    start = max(0, region.start - lead_in)
+    view = payload[start : region.end]
+    found = set()
+    for codec, signature in SIGNATURES.items():
+        for match in signature.finditer(view):
+            found.add((start + match.start(), codec))
+    for offset in range(start, min(region.end, region.start + raw_scan)):
+        found.add((offset, "deflate"))
+    return sorted(found, key=lambda item: (item[0], CODECS.index(item[1])))
+
+
+def scan_region(
+    payload: Buffer,
+    region: Region,
+    lead_in: int,
+    raw_scan: int,
+    max_output: int,
+    deadline: Optional[float] = None,
+) -> List[Hit]:
+    """Trial-decompress the region's candidates; stops early, with the hits so far, at ``deadline``."""
+    hits: List[Hit] = []
+    covered_until = -1
+    for offset, codec in candidate_offsets(payload, region, lead_in, raw_scan):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        if offset < covered_until:
+            continue
+        result = try_decompress(payload, offset, codec, max_output, deadline=deadline)
+        if result is None:
+            continue
+        input_size, output_size, complete = result
+        hits.append(Hit(offset, codec, input_size, output_size, complete, region.start))
+        covered_until = offset + input_size
+    return hits
+
+
+_PAYLOAD: Buffer = b""
+_WORKER_STACK = ExitStack()
+
+
+def _init_worker(path: str) -> None:
+    global _PAYLOAD
+    _PAYLOAD = _WORKER_STACK.enter_context(open_mapped(Path(path)))
+
+
+def _scan_region_worker(
+    region: Region, lead_in: int, raw_scan: int, max_output: int, deadline: Optional[float]
+) -> List[Hit]:
+    return scan_region(_PAYLOAD, region, lead_in, raw_scan, max_output, deadline)
+
+
+def _region_hits(future: Future, region: Region) -> Optional[List[Hit]]:
+    """Hits of a finished region, or ``None`` (logged) if its worker raised."""
+    try:
+        return future.result()
+    except Exception as exc:  # one bad region must not discard the others
+        LOGGER.warning("%s failed: %r", region, exc)
+        return None
+
+
+def scan_parallel(
+    source: Path,
+    regions: Sequence[Region],
+    workers: int,
+    lead_in: int = DEFAULT_LEAD_IN,
+    raw_scan: int = DEFAULT_RAW_SCAN,
+    max_output: int = MAX_OUTPUT,
+    time_budget: Optional[float] = None,
+) -> Tuple[List[Hit], int]:
+    """Scan ``regions`` across ``workers`` processes; returns ``(hits, regions_skipped)``.
+
+    The deadline is ``time.monotonic()``-based, which every worker on the
+    host shares, so regions still running when ``time_budget`` runs out
+    stop there too.  They count as skipped along with the cancelled ones
+    and regions whose worker raised.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    hits: List[Hit] = []
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(source),)) as pool:
+        pending: Dict[Future, Region] = {
+            pool.submit(_scan_region_worker, region, lead_in, raw_scan, max_output, deadline): region
+            for region in regions
+        }
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                cancelled = [future for future in pending if future.cancel()]
+                # The rest are running and return their partial hits at the deadline.
+                for future in wait(pending).done:
+                    if not future.cancelled():
+                        hits.extend(_region_hits(future, pending[future]) or [])
+                skipped += len(pending)
+                LOGGER.warning(
+                    "Time budget exhausted; %d region(s) not scanned, %d cut short.",
+                    len(cancelled),
+                    len(pending) - len(cancelled),
+                )
+                break
+            for future in done:
+                found = _region_hits(future, pending.pop(future))
+                if found is None:
+                    skipped += 1
+                else:
+                    hits.extend(found)
+    hits.sort(key=lambda hit: hit.offset)
+    return hits, skipped
+
+
+def extract_hits(payload: Buffer, hits: Iterable[Hit], directory: Path, max_output: int = MAX_OUTPUT) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for hit in hits:
+        destination = directory / f"0x{hit.offset:08X}.{hit.codec}.bin"
+        with destination.open("wb") as handle:
+            try_decompress(payload, hit.offset, hit.codec, max_output, sink=handle.write)
+
+
+def build_manifest(source: Path, size: int, regions: Sequence[Region], hits: Sequence[Hit], skipped: int) -> dict:
+    return {
+        "source": str(source),
+        "size": size,
+        "regions": [asdict(region) for region in regions],
+        "regions_skipped": skipped,
+        "hits": [dict(asdict(hit), offset_hex=f"0x{hit.offset:08X}") for hit in hits],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-i", "--input", type=Path, default=DEFAULT_INPUT, help="Blob to scan.")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="Manifest JSON path.")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Entropy window size (bytes).")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP, help="Entropy window stride (bytes).")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=HIGH_ENTROPY,
+        help="Entropy (bits/byte) above which windows form a region (default: %(default)s).",
+    )
+    parser.add_argument("--lead-in", type=int, default=DEFAULT_LEAD_IN, help="Bytes before each region also searched.")
+    parser.add_argument(
+        "--raw-scan", type=int, default=DEFAULT_RAW_SCAN, help="Region offsets also tried as raw deflate."
+    )
+    parser.add_argument("--max-output", type=int, default=MAX_OUTPUT, help="Output cap per attempt (bytes).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument("--time-budget", type=float, default=None, help="Stop scanning after this many seconds.")
+    parser.add_argument("--extract", type=Path, default=None, help="Write each decompressed stream here.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), default="INFO")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+
+    with open_mapped(args.input) as payload:
+        regions = find_regions(payload, args.window, args.step, args.threshold)
+        LOGGER.info("%d high-entropy region(s) above %.2f bits/byte", len(regions), args.threshold)
+        hits, skipped = scan_parallel(
+            args.input, regions, args.workers, args.lead_in, args.raw_scan, args.max_output, args.time_budget
+        )
+        LOGGER.info("%d stream(s) decompressed", len(hits))
+        if args.extract is not None:
+            extract_hits(payload, hits, args.extract, args.max_output)
+        manifest = build_manifest(args.input, len(payload), regions, hits, skipped)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    LOGGER.info("Wrote %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,10 @@
 """Enumerate firmware call-sites that target the upgrade orchestrator.
 
 The Ghidra project for this binary is currently unstable, so this helper
-scans the raw `ZK-INKJET-NANO-APP.bin` image with Capstone and recovers
-every `bl`/`blx` that lands on the orchestrator entry point
-(`0x0020EAEC`).  For each call-site it records:
+scans the raw `ZK-INKJET-NANO-APP.bin` image and recovers every `bl`/`blx`
+that lands on the orchestrator entry point (`0x0020EAEC`).  Candidate sites
+for all offsets are decoded at once with NumPy (`scripts.branch_scan`);
+Capstone only confirms the hits.  For each call-site it records:
 
 * The address, mode (ARM/Thumb), and mnemonic of the branch.
 * A disassembly window centred on the call for quick context.
@@ -12,6 +13,19 @@ every `bl`/`blx` that lands on the orchestrator entry point
   extracted from nearby `mov{,w,t}` / `ldr pc-relative` / `adr`
   instructions.
 
+`--target` may be repeated.  With `--index-dir`, sites come from the
+persistent inverse call index (`scripts.call_index`) instead of a fresh scan,
+so only the context windows of the reported calls are disassembled.  With
+`--disasm-cache`, decoded instructions are kept per image hash and base
+(`scripts.disasm_cache`), so repeated runs read the windows back instead of
+calling Capstone again.  `--linear-sweep` keeps only sites that lie on the
+linear-sweep instruction stream of the image (`scripts.parallel_sweep`,
+decoded across `--workers` processes), dropping hits inside other
+instructions or data.  `--function-index` labels each site with its
+containing function (`scripts.function_index`) and starts the context
+window no earlier than that function's entry, unless the entry was only
+seeded by a prologue pattern.
+
 Outputs are written in both JSON (structured data for automation) and a
 human-readable text dump so analysts can triage callers without opening
 the GUI database.
@@ -21,20 +35,17 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
     from capstone import (  # type: ignore
         CS_OP_IMM,
         CS_OP_MEM,
         CS_OP_REG,
-        Cs,
-        CS_ARCH_ARM,
-        CS_MODE_ARM,
-        CS_MODE_THUMB,
     )
     from capstone.arm import ARM_INS_BL, ARM_INS_BLX, ARM_OP_IMM  # type: ignore
 except ImportError as exc:  # pragma: no cover
@@ -42,6 +53,17 @@ except ImportError as exc:  # pragma: no cover
         "capstone module is required; install with `python3 -m pip install capstone`."
     ) from exc
 
+if __package__ in (None, ""):  # executed as `python3 scripts/upgrade_orchestrator_callers.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.arm_disasm import disassembler
+from scripts.branch_scan import CallEdges, arm_calls, thumb_calls
+from scripts.call_index import DEFAULT_INDEX_DIR, load_or_build
+from scripts.disasm_cache import DEFAULT_CACHE_DIR, DisasmCache
+from scripts.function_index import DEFAULT_INDEX_DIR as DEFAULT_FUNCTION_INDEX_DIR
+from scripts.function_index import load_or_build as load_function_index
+from scripts.parallel_sweep import Sweep, sweep
+
 
 TARGET_ADDR = 0x0020_EAEC
 APP_BASE_ADDR = 0x0020_0000
@@ -77,60 +99,56 @@ class InstructionRecord:
         }
 
 
-def _find_thumb_calls(blob: bytes, base_addr: int, target: int) -> Iterable[CallSite]:
-    dis = Cs(CS_ARCH_ARM, CS_MODE_THUMB)
-    dis.detail = True
-    length = len(blob)
-    for offset in range(0, length - 4, 2):
-        insns = list(dis.disasm(blob[offset : offset + 4], base_addr + offset, 1))
-        if not insns:
-            continue
-        insn = insns[0]
-        if insn.address != base_addr + offset:
-            continue
-        if insn.id not in (ARM_INS_BL, ARM_INS_BLX):
-            continue
-        if not insn.operands:
+def _confirm_calls(
+    blob: bytes,
+    base_addr: int,
+    edges: CallEdges,
+    cache: Optional[DisasmCache] = None,
+) -> Iterable[CallSite]:
+    """Re-decode the pre-filtered sites with Capstone and keep the real ``bl``/``blx imm``."""
+    dis = disassembler(edges.mode)
+    for site, target in zip(edges.sites.tolist(), edges.targets.tolist()):
+        offset = site - base_addr
+        if cache is not None:
+            insn = next(iter(cache.disasm(site, 4, edges.mode)), None)
+        else:
+            insn = next(dis.disasm(blob[offset : offset + 4], site, 1), None)
+        if insn is None or insn.id not in (ARM_INS_BL, ARM_INS_BLX) or not insn.operands:
             continue
         op = insn.operands[0]
-        if op.type != ARM_OP_IMM:
-            continue
-        if (op.imm & ~1) != target:
+        if op.type != ARM_OP_IMM or (op.imm & ~1) != target:
             continue
         yield CallSite(
             address=insn.address,
-            mode="thumb",
+            mode=edges.mode,
             mnemonic=insn.mnemonic,
             op_str=insn.op_str,
         )
 
 
-def _find_arm_calls(blob: bytes, base_addr: int, target: int) -> Iterable[CallSite]:
-    dis = Cs(CS_ARCH_ARM, CS_MODE_ARM)
-    dis.detail = True
-    length = len(blob)
-    for offset in range(0, length - 4, 4):
-        insns = list(dis.disasm(blob[offset : offset + 4], base_addr + offset, 1))
-        if not insns:
-            continue
-        insn = insns[0]
-        if insn.address != base_addr + offset:
-            continue
-        if insn.id not in (ARM_INS_BL, ARM_INS_BLX):
-            continue
-        if not insn.operands:
-            continue
-        op = insn.operands[0]
-        if op.type != ARM_OP_IMM:
-            continue
-        if (op.imm & ~1) != target:
-            continue
-        yield CallSite(
-            address=insn.address,
-            mode="arm",
-            mnemonic=insn.mnemonic,
-            op_str=insn.op_str,
-        )
+def _on_path(edges: CallEdges, path: Optional[Sweep]) -> CallEdges:
+    """Drop sites that are not instruction starts of the linear sweep ``path`` (if given)."""
+    return edges if path is None else edges.select(path.contains(edges.sites))
+
+
+def _find_thumb_calls(
+    blob: bytes,
+    base_addr: int,
+    target: int,
+    cache: Optional[DisasmCache] = None,
+    path: Optional[Sweep] = None,
+) -> Iterable[CallSite]:
+    return _confirm_calls(blob, base_addr, _on_path(thumb_calls(blob, base_addr).to(target), path), cache)
+
+
+def _find_arm_calls(
+    blob: bytes,
+    base_addr: int,
+    target: int,
+    cache: Optional[DisasmCache] = None,
+    path: Optional[Sweep] = None,
+) -> Iterable[CallSite]:
+    return _confirm_calls(blob, base_addr, _on_path(arm_calls(blob, base_addr).to(target), path), cache)
 
 
 def _read_u32(blob: bytes, base_addr: int, address: int) -> int | None:
@@ -192,17 +210,12 @@ def _analyse_context(
     base_addr: int,
     call: CallSite,
     byte_count: int,
+    cache: Optional[DisasmCache] = None,
+    function_start: Optional[int] = None,
 ) -> Tuple[List[InstructionRecord], Dict[str, int]]:
-    if call.mode == "thumb":
-        dis = Cs(CS_ARCH_ARM, CS_MODE_THUMB)
-        align = 2
-    else:
-        dis = Cs(CS_ARCH_ARM, CS_MODE_ARM)
-        align = 4
-    dis.detail = True
-
+    align = 2 if call.mode == "thumb" else 4
     half_window = byte_count // 2
-    start_addr = max(base_addr, call.address - half_window)
+    start_addr = max(base_addr, call.address - half_window, function_start or base_addr)
     start_offset = start_addr - base_addr
     start_offset -= start_offset % align
     window = blob[start_offset : start_offset + byte_count]
@@ -211,7 +224,11 @@ def _analyse_context(
     reg_literals: Dict[str, int] = {}
     snapshot: Dict[str, int] = {}
 
-    for insn in dis.disasm(window, base_addr + start_offset):
+    if cache is not None:
+        instructions = cache.disasm(base_addr + start_offset, len(window), call.mode)
+    else:
+        instructions = disassembler(call.mode).disasm(window, base_addr + start_offset)
+    for insn in instructions:
         listing.append(
             InstructionRecord(
                 address=insn.address,
@@ -252,8 +269,47 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     parser.add_argument(
         "--target",
         type=lambda value: int(value, 0),
-        default=TARGET_ADDR,
-        help="Thumb entry point of the orchestrator (default: 0x0020EAEC).",
+        action="append",
+        default=None,
+        help="Call target to report; repeat for several (default: orchestrator 0x0020EAEC).",
+    )
+    parser.add_argument(
+        "--index-dir",
+        type=Path,
+        default=None,
+        help=(
+            "Answer targets from a persistent inverse call index built once per image hash and base "
+            f"(default dir: {DEFAULT_INDEX_DIR}) instead of scanning the image for each run."
+        ),
+    )
+    parser.add_argument(
+        "--disasm-cache",
+        type=Path,
+        default=None,
+        help=(
+            "Read and store decoded instructions in a persistent per-image cache "
+            f"(default dir: {DEFAULT_CACHE_DIR}) instead of running Capstone on every window."
+        ),
+    )
+    parser.add_argument(
+        "--linear-sweep",
+        action="store_true",
+        help="Only report sites on the linear-sweep instruction stream of each mode (decoded in parallel).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for --linear-sweep and for building --function-index (default: all cores).",
+    )
+    parser.add_argument(
+        "--function-index",
+        type=Path,
+        default=None,
+        help=(
+            "Label each site with its containing function from a persistent function-start index "
+            f"(default dir: {DEFAULT_FUNCTION_INDEX_DIR}) and clip the context window at the function entry."
+        ),
     )
     parser.add_argument(
         "--context-bytes",
@@ -279,24 +335,50 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
 def main(argv: Sequence[str] | None = None) -> int:
     args = parse_args(argv or sys.argv[1:])
     blob = args.input.read_bytes()
-
-    calls = (
-        list(_find_thumb_calls(blob, args.base_address, args.target))
-        + list(_find_arm_calls(blob, args.base_address, args.target))
-    )
-    calls.sort(key=lambda call: call.address)
+    targets = args.target or [TARGET_ADDR]
+
+    index = load_or_build(args.input, args.base_address, args.index_dir) if args.index_dir else None
+    cache = DisasmCache.for_image(args.input, blob, args.base_address, args.disasm_cache) if args.disasm_cache else None
+    functions = None
+    if args.function_index:
+        functions = load_function_index(args.input, args.base_address, args.function_index, workers=args.workers)
+    paths: Dict[str, Optional[Sweep]] = {
+        mode: sweep(args.input, args.base_address, mode, workers=args.workers) if args.linear_sweep else None
+        for mode in ("thumb", "arm")
+    }
+    calls: List[Tuple[int, CallSite]] = []
+    for target in targets:
+        if index is not None:
+            found = [
+                call
+                for mode in ("thumb", "arm")
+                for call in _confirm_calls(
+                    blob, args.base_address, _on_path(index.callers(target, mode), paths[mode]), cache
+                )
+            ]
+        else:
+            found = list(_find_thumb_calls(blob, args.base_address, target, cache, paths["thumb"])) + list(
+                _find_arm_calls(blob, args.base_address, target, cache, paths["arm"])
+            )
+        calls.extend((target, call) for call in found)
+    calls.sort(key=lambda item: (item[0], item[1].address))
 
     args.output_json.parent.mkdir(parents=True, exist_ok=True)
 
     json_calls: List[dict[str, str]] = []
     text_lines: List[str] = []
 
-    for call in calls:
+    for target, call in calls:
+        function_start = functions.confirmed_start(call.address) if functions is not None else None
         listing, arg_literals = _analyse_context(
-            blob, args.base_address, call, args.context_bytes
+            blob, args.base_address, call, args.context_bytes, cache, function_start
         )
 
         call_entry = call.to_dict()
+        if len(targets) > 1:
+            call_entry["target"] = f"0x{target:08X}"
+        if functions is not None:
+            call_entry["function"] = functions.label(call.address)
         if arg_literals:
             call_entry["arg_literals"] = {
                 reg: f"0x{value:08X}" for reg, value in sorted(arg_literals.items())
@@ -305,6 +387,7 @@ def main(argv: Sequence[str] | None = None) -> int:
 
         text_lines.append(
             f"{call.address:#010x} [{call.mode}] {call.mnemonic} {call.op_str}"
+            + (f"  ; {call_entry['function']}" if functions is not None else "")
         )
         if arg_literals:
             formatted = ", ".join(
@@ -318,8 +401,11 @@ def main(argv: Sequence[str] | None = None) -> int:
             )
         text_lines.append("")
 
+    if cache is not None:
+        cache.close()
+
     payload = {
-        "target": f"0x{args.target:08X}",
+        "target": f"0x{targets[0]:08X}" if len(targets) == 1 else [f"0x{target:08X}" for target in targets],
         "base_address": f"0x{args.base_address:08X}",
         "callsite_count": len(json_calls),
         "calls": json_calls,
@@ -6,6 +6,13 @@ program database has zeroed memory blocks. It reads raw bytes from
 `ZK-INKJET-NANO-APP.bin`, decodes the Thumb function rooted at
 0x0020EAEC, and records every BL/BLX destination it encounters until the
 function returns.
+
+With `--graph`, the whole call graph below the root (and any extra
+`--graph-root` code pointers) is built from a worklist.  Each function is
+decoded once through the shared `FunctionDecoder`, a `blx` switches the
+callee's mode (ARM <-> Thumb), and the walk stops at `--max-depth` calls
+from a root or `--max-functions` decoded functions.  The graph is written
+as JSON and Graphviz DOT.
 """
 
 from __future__ import annotations
@@ -13,22 +20,38 @@ from __future__ import annotations
 import argparse
 import json
 import sys
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
-    from capstone import Cs, CS_ARCH_ARM, CS_MODE_THUMB  # type: ignore
     from capstone.arm import ARM_INS_BL, ARM_INS_BLX, ARM_OP_IMM, ARM_OP_REG  # type: ignore
 except ImportError as exc:  # pragma: no cover - prefer explicit hint
     raise SystemExit(
         "capstone module is required; install with `python3 -m pip install capstone`"
     ) from exc
 
+if __package__ in (None, ""):  # executed as `python3 scripts/upgrade_orchestrator_callgraph.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.arm_disasm import (
+    DEFAULT_MAX_FUNCTION_BYTES,
+    FunctionDecoder,
+    FunctionSummary,
+    code_pointer,
+    disassembler,
+    split_pointer,
+)
+from scripts.disasm_cache import DEFAULT_CACHE_DIR, DisasmCache
+from scripts.mapped_input import open_mapped
+
 
 APP_BASE_ADDR = 0x0020_0000
 DEFAULT_ROOT = 0x0020_EAEC
 DEFAULT_MAX_BYTES = 0x600
+DEFAULT_MAX_DEPTH = 8
+DEFAULT_MAX_FUNCTIONS = 2000
 
 
 @dataclass(frozen=True)
@@ -37,6 +60,8 @@ class Instruction:
     bytes_: bytes
     mnemonic: str
     op_str: str
+    # (target, kind) for bl/blx, filled in while decoding so calls need no second pass
+    call: Optional[Tuple[str, str]] = None
 
     def to_dict(self) -> dict[str, str]:
         return {
@@ -72,17 +97,16 @@ def load_bytes(path: Path, file_offset: int, max_bytes: int) -> bytes:
 def disassemble_function(
     blob: bytes, start_addr: int, max_length: int
 ) -> Sequence[Instruction]:
-    disassembler = Cs(CS_ARCH_ARM, CS_MODE_THUMB)
-    disassembler.detail = True
     instructions: List[Instruction] = []
     consumed = 0
-    for insn in disassembler.disasm(blob, start_addr):
+    for insn in disassembler("thumb").disasm(blob, start_addr):
         instructions.append(
             Instruction(
                 address=insn.address,
                 bytes_=insn.bytes,
                 mnemonic=insn.mnemonic,
                 op_str=insn.op_str,
+                call=describe_call(insn),
             )
         )
         consumed += len(insn.bytes)
@@ -93,6 +117,18 @@ def disassemble_function(
     return instructions
 
 
+def describe_call(insn) -> Optional[Tuple[str, str]]:
+    """``(target, kind)`` of a ``bl``/``blx``, else ``None``."""
+    if insn.id not in {ARM_INS_BL, ARM_INS_BLX}:
+        return None
+    operand = insn.operands[0]
+    if operand.type == ARM_OP_IMM:
+        return f"0x{operand.imm & 0xFFFFFFFF:08X}", "direct"
+    if operand.type == ARM_OP_REG:
+        return insn.reg_name(operand.value.reg), "register"
+    return "unknown", "other"
+
+
 def is_function_return(mnemonic: str, op_str: str) -> bool:
     if mnemonic == "bx" and op_str.strip().lower() == "lr":
         return True
@@ -104,33 +140,87 @@ def is_function_return(mnemonic: str, op_str: str) -> bool:
 
 
 def extract_calls(instructions: Iterable[Instruction]) -> List[CallSite]:
-    disassembler = Cs(CS_ARCH_ARM, CS_MODE_THUMB)
-    disassembler.detail = True
-    call_sites: List[CallSite] = []
-    for inst in instructions:
-        for decode in disassembler.disasm(inst.bytes_, inst.address):
-            if decode.id not in {ARM_INS_BL, ARM_INS_BLX}:
+    return [
+        CallSite(address=inst.address, mnemonic=inst.mnemonic, target=inst.call[0], kind=inst.call[1])
+        for inst in instructions
+        if inst.call is not None
+    ]
+
+
+@dataclass
+class CallGraph:
+    """Functions reachable from ``roots``; keys are code pointers (bit 0 set for Thumb)."""
+
+    roots: Tuple[int, ...]
+    functions: Dict[int, FunctionSummary] = field(default_factory=dict)
+    depths: Dict[int, int] = field(default_factory=dict)
+    edges: List[Tuple[int, int]] = field(default_factory=list)
+    # Callees that were not decoded: outside the image, or past the depth/function limits.
+    unexpanded: Dict[int, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "roots": [f"0x{root:08X}" for root in self.roots],
+            "function_count": len(self.functions),
+            "edge_count": len(self.edges),
+            "functions": [
+                dict(self.functions[pointer].to_dict(), pointer=f"0x{pointer:08X}", depth=self.depths[pointer])
+                for pointer in sorted(self.functions)
+            ],
+            "edges": [{"caller": f"0x{caller:08X}", "callee": f"0x{callee:08X}"} for caller, callee in self.edges],
+            "unexpanded": [
+                {"pointer": f"0x{pointer:08X}", "reason": reason} for pointer, reason in sorted(self.unexpanded.items())
+            ],
+        }
+
+    def to_dot(self) -> str:
+        lines = ["digraph callgraph {", "  node [shape=box, fontname=monospace];"]
+        for pointer in sorted(self.functions):
+            summary = self.functions[pointer]
+            style = ", style=bold" if pointer in self.roots else ""
+            label = f"0x{summary.address:08X}\\n{summary.mode}, {summary.size} bytes"
+            lines.append(f'  "0x{pointer:08X}" [label="{label}"{style}];')
+        for pointer, reason in sorted(self.unexpanded.items()):
+            lines.append(f'  "0x{pointer:08X}" [label="0x{pointer:08X}\\n{reason}", style=dashed];')
+        for caller, callee in self.edges:
+            lines.append(f'  "0x{caller:08X}" -> "0x{callee:08X}";')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+def build_call_graph(
+    decoder: FunctionDecoder,
+    roots: Sequence[int],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_functions: int = DEFAULT_MAX_FUNCTIONS,
+) -> CallGraph:
+    """Breadth-first walk over direct calls from ``roots`` (code pointers), decoding each function once."""
+    graph = CallGraph(roots=tuple(roots))
+    image_end = decoder.base_addr + len(decoder.payload)
+    worklist: Deque[Tuple[int, int]] = deque((root, 0) for root in roots)
+    queued = set(roots)
+    while worklist:
+        pointer, depth = worklist.popleft()
+        address, mode = split_pointer(pointer)
+        if not decoder.base_addr <= address < image_end:
+            graph.unexpanded[pointer] = "outside image"
+            continue
+        if len(graph.functions) >= max_functions:
+            graph.unexpanded[pointer] = "function limit"
+            continue
+        summary = decoder.decode(address, mode)
+        graph.functions[pointer] = summary
+        graph.depths[pointer] = depth
+        for callee in summary.callees:
+            graph.edges.append((pointer, callee))
+            if callee in queued:
                 continue
-            operand = decode.operands[0]
-            if operand.type == ARM_OP_IMM:
-                target = f"0x{operand.imm & 0xFFFFFFFF:08X}"
-                kind = "direct"
-            elif operand.type == ARM_OP_REG:
-                reg_name = decode.reg_name(operand.value.reg)
-                target = reg_name
-                kind = "register"
+            queued.add(callee)
+            if depth + 1 > max_depth:
+                graph.unexpanded[callee] = "depth limit"
             else:
-                target = "unknown"
-                kind = "other"
-            call_sites.append(
-                CallSite(
-                    address=inst.address,
-                    mnemonic=inst.mnemonic,
-                    target=target,
-                    kind=kind,
-                )
-            )
-    return call_sites
+                worklist.append((callee, depth + 1))
+    return graph
 
 
 def build_payload(
@@ -218,9 +308,77 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
         action="store_true",
         help="Skip writing the plain-text disassembly companion file.",
     )
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="Also build the call graph reachable from the root (and any --graph-root).",
+    )
+    parser.add_argument(
+        "--graph-root",
+        type=lambda value: int(value, 0),
+        action="append",
+        default=[],
+        help="Extra graph root as a code pointer (bit 0 set for Thumb); repeat for several.",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=DEFAULT_MAX_DEPTH,
+        help=f"Calls to follow from a root (default: {DEFAULT_MAX_DEPTH}).",
+    )
+    parser.add_argument(
+        "--max-functions",
+        type=int,
+        default=DEFAULT_MAX_FUNCTIONS,
+        help=f"Stop decoding after this many functions (default: {DEFAULT_MAX_FUNCTIONS}).",
+    )
+    parser.add_argument(
+        "--max-function-bytes",
+        type=lambda value: int(value, 0),
+        default=DEFAULT_MAX_FUNCTION_BYTES,
+        help=f"Decode window per graph function (default: 0x{DEFAULT_MAX_FUNCTION_BYTES:X}).",
+    )
+    parser.add_argument(
+        "--disasm-cache",
+        type=Path,
+        default=None,
+        help=f"Reuse decoded instructions from a persistent per-image cache (default dir: {DEFAULT_CACHE_DIR}).",
+    )
+    parser.add_argument(
+        "--output-graph-json",
+        type=Path,
+        default=Path("data/processed/upgrade_orchestrator_callgraph.json"),
+        help="Destination for the call graph JSON (with --graph).",
+    )
+    parser.add_argument(
+        "--output-dot",
+        type=Path,
+        default=Path("data/processed/upgrade_orchestrator_callgraph.dot"),
+        help="Destination for the Graphviz rendering of the call graph (with --graph).",
+    )
     return parser.parse_args(argv)
 
 
+def write_graph(
+    source: Path,
+    base_addr: int,
+    roots: Sequence[int],
+    args: argparse.Namespace,
+) -> CallGraph:
+    with open_mapped(source) as payload:
+        cache = DisasmCache.for_image(source, payload, base_addr, args.disasm_cache) if args.disasm_cache else None
+        decoder = FunctionDecoder(payload, base_addr, args.max_function_bytes, cache)
+        graph = build_call_graph(decoder, roots, args.max_depth, args.max_functions)
+        if cache is not None:
+            cache.close()
+    document = dict(graph.to_dict(), base_address=f"0x{base_addr:08X}")
+    args.output_graph_json.parent.mkdir(parents=True, exist_ok=True)
+    args.output_graph_json.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+    args.output_dot.parent.mkdir(parents=True, exist_ok=True)
+    args.output_dot.write_text(graph.to_dot(), encoding="utf-8")
+    return graph
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     args = parse_args(argv or sys.argv[1:])
     file_offset = args.root_address - args.base_address
@@ -244,6 +402,9 @@ def main(argv: Sequence[str] | None = None) -> int:
     text_path = None if args.no_text else args.output_text
     args.output_json.parent.mkdir(parents=True, exist_ok=True)
     write_outputs(payload, args.output_json, text_path)
+    if args.graph:
+        roots = [code_pointer(args.root_address, "thumb")] + args.graph_root
+        write_graph(args.input, args.base_address, roots, args)
     return 0
 
 
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import struct
 
-from scripts.app_message_table import ENTRY_STRUCT, parse_message_table
+from scripts.app_message_table import ENTRY_STRUCT, discover_tables, parse_message_table
+from scripts.string_table import StringTable
 
 
 def build_payload(entries: list[tuple[int, int, int]], strings: list[bytes], base_addr: int) -> bytes:
@@ -70,3 +71,26 @@ def test_parse_message_table_invalid_string_pointer_raises() -> None:
         assert False, "expected ValueError"
     except ValueError:
         pass
+
+
+def test_discover_tables_finds_table_at_unknown_offset() -> None:
+    base_addr = 0x200000
+    entries = [(0x100 + idx * 0x40 + 1, idx, idx % 3) for idx in range(6)]
+    strings = [b"Ready", b"Upgrade complete", b"Ink low", b"Paper jam", b"Busy", b"Idle"]
+    table = build_payload(entries, strings, base_addr)
+    prefix = bytes(range(256)) * 4 + struct.pack("<III", base_addr + 0x40, 7, 0)  # lone plausible entry
+    # Shift the string pointers by the prefix length so they still land on the strings.
+    shifted = bytearray(table)
+    for idx in range(len(entries)):
+        string_addr = struct.unpack_from("<I", shifted, idx * ENTRY_STRUCT.size + 4)[0]
+        struct.pack_into("<I", shifted, idx * ENTRY_STRUCT.size + 4, string_addr + len(prefix))
+    payload = prefix + bytes(shifted)
+
+    strings = StringTable(payload)
+    candidates = discover_tables(payload, base_addr, strings=strings)
+    nuls = strings.nuls
+
+    assert [(item.offset, item.entries, item.terminated) for item in candidates] == [(len(prefix), 6, True)]
+    assert candidates[0].first_text == "Ready"
+    assert len(parse_message_table(payload, candidates[0].offset, base_addr, strings=strings)) == 6
+    assert strings.nuls is nuls
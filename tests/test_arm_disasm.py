@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import struct
+
+from scripts.app_message_table import MessageEntry, enrich_handlers
+from scripts.arm_disasm import FunctionDecoder
+
+BASE = 0x0020_0000
+
+
+def thumb_blx(source: int, target: int) -> bytes:
+    """Thumb-2 ``blx imm`` (switches to ARM; PC is word-aligned first)."""
+    offset = target - ((source + 4) & ~3)
+    sign = (offset >> 24) & 1
+    j1 = (~((offset >> 23) & 1) ^ sign) & 1
+    j2 = (~((offset >> 22) & 1) ^ sign) & 1
+    high = 0xF000 | (sign << 10) | ((offset >> 12) & 0x3FF)
+    low = 0xC000 | (j1 << 13) | (j2 << 11) | ((offset >> 1) & 0x7FE)
+    return struct.pack("<HH", high, low)
+
+
+def arm_blx(source: int, target: int) -> bytes:
+    """ARM ``blx imm`` to a Thumb target (bit 1 of the offset goes in H)."""
+    offset = target - (source + 8)
+    return struct.pack("<I", 0xFA00_0000 | ((offset & 2) << 23) | ((offset >> 2) & 0xFF_FFFF))
+
+
+def build_image() -> bytes:
+    image = bytearray(0x400)
+    thumb = (
+        bytes.fromhex("10b5")  # push {r4, lr}
+        + bytes.fromhex("0348")  # ldr r0, [pc, #12] -> 0xB100D000
+        + bytes.fromhex("d0f84411")  # ldr.w r1, [r0, #0x144]
+        + thumb_blx(BASE + 0x108, BASE + 0x200)
+        + bytes.fromhex("10bd")  # pop {r4, pc}
+        + b"\x00\x00"
+        + struct.pack("<I", 0xB100_D000)
+    )
+    image[0x100 : 0x100 + len(thumb)] = thumb
+    arm = (
+        bytes.fromhex("10402de9")  # push {r4, lr}
+        + bytes.fromhex("000050e3")  # cmp r0, #0
+        + bytes.fromhex("0100000a")  # beq past the first return
+        + bytes.fromhex("1080bde8")  # pop {r4, pc}
+        + bytes.fromhex("4c0190e5")  # ldr r0, [r0, #0x14c]
+        + arm_blx(BASE + 0x214, BASE + 0x100)
+        + bytes.fromhex("1080bde8")  # pop {r4, pc}
+    )
+    image[0x200 : 0x200 + len(arm)] = arm
+    return bytes(image)
+
+
+def test_function_decoder_summarises_and_caches() -> None:
+    decoder = FunctionDecoder(build_image(), BASE)
+
+    thumb = decoder.summary(BASE + 0x101)
+    assert (thumb.mode, thumb.size, thumb.returns) == ("thumb", 14, True)
+    assert thumb.callees == (BASE + 0x200,)
+    assert thumb.mmio == (0xB100_D000,)
+    assert thumb.struct_offsets == (0x144,)
+
+    arm = decoder.summary(BASE + 0x200)
+    assert arm.size == 0x1C  # runs past the early pop because the beq jumps beyond it
+    assert arm.callees == (BASE + 0x101,)
+    assert arm.struct_offsets == (0x14C,)
+    assert decoder.summary(BASE + 0x101) is thumb and len(decoder) == 2
+
+
+def test_enrich_handlers_decodes_shared_handlers_once() -> None:
+    entries = [
+        MessageEntry(index, BASE + 0x101, 0x100, 0x300, 0x300, 1, "Gereed") for index in range(3)
+    ] + [MessageEntry(3, BASE + 0x200, 0x200, 0x300, 0x300, 2, "Fout")]
+
+    handlers = enrich_handlers(build_image(), entries, BASE)
+
+    assert sorted(handlers) == [BASE + 0x101, BASE + 0x200]
+    assert handlers[BASE + 0x101]["queue_offsets"] == ["0x144"]
+    assert handlers[BASE + 0x200]["callees"] == ["0x00200101"]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import math
+import struct
+
+import numpy as np
+
+from scripts.blob_heatmap import compute_pyramid, write_heatmaps
+from scripts.reshw_probe import iter_windows
+
+
+def test_pyramid_levels_match_direct_window_stats() -> None:
+    base = 0x0020_0000
+    payload = bytes(range(256)) * 8 + b"\x00" * 1024 + b"Gereed!!" * 128 + struct.pack("<64I", *([base + 8] * 64))
+    series = compute_pyramid(payload, [256, 1024], base)
+
+    for level in (256, 1024):
+        direct = list(iter_windows(payload, level, level))
+        assert series[f"entropy_{level}"].size == len(direct)
+        for value, stat in zip(series[f"entropy_{level}"].tolist(), direct):
+            assert math.isclose(value, stat.entropy, abs_tol=1e-4)
+        assert np.allclose(series[f"zero_{level}"], [stat.zero_ratio for stat in direct])
+    assert series["pointers_256"][-1] == 1.0
+
+
+def test_write_heatmaps_emits_png_per_metric_and_npz(tmp_path) -> None:
+    series = compute_pyramid(bytes(range(256)) * 64, [256, 4096], 0x0020_0000)
+    written = write_heatmaps(series, tmp_path / "blob", width=32)
+
+    assert sorted(path.name for path in written) == [
+        "blob.npz",
+        "blob_ascii.png",
+        "blob_entropy.png",
+        "blob_pointers.png",
+        "blob_zero.png",
+    ]
+    with np.load(tmp_path / "blob.npz") as archive:
+        assert archive["levels"].tolist() == [256, 4096]
+        assert archive["entropy_4096"].size == 4
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import random
+
+from capstone import CS_ARCH_ARM, CS_MODE_ARM, CS_MODE_THUMB, Cs
+from capstone.arm import ARM_INS_BL, ARM_INS_BLX, ARM_OP_IMM
+
+from scripts.branch_scan import arm_calls, thumb_calls
+from scripts.upgrade_orchestrator_callers import _find_arm_calls, _find_thumb_calls
+
+BASE = 0x0020_0000
+
+
+def noisy_code(seed: int, size: int) -> bytes:
+    """Random bytes with many BL/BLX-shaped halfword pairs planted in them."""
+    rng = random.Random(seed)
+    blob = bytearray(rng.randbytes(size))
+    for offset in range(0, size - 4, 24):
+        blob[offset + 1] = 0xF0 | rng.randrange(8)
+        blob[offset + 3] = rng.choice([0xF8, 0xE8, 0xD0, 0xC0, 0xF0])
+    return bytes(blob)
+
+
+def capstone_calls(blob: bytes, mode: int, step: int) -> dict:
+    dis = Cs(CS_ARCH_ARM, mode)
+    dis.detail = True
+    calls = {}
+    for offset in range(0, len(blob) - 3, step):
+        insn = next(dis.disasm(blob[offset : offset + 4], BASE + offset, 1), None)
+        if insn and insn.id in (ARM_INS_BL, ARM_INS_BLX) and insn.operands[0].type == ARM_OP_IMM:
+            calls[BASE + offset] = insn.operands[0].imm & 0xFFFFFFFF
+    return calls
+
+
+def test_vectorized_decoders_match_capstone() -> None:
+    blob = noisy_code(7, 0x4000)
+    for decode, mode, step in ((thumb_calls, CS_MODE_THUMB, 2), (arm_calls, CS_MODE_ARM, 4)):
+        edges = decode(blob, BASE)
+        assert dict(zip(edges.sites.tolist(), edges.targets.tolist())) == capstone_calls(blob, mode, step)
+
+
+def test_find_calls_confirm_prefiltered_sites() -> None:
+    blob = noisy_code(11, 0x4000)
+    thumb = thumb_calls(blob, BASE)
+    arm = arm_calls(blob, BASE)
+    target = int(thumb.targets[0])
+
+    sites = [call.address for call in _find_thumb_calls(blob, BASE, target | 1)]
+    assert sites == thumb.to(target).sites.tolist()
+    arm_target = int(arm.targets[0])
+    assert [call.address for call in _find_arm_calls(blob, BASE, arm_target)] == arm.to(arm_target).sites.tolist()
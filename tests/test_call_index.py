@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+import struct
+
+from scripts.branch_scan import image_calls
+from scripts.call_index import CallIndex, load_or_build
+from scripts.upgrade_orchestrator_callers import main
+
+BASE = 0x0020_0000
+
+
+def arm_bl(source: int, target: int) -> bytes:
+    return struct.pack("<I", 0xEB00_0000 | (((target - (source + 8)) >> 2) & 0xFF_FFFF))
+
+
+def build_image() -> bytes:
+    image = bytearray(0x1000)
+    for site, target in ((0x100, 0x800), (0x200, 0x800), (0x300, 0x900), (0x400, 0x0100_0000)):
+        image[site : site + 4] = arm_bl(BASE + site, BASE + target)
+    return bytes(image)
+
+
+def test_call_index_round_trip_and_lookup(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_image())
+
+    index = load_or_build(source, BASE, tmp_path / "index")
+    assert index.callers(BASE + 0x801, "arm").sites.tolist() == [BASE + 0x100, BASE + 0x200]
+    assert index.callers(BASE + 0x900, "arm").sites.tolist() == [BASE + 0x300]
+    # The BL at 0x400 leaves the image, so its edge is dropped.
+    planted = image_calls(build_image(), BASE, "arm")
+    assert planted.targets[planted.sites == BASE + 0x400].tolist() == [BASE + 0x0100_0000]
+    assert len(index) == 3
+    assert all(BASE + 0x400 not in edges.sites for edges in index.edges.values())
+
+    (saved,) = (tmp_path / "index").glob("*-base00200000.npz")
+    reloaded = CallIndex.load(saved)
+    assert reloaded.meta["sha256"] in saved.name
+    assert reloaded.callers(BASE + 0x800, "arm").sites.tolist() == [BASE + 0x100, BASE + 0x200]
+
+
+def test_callers_cli_answers_several_targets_from_index(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_image())
+    output = tmp_path / "callers.json"
+
+    argv = ["--input", str(source), "--index-dir", str(tmp_path / "index"), "--output-json", str(output)]
+    argv += ["--output-text", str(tmp_path / "callers.txt"), "--target", "0x200800", "--target", "0x200900"]
+    assert main(argv) == 0
+
+    payload = json.loads(output.read_text(encoding="utf-8"))
+    assert payload["target"] == ["0x00200800", "0x00200900"]
+    assert [(call["address"], call["target"]) for call in payload["calls"]] == [
+        ("0x00200100", "0x00200800"),
+        ("0x00200200", "0x00200800"),
+        ("0x00200300", "0x00200900"),
+    ]
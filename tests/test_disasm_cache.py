@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+
+from scripts.arm_disasm import FunctionDecoder, disassembler
+from scripts.disasm_cache import DisasmCache
+from scripts.upgrade_orchestrator_callers import main
+from tests.test_arm_disasm import BASE, build_image
+from tests.test_call_index import build_image as build_call_image
+
+
+def signature(insn) -> tuple:
+    operands = tuple(
+        (operand.type, operand.reg if operand.type == 1 else 0, operand.imm if operand.type == 2 else 0)
+        for operand in insn.operands[:3]
+    )
+    return insn.address, insn.size, insn.id, insn.cc, insn.mnemonic, insn.op_str, bytes(insn.bytes), operands
+
+
+def test_cache_matches_capstone_and_hits_on_reopen(tmp_path) -> None:
+    payload = build_image() + random.Random(7).randbytes(0x400)
+    windows = [(start, 0x40) for start in range(0, len(payload), 0x30)] + [(0, len(payload))]
+
+    for mode in ("thumb", "arm"):
+        expected = [
+            [signature(insn) for insn in disassembler(mode).disasm(payload[start : start + length], BASE + start)]
+            for start, length in windows
+        ]
+        for attempt in range(2):
+            with DisasmCache(tmp_path, payload, BASE) as cache:
+                decoded = [
+                    [signature(insn) for insn in cache.disasm(BASE + start, length, mode)] for start, length in windows
+                ]
+                assert decoded == expected
+                if attempt:
+                    assert cache.misses == 0 and cache.hits > 0
+
+
+def test_function_decoder_reads_through_cache(tmp_path) -> None:
+    payload = build_image()
+    with DisasmCache(tmp_path, payload, BASE) as cache:
+        cached = FunctionDecoder(payload, BASE, cache=cache).summary(BASE + 0x101)
+    assert cached == FunctionDecoder(payload, BASE).summary(BASE + 0x101)
+
+
+def test_callers_cli_output_unchanged_with_cache(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_call_image())
+    cached = ["--disasm-cache", str(tmp_path / "cache")]
+    outputs = []
+    for run, extra in enumerate(([], cached, cached)):
+        text = tmp_path / f"callers{run}.txt"
+        argv = ["--input", str(source), "--target", "0x200800", "--output-json", str(tmp_path / f"callers{run}.json")]
+        assert main(argv + ["--output-text", str(text)] + extra) == 0
+        outputs.append(text.read_text(encoding="utf-8"))
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert "0x00200100" in outputs[0]
+
+
+def test_two_open_handles_share_string_ids(tmp_path) -> None:
+    payload = bytes.fromhex("0100a0e3031082e0")  # mov r0, #1; add r1, r2, r3
+    with DisasmCache(tmp_path, payload, 0x1000) as first, DisasmCache(tmp_path, payload, 0x1000) as second:
+        assert [insn.op_str for insn in first.disasm(0x1000, 4, "arm")] == ["r0, #1"]
+        assert [insn.op_str for insn in second.disasm(0x1004, 4, "arm")] == ["r1, r2, r3"]
+        assert [insn.mnemonic for insn in first.disasm(0x1004, 4, "arm")] == ["add"]
+
+    expected = [signature(insn) for insn in disassembler("arm").disasm(payload, 0x1000)]
+    with DisasmCache(tmp_path, payload, 0x1000) as cache:
+        assert [signature(insn) for insn in cache.disasm(0x1000, 8, "arm")] == expected
+        assert cache.misses == 0
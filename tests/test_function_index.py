@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+from scripts.function_index import HANDLER, FunctionIndex, load_or_build
+from scripts.upgrade_orchestrator_callers import main
+from tests.test_arm_disasm import BASE, build_image
+
+
+def test_index_seeds_prologues_calls_and_handlers(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_image())
+
+    index = load_or_build(source, BASE, tmp_path / "index")
+    assert [index.describe(row) for row in range(len(index))] == [
+        {"start": "0x00200100", "mode": "thumb", "sources": ["prologue", "call"]},
+        {"start": "0x00200200", "mode": "arm", "sources": ["prologue", "call"]},
+    ]
+    assert index.label(BASE + 0x108) == "sub_00200100+0x8"
+    assert index.label(BASE + 0x200) == "sub_00200200"
+    assert index.label(BASE + 0x40) == "?" and index.start(BASE + 0x40) is None
+
+    (saved,) = (tmp_path / "index").glob("*-base00200000.npz")
+    reloaded = FunctionIndex.load(saved).with_pointers([BASE + 0x301, BASE + 0x101], HANDLER)
+    assert reloaded.addresses.tolist() == [BASE + 0x100, BASE + 0x200, BASE + 0x300]
+    assert reloaded.describe(0)["sources"] == ["prologue", "call", "handler"]
+    assert reloaded.describe(2) == {"start": "0x00200300", "mode": "thumb", "sources": ["handler"]}
+    assert reloaded.start(BASE + 0x3FF) == BASE + 0x300
+
+
+def test_lone_thumb_pushes_need_a_return_or_padding_on_the_sweep(tmp_path) -> None:
+    image = bytearray(build_image())
+    image[0x33E:0x342] = bytes.fromhex("012310b5")  # movs r3, #1; push {r4, lr}: mid-code, dropped
+    image[0x37E:0x382] = bytes.fromhex("704710b5")  # bx lr; push {r4, lr}: kept
+    image[0x3A0:0x3A4] = bytes.fromhex("ffff10b5")  # erased flash, but decoded as vsli.32: off the sweep
+    source = tmp_path / "app.bin"
+    source.write_bytes(bytes(image))
+
+    index = load_or_build(source, BASE, tmp_path / "index")
+    assert index.addresses.tolist() == [BASE + 0x100, BASE + 0x200, BASE + 0x380]
+    assert index.describe(2) == {"start": "0x00200380", "mode": "thumb", "sources": ["prologue"]}
+    assert index.start(BASE + 0x390) == BASE + 0x380 and index.confirmed_start(BASE + 0x390) is None
+    assert index.confirmed_start(BASE + 0x108) == BASE + 0x100
+
+
+def test_callers_cli_labels_sites(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_image())
+    output = tmp_path / "callers.json"
+
+    argv = ["--input", str(source), "--target", "0x200200", "--function-index", str(tmp_path / "index")]
+    assert main(argv + ["--output-json", str(output), "--output-text", str(tmp_path / "callers.txt")]) == 0
+
+    (call,) = json.loads(output.read_text(encoding="utf-8"))["calls"]
+    assert (call["address"], call["function"]) == ("0x00200108", "sub_00200100+0x8")
+    listing = (tmp_path / "callers.txt").read_text(encoding="utf-8")
+    assert "; sub_00200100+0x8" in listing
+    assert "0x00200100" in listing and "0x002000FE" not in listing  # window starts at the function entry
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import random
+
+from scripts.parallel_sweep import call_visitor, plan_chunks, sweep
+from scripts.upgrade_orchestrator_callers import main
+from tests.test_arm_disasm import thumb_blx
+from tests.test_call_index import BASE, build_image
+
+
+def test_chunked_sweep_matches_single_sweep(tmp_path) -> None:
+    source = tmp_path / "noise.bin"
+    source.write_bytes(random.Random(9).randbytes(0x4000))
+    assert [chunk.stop for chunk in plan_chunks(0x1002, 0x802)] == [0x800, 0x1000, 0x1002]
+
+    for mode in ("thumb", "arm"):
+        single = sweep(source, BASE, mode, call_visitor, workers=1, chunk_size=0x10000)
+        chunked = sweep(source, BASE, mode, call_visitor, workers=2, chunk_size=0x104, overlap=0)
+        assert chunked.offsets.tolist() == single.offsets.tolist()
+        assert chunked.records == single.records
+
+
+def test_merge_resynchronises_instruction_straddling_boundary(tmp_path) -> None:
+    image = bytearray(bytes.fromhex("00bf") * 0x100)  # nop
+    # The blx ends at 0x102; decoded on its own, its second halfword starts a different 32-bit instruction.
+    image[0xFE:0x102] = thumb_blx(BASE + 0xFE, BASE + 0x480)
+    source = tmp_path / "straddle.bin"
+    source.write_bytes(bytes(image))
+
+    result = sweep(source, BASE, "thumb", call_visitor, workers=1, chunk_size=0x100, overlap=0)
+    assert result.resynced == 1
+    assert result.records == {0xFE: BASE + 0x480}
+    assert result.offsets.tolist() == list(range(0, 0x100, 2)) + list(range(0x102, 0x200, 2))
+
+
+def test_callers_cli_linear_sweep(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_image())
+    output = tmp_path / "callers.json"
+
+    argv = ["--input", str(source), "--target", "0x200800", "--linear-sweep", "--workers", "1"]
+    assert main(argv + ["--output-json", str(output), "--output-text", str(tmp_path / "callers.txt")]) == 0
+
+    payload = json.loads(output.read_text(encoding="utf-8"))
+    assert [call["address"] for call in payload["calls"]] == ["0x00200100", "0x00200200"]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import struct
+
+import pytest
+
+from scripts.reshw_pack import GlyphEdit, apply_edits, encode_entry, load_edits
+from scripts.reshw_parse import HEADER_STRUCT, parse_container
+
+
+def write_container(path, glyphs: dict[str, list[int]], trailer: bytes = b"\x00\x00") -> bytes:
+    payload = struct.pack("<6I", 1, 0, 320, 240, 0, len(glyphs))
+    payload += b"".join(encode_entry(char, 1, values) for char, values in glyphs.items()) + trailer
+    path.write_bytes(payload)
+    return payload
+
+
+def glyph_values(payload: bytes) -> list[tuple[str, tuple[int, ...]]]:
+    return [
+        (entry.char, struct.unpack_from(f"<{entry.value_count}H", payload, entry.values_offset))
+        for entry in parse_container(payload)[1]
+    ]
+
+
+def test_same_size_edit_patches_only_changed_bytes(tmp_path) -> None:
+    path = tmp_path / "font.zkml"
+    original = write_container(path, {"A": [1, 2, 3, 4], "B": [5, 6]})
+
+    report = apply_edits(path, [GlyphEdit("A", 1, (1, 2, 9, 4))])
+
+    assert report.mode == "patch"
+    assert report.bytes_written == 1
+    patched = path.read_bytes()
+    assert len(patched) == len(original)
+    assert [entry.char for entry in parse_container(patched)[1]] == ["A", "B"]
+    assert parse_container(patched)[1][0].values_offset + 4 == report.ranges[0][0]
+
+
+def test_resize_and_add_rewrite_tail_only(tmp_path) -> None:
+    path = tmp_path / "font.zkml"
+    write_container(path, {"A": [1, 2], "B": [3, 4], "C": [5, 6]}, trailer=b"\x00PAD")
+
+    report = apply_edits(path, [GlyphEdit("B", 2, (7, 8, 9, 10)), GlyphEdit("中", 1, (-1, 0))])
+
+    payload = path.read_bytes()
+    header, entries = parse_container(payload)
+    assert report.mode == "tail"
+    assert report.ranges[0][0] == entries[1].name_offset > HEADER_STRUCT.size
+    assert header.entry_count == 4
+    assert [(entry.char, entry.value_count) for entry in entries] == [("A", 2), ("B", 4), ("C", 2), ("中", 2)]
+    assert payload.endswith(encode_entry("中", 1, [-1, 0]) + b"\x00PAD")
+
+
+def test_same_size_edits_survive_resize_and_add(tmp_path) -> None:
+    path = tmp_path / "font.zkml"
+    glyphs = {"A": [1, 2], "B": [3, 4], "C": [5, 6]}
+
+    write_container(path, glyphs)
+    report = apply_edits(path, [GlyphEdit("A", 1, (1, 9)), GlyphEdit("C", 1, (5, 6, 7))])
+    assert glyph_values(path.read_bytes()) == [("A", (1, 9)), ("B", (3, 4)), ("C", (5, 6, 7))]
+    assert (report.mode, report.replaced, report.added) == ("tail", 2, 0)
+
+    write_container(path, glyphs)
+    edits = [GlyphEdit("A", 1, (1, 9)), GlyphEdit("Z", 1, (1,)), GlyphEdit("Z", 1, (2, 3))]
+    report = apply_edits(path, edits)
+    payload = path.read_bytes()
+    assert glyph_values(payload) == [("A", (1, 9)), ("B", (3, 4)), ("C", (5, 6)), ("Z", (2, 3))]
+    assert parse_container(payload)[0].entry_count == 4 and report.added == 1
+
+
+def test_invalid_edits_are_rejected_before_writing(tmp_path) -> None:
+    path = tmp_path / "font.zkml"
+    original = write_container(path, {"A": [1, 2]})
+
+    for char, values in (("AB", [1, 2]), ("", [1, 2]), ("A", [70000, 2]), ("A", [-0x8001, 2])):
+        with pytest.raises(ValueError):
+            encode_entry(char, 1, values)
+        edits = tmp_path / "edits.json"
+        items = [{"char": "A", "part_count": 1, "values": [3, 4]}, {"char": char, "part_count": 1, "values": values}]
+        edits.write_text(json.dumps(items), encoding="utf-8")
+        with pytest.raises(ValueError):
+            apply_edits(path, load_edits(edits))
+
+    assert path.read_bytes() == original
+    assert GlyphEdit("A", 1, (-0x8000, 0xFFFF)).encode() == encode_entry("A", 1, [0x8000, 0xFFFF])
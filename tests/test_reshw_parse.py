@@ -2,7 +2,17 @@ from __future__ import annotations
 
 import struct
 
-from scripts.reshw_parse import HEADER_STRUCT, ENTRY_PREFIX_STRUCT, parse_container, parse_entries, parse_header
+from scripts.reshw_parse import (
+    ENTRY_PREFIX_STRUCT,
+    HEADER_STRUCT,
+    ResHwContainer,
+    load_index,
+    parse_container,
+    parse_entries,
+    parse_header,
+    write_bin,
+    write_npz,
+)
 
 
 def build_entry(name: str, part_count: int, values: list[int]) -> bytes:
@@ -42,3 +52,33 @@ def test_parse_entries_truncated_payload_raises() -> None:
         assert False, "expected ValueError"
     except ValueError:
         pass
+
+
+def test_container_indexes_codepoints_and_views_values(tmp_path) -> None:
+    path = tmp_path / "font.zkml"
+    header_bytes = struct.pack("<6I", 1, 0, 320, 240, 2, 2)
+    path.write_bytes(header_bytes + build_entry("A", 1, [1, 2, 3, 4]) + build_entry("中", 2, [5, 0xFFFF]))
+
+    with ResHwContainer.open(path) as container:
+        assert len(container) == 2
+        assert ord("中") in container
+        assert container.entry(ord("中")) == parse_container(path.read_bytes())[1][1]
+        view = container.values(ord("A"))
+        assert view.tobytes() == struct.pack("<4H", 1, 2, 3, 4)
+        view.release()
+        points = container.points(ord("中"))
+        assert points.tolist() == [5, -1]
+        del points
+
+
+def test_compact_indexes_roundtrip(tmp_path) -> None:
+    header_bytes = struct.pack("<6I", 1, 0, 320, 240, 2, 2)
+    container = header_bytes + build_entry("A", 3, [1, 2, 3, 4]) + build_entry("B", 5, [9, 9])
+    header, entries = parse_container(container)
+
+    for name, writer in (("index.npz", write_npz), ("index.bin", write_bin)):
+        writer(tmp_path / name, header, entries)
+        loaded_header, columns = load_index(tmp_path / name)
+        assert loaded_header == header
+        assert columns["codepoint"].tolist() == [ord("A"), ord("B")]
+        assert columns["values_offset"].tolist() == [entry.values_offset for entry in entries]
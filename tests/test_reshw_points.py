@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+
+from scripts.reshw_parse import parse_container
+from scripts.reshw_points import bounding_boxes, compute_point_stats, decode_points, normalise
+
+
+def build_entry(name: str, values: list[int]) -> bytes:
+    return name.encode("utf-8") + b"\x00" + struct.pack("<2I", 1, len(values)) + struct.pack(f"<{len(values)}h", *values)
+
+
+def test_decode_points_packs_entries_csr_style() -> None:
+    # The two-byte name "é" puts the second entry's values at an odd offset; "C" has no points.
+    container = (
+        struct.pack("<6I", 1, 0, 320, 240, 0, 4)
+        + build_entry("A", [1, 2, 3, 4])
+        + build_entry("é", [-5, 10, 7, -2, 9])
+        + build_entry("C", [])
+        + build_entry("D", [0, 0])
+    )
+    _, entries = parse_container(container)
+    packed = decode_points(container, entries)
+
+    assert packed.offsets.tolist() == [0, 2, 4, 4, 5]
+    assert packed.entry(1).tolist() == [[-5, 10], [7, -2]]
+    assert packed.points.dtype == np.int16
+    assert bounding_boxes(packed).tolist() == [[1, 2, 3, 4], [-5, -2, 7, 10], [0, 0, 0, 0], [0, 0, 0, 0]]
+    assert normalise(packed)[2:4].tolist() == [[0.0, 1.0], [1.0, 0.0]]
+    assert compute_point_stats(packed)["points"] == 5
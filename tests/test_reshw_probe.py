@@ -1,6 +1,18 @@
 import math
+import struct
 
-from scripts.reshw_probe import ascii_ratio, shannon_entropy, zero_ratio
+from scripts.reshw_probe import (
+    FAST_BATCH_CELLS,
+    ascii_ratio,
+    find_pointer_runs,
+    iter_windows,
+    iter_windows_chunked,
+    iter_windows_fast,
+    pointer_density,
+    pointer_mask,
+    shannon_entropy,
+    zero_ratio,
+)
 
 
 def test_shannon_entropy_bounds():
@@ -18,3 +30,40 @@ def test_ascii_ratio_counts_printables():
 def test_zero_ratio_detects_padding():
     data = b"\x00\x00\x01\x02"
     assert math.isclose(zero_ratio(data), 0.5, rel_tol=1e-6)
+
+
+def test_chunked_windows_match_in_memory_windows():
+    payload = bytes(range(256)) * 12 + b"\x00" * 700 + b"ABCD" * 300
+    expected = [(stat.offset, stat.entropy, stat.ascii_ratio) for stat in iter_windows(payload, 256, 64)]
+    chunked = [
+        (stat.offset, stat.entropy, stat.ascii_ratio)
+        for stat in iter_windows_chunked(payload, 256, 64, chunk_size=300)
+    ]
+    assert chunked == expected
+
+
+def test_fast_engine_matches_legacy_windows():
+    payload = bytes(range(256)) * 12 + b"\x00" * 700 + b"ABCD" * 300 + bytes(range(7, 250, 3)) * 5
+    # Coprime pairs give one-byte blocks; with a tiny cell budget (97, 130) falls back to the rolling histogram.
+    cases = ((256, 64, FAST_BATCH_CELLS), (200, 48, FAST_BATCH_CELLS), (64, 64, FAST_BATCH_CELLS))
+    for window, step, cells in cases + ((257, 64, FAST_BATCH_CELLS), (97, 130, 1)):
+        legacy = list(iter_windows(payload, window, step))
+        fast = list(iter_windows_fast(payload, window, step, batch_windows=7, batch_cells=cells))
+        assert [stat.offset for stat in fast] == [stat.offset for stat in legacy]
+        for left, right in zip(fast, legacy):
+            assert math.isclose(left.entropy, right.entropy, abs_tol=1e-9)
+            assert math.isclose(left.ascii_ratio, right.ascii_ratio) and math.isclose(left.zero_ratio, right.zero_ratio)
+
+
+def test_pointer_probe_flags_tables_and_density():
+    base = 0x0020_0000
+    table = struct.pack("<5I", base + 0x40, base + 0x81, base + 0x10, base + 0xF0, base + 0x7C)
+    payload = b"\xff" * 64 + table + b"\x00" * 40 + struct.pack("<2I", base, base + 4) + b"\xee" * 140
+
+    mask = pointer_mask(payload, base)
+    runs = find_pointer_runs(payload, mask, base, min_run=2)
+    assert [(run.offset, run.count) for run in runs] == [(64, 5), (124, 2)]
+    assert runs[0].targets[1] == base + 0x81
+
+    offsets, counts = pointer_density(mask, 32, 16)
+    assert counts[offsets.tolist().index(64)] == 5
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+from scripts.reshw_parse import HEADER_STRUCT, parse_container
+from scripts.reshw_recover import recover_entries
+
+
+def build_entry(name: str, values: list[int]) -> bytes:
+    return name.encode("utf-8") + b"\x00" + struct.pack("<2I", 1, len(values)) + struct.pack(f"<{len(values)}H", *values)
+
+
+def test_recovery_matches_clean_parse() -> None:
+    container = struct.pack("<6I", 1, 0, 320, 240, 0, 5) + b"".join(
+        build_entry(char, [index, 0, 7, 0]) for index, char in enumerate("AéB中C")
+    )
+    assert recover_entries(container).entries == parse_container(container)[1]
+
+
+def test_recovery_skips_damaged_range_and_keeps_tail() -> None:
+    head = b"".join(build_entry(char, [1, 2]) for char in "ABCD")
+    damage = b"Z\x00" + struct.pack("<2I", 1, 0xFFFFFFFF) + b"\xff" * 7
+    tail = b"".join(build_entry(char, [3, 4, 5, 6]) for char in "EFGH")
+    container = struct.pack("<6I", 1, 0, 320, 240, 0, 8) + head + damage + tail
+
+    with pytest.raises(ValueError):
+        parse_container(container)
+    result = recover_entries(container)
+    assert "".join(entry.char for entry in result.entries) == "ABCDEFGH"
+    damage_start = HEADER_STRUCT.size + len(head)
+    assert result.skipped(HEADER_STRUCT.size, len(container)) == [(damage_start, damage_start + len(damage))]
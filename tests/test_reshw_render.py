@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import struct
+
+from scripts.reshw_render import GlyphRasterizer, build_atlas
+
+
+def build_container(glyphs: dict[str, list[int]]) -> bytes:
+    body = b"".join(
+        name.encode("utf-8") + b"\x00" + struct.pack("<2I", 1, len(values)) + struct.pack(f"<{len(values)}h", *values)
+        for name, values in glyphs.items()
+    )
+    return struct.pack("<6I", 1, 0, 320, 240, 0, len(glyphs)) + body
+
+
+def test_rasterizer_caches_per_size() -> None:
+    rasterizer = GlyphRasterizer.from_container(build_container({"A": [0, 0, 100, 100], "B": [0, 100, 100, 0]}))
+
+    first = rasterizer.render(ord("A"), 16)
+    assert rasterizer.render(ord("A"), 16) is first
+    assert rasterizer.render(ord("A"), 32).size == (32, 32)
+    assert rasterizer.cache_info().hits == 1
+    assert first.getpixel((0, 0)) == 255 and first.getpixel((15, 15)) == 255
+    assert first.getpixel((15, 0)) == 0
+
+
+def test_atlas_matches_serial_and_parallel_render(tmp_path) -> None:
+    source = tmp_path / "font.zkml"
+    source.write_bytes(build_container({chr(0x41 + index): [0, index * 10, 100, 100 - index * 10] for index in range(5)}))
+    rasterizer = GlyphRasterizer.from_container(source.read_bytes())
+
+    serial = build_atlas(rasterizer, 8, columns=3)
+    parallel = build_atlas(rasterizer, 8, columns=3, workers=2, source=source)
+    assert serial.size == (24, 16)
+    assert serial.tobytes() == parallel.tobytes()
@@ -1,4 +1,21 @@
-from scripts.scan_strings import DEFAULT_PATTERN, extract_strings, filter_matches, hexdump
+import json
+import sys
+
+import pytest
+
+from scripts.report_format import write_jsonl
+from scripts.scan_strings import (
+    DEFAULT_PATTERN,
+    extract_strings,
+    extract_strings_fast,
+    filter_matches,
+    hexdump,
+    MAX_CHUNK_GROWTH,
+    iter_report_jsonl,
+    iter_string_chunks,
+    main,
+    scan_chunked,
+)
 
 
 def test_extract_strings_detects_ascii_sequences():
@@ -26,3 +43,103 @@ def test_hexdump_formats_rows():
     assert lines[0].startswith("00000000")
     assert lines[1].startswith("00000010")
     assert len(lines) == 2
+    assert lines[0].endswith("  " + "." * 16)
+    assert lines[1].endswith("  " + "." * 15 + " ")
+
+
+def test_fast_engine_matches_legacy_engine():
+    payload = b"\x00\x01/dev/ttyS0\x00ab\x00caf\xc3\xa9 UART\x1f\xff\xfeBIN-tail"
+    legacy = extract_strings(payload, min_length=4)
+    fast = extract_strings_fast(payload, min_length=4)
+    assert fast == legacy
+
+
+def test_fast_engine_filters_in_same_pass():
+    payload = b"/dev/ttyACM0\x00IGNORED\x00baud=115200\x00"
+    fast = extract_strings_fast(payload, min_length=4, pattern=DEFAULT_PATTERN)
+    legacy = filter_matches(extract_strings(payload, min_length=4), DEFAULT_PATTERN)
+    assert fast == legacy
+    assert [item.offset for item in fast] == [0, 21]
+
+
+def test_fast_engine_filter_agrees_with_legacy_on_multibyte_text():
+    payload = "\x00café\x00Caf\xe9!\x00\u212aIT OK\x00ab\u017f12\x00é x\x00".encode("utf-8")
+    for pattern in (r"caf.$", r"\w+é", r"^kit", r"\Aabs\d", r"é\s\w", r"caf.!", r"café"):
+        legacy = filter_matches(extract_strings(payload, min_length=3), pattern)
+        assert extract_strings_fast(payload, min_length=3, pattern=pattern) == legacy, pattern
+        assert legacy, pattern
+
+
+def test_chunked_scan_keeps_strings_across_chunk_boundaries():
+    payload = (b"\x00\x01noise\x02/dev/ttyS1 baud\x00" + b"\xff" * 7 + b"\x00") * 40
+    whole = extract_strings_fast(payload, min_length=4, pattern=DEFAULT_PATTERN)
+    for engine in ("fast", "legacy"):
+        assert scan_chunked(payload, 4, DEFAULT_PATTERN, engine, chunk_size=13) == whole
+
+
+def test_chunks_stay_bounded_on_long_printable_runs():
+    payload = b"\x00" + b"A" * 1000 + b"\x00baud\x00"
+    chunks = list(iter_string_chunks(payload, 16))
+    assert max(len(chunk) for _, chunk in chunks) == 16 * MAX_CHUNK_GROWTH
+    assert b"".join(chunk for _, chunk in chunks) == payload
+    found = scan_chunked(payload, 4, "a|baud", "fast", chunk_size=16)
+    pieces = [(1 + 64 * n, 64) for n in range(15)] + [(961, 40), (1002, 4)]
+    assert [(item.offset, len(item.raw)) for item in found] == pieces
+
+
+def test_fast_engine_tags_wide_and_gb2312_strings():
+    payload = (
+        b"\x00\x00" + "Geen upgradebestand".encode("utf-16-le") + b"\x00\x00"
+        + "字库芯片".encode("gb2312") + b"\x00UART0\x00"
+    )
+    found = extract_strings_fast(payload, min_length=4, encodings=("8bit", "utf-16le", "gb2312"))
+    assert [(item.encoding, item.text) for item in found] == [
+        ("utf-16le", "Geen upgradebestand"),
+        ("gb2312", "字库芯片"),
+        ("ascii", "UART0"),
+    ]
+    filtered = extract_strings_fast(payload, 4, pattern="upgrade|uart", encodings=("utf-16le", "8bit"))
+    assert [item.text for item in filtered] == ["Geen upgradebestand", "UART0"]
+
+
+def test_chunked_scan_does_not_split_wide_strings():
+    payload = (b"\x01" * 11 + "Openen mislukt".encode("utf-16-le") + b"\x00\x00") * 9
+    encodings = ("8bit", "utf-16le")
+    whole = extract_strings_fast(payload, 4, "mislukt", encodings)
+    assert len(whole) == 9
+    assert scan_chunked(payload, 4, "mislukt", "fast", chunk_size=17, encodings=encodings) == whole
+
+
+def test_jsonl_records_stream_each_match(tmp_path):
+    payload = b"\x00/dev/ttyS0\x00\x01baud=115200\x00"
+    destination = tmp_path / "strings.jsonl"
+    count = write_jsonl(iter_report_jsonl(iter(extract_strings_fast(payload, 4, DEFAULT_PATTERN)), payload), destination)
+
+    records = [json.loads(line) for line in destination.read_text(encoding="utf-8").splitlines()]
+    assert count == 2
+    assert [(record["offset"], record["text"]) for record in records] == [(1, "/dev/ttyS0"), (13, "baud=115200")]
+    assert bytes.fromhex(records[0]["context"]) == payload
+
+
+def test_cli_defaults_to_8bit_and_rejects_encodings_with_legacy(tmp_path, monkeypatch, capsys):
+    source = tmp_path / "app.bin"
+    source.write_bytes(b"\x00update ok\x00" + "update wide".encode("utf-16le") + b"\x00\x00")
+    outputs = {}
+    for engine in ("fast", "legacy"):
+        outputs[engine] = tmp_path / f"{engine}.jsonl"
+        argv = ["scan_strings.py", "--input", str(source), "--engine", engine, "--format", "jsonl"]
+        monkeypatch.setattr(sys, "argv", argv + ["--output", str(outputs[engine])])
+        main()
+    fast = outputs["fast"].read_text(encoding="utf-8")
+    assert fast == outputs["legacy"].read_text(encoding="utf-8")
+    assert [json.loads(line)["text"] for line in fast.splitlines()] == ["update ok"]
+
+    argv = ["scan_strings.py", "--input", str(source), "--engine", "legacy", "--encodings", "utf-16le"]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit, match="legacy"):
+        main()
+
+    monkeypatch.setattr(sys, "argv", ["scan_strings.py", "--input", str(source), "--encodings", "8bit,utf16"])
+    with pytest.raises(SystemExit):
+        main()
+    assert "unknown encoding families utf16" in capsys.readouterr().err
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from scripts.scan_strings import iter_all_strings
+from scripts.string_index import load_or_build
+
+
+def test_index_answers_queries_and_reuses_existing_build(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    payload = b"\x00/dev/ttyS0\x00\x01Upgrade ready\x00\x02baud=115200\x00"
+    source.write_bytes(payload)
+    index_dir = tmp_path / "index"
+
+    with load_or_build(source, 5, index_dir, lambda: iter_all_strings(payload, 5)) as index:
+        assert len(index) == 3
+        assert [row[1] for row in index.query(pattern=r"tty|BAUD")] == ["/dev/ttyS0", "baud=115200"]
+        assert [row[1] for row in index.query(substring="READY")] == ["Upgrade ready"]
+        assert [row[0] for row in index.query(start=2, end=0x1C)] == [0x0D]
+
+    def fail_scan():
+        raise AssertionError("index should not be rebuilt for an unchanged binary")
+
+    with load_or_build(source, 5, index_dir, fail_scan) as index:
+        assert [row[1] for row in index.query(pattern=r"^upgrade")] == ["Upgrade ready"]
+
+
+def test_index_rebuilds_when_binary_changes(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    index_dir = tmp_path / "index"
+    source.write_bytes(b"first-string\x00")
+    with load_or_build(source, 4, index_dir, lambda: iter_all_strings(b"first-string\x00", 4)) as index:
+        first_path = index.path
+
+    source.write_bytes(b"\x00second-string\x00")
+    with load_or_build(source, 4, index_dir, lambda: iter_all_strings(b"\x00second-string\x00", 4)) as index:
+        assert index.path != first_path
+        assert index.query() == [(1, "second-string", b"second-string", "ascii")]
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from scripts.app_message_table import decode_c_string
+from scripts.string_table import StringTable
+
+
+def test_string_table_matches_find_for_every_offset() -> None:
+    payload = b"Gereed\x00\x00Fout \xe4\xb8\xad\x00\xff\xfe\x00tail"
+    table = StringTable(payload)
+
+    for offset in range(len(payload)):
+        assert table.end(offset) == payload.find(b"\x00", offset)
+    assert table.ends(np.arange(len(payload))).tolist() == [payload.find(b"\x00", i) for i in range(len(payload))]
+    assert table.text(8) == "Fout 中"
+    assert table.text(17) == "ÿþ"
+    assert decode_c_string(payload, 8, table) == decode_c_string(payload, 8) == ("Fout 中", 17)
+
+
+def test_string_table_caches_and_rejects_unterminated() -> None:
+    table = StringTable(b"Ready\x00tail")
+
+    assert table.text(1) is table.text(1)
+    with pytest.raises(ValueError):
+        table.text(6)
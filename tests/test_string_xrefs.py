@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import struct
+
+from scripts.scan_strings import build_report, extract_strings_fast, resolve_xrefs
+from scripts.string_xrefs import XrefIndex
+
+BASE = 0x0020_0000
+
+
+def _image() -> bytes:
+    image = bytearray(0x100)
+    struct.pack_into("<I", image, 0x00, 0xE59F0010)  # arm: ldr r0, [pc, #0x10] -> pool 0x18
+    struct.pack_into("<I", image, 0x18, BASE + 0x40)
+    struct.pack_into("<H", image, 0x20, 0x4901)  # thumb: ldr r1, [pc, #4] -> pool 0x28
+    struct.pack_into("<I", image, 0x28, BASE + 0x40)
+    struct.pack_into("<I", image, 0x30, 0xE28F2008)  # arm: adr r2, 0x40
+    struct.pack_into("<HH", image, 0x70, 0xF2AF, 0x0434)  # thumb: adr.w r4, 0x40
+    image[0x40:0x48] = b"Ready!\x00\x00"
+    return bytes(image)
+
+
+def test_xref_index_finds_pools_and_loaders() -> None:
+    xref = XrefIndex(_image(), BASE).resolve(BASE + 0x40)
+
+    assert xref.pool_addrs == (BASE + 0x18, BASE + 0x28)
+    assert [(loader.address - BASE, loader.mode, loader.kind, loader.literal_addr) for loader in xref.loaders] == [
+        (0x00, "arm", "ldr", BASE + 0x18),
+        (0x20, "thumb", "ldr", BASE + 0x28),
+        (0x30, "arm", "adr", None),
+        (0x70, "thumb", "adr.w", None),
+    ]
+
+
+def test_report_lists_xrefs_per_match(tmp_path) -> None:
+    payload = _image()
+    matches = extract_strings_fast(payload, 5, r"ready")
+    report = build_report(matches, payload, tmp_path / "app.bin", "ready", 5, resolve_xrefs(payload, matches, BASE))
+
+    assert "- VA: 0x00200040" in report
+    assert "- Literal pools: 0x00200018, 0x00200028" in report
+    assert "0x00200000 (arm ldr via 0x00200018)" in report
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import random
+import time
+import zlib
+
+from scripts.trial_decompress import Region, find_regions, scan_parallel, scan_region, try_decompress
+
+
+def _plain(seed: int, size: int) -> bytes:
+    rng = random.Random(seed)
+    words = [b"Gereed", b"Fout", b"Printkop", b"Inkt", b"Batterij", b"Bezig"]
+    return b" ".join(rng.choice(words) + str(rng.randrange(1000)).encode() for _ in range(size // 8))[:size]
+
+
+def _noise(seed: int, size: int) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+def test_try_decompress_reports_consumed_and_output_sizes() -> None:
+    text = _plain(1, 20000)
+    stream = zlib.compress(text, 9)
+    payload = b"\x00" * 16 + stream + b"\xff" * 32
+
+    assert try_decompress(payload, 16, "zlib") == (len(stream), len(text), True)
+    assert try_decompress(payload, 18, "deflate") == (len(stream) - 6, len(text), True)  # no header, no Adler-32
+    assert try_decompress(payload, 17, "zlib") is None
+    input_size, output_size, complete = try_decompress(payload, 16, "zlib", max_output=4096)
+    assert output_size == 4096 and not complete
+
+
+def test_scan_region_finds_every_codec_and_skips_covered_offsets() -> None:
+    chunks = [
+        _noise(0, 700),
+        zlib.compress(_plain(2, 5000)),
+        _noise(3, 300),
+        gzip.compress(_plain(4, 5000), mtime=0),
+        _noise(5, 300),
+        lzma.compress(_plain(6, 5000), format=lzma.FORMAT_XZ),
+        _noise(7, 300),
+        lzma.compress(_plain(8, 5000), format=lzma.FORMAT_ALONE),
+        _noise(9, 300),
+        bz2.compress(_plain(10, 5000)),
+        _noise(11, 300),
+    ]
+    payload = b"".join(chunks)
+    starts = [sum(len(chunk) for chunk in chunks[:index]) for index in range(1, len(chunks), 2)]
+
+    hits = scan_region(payload, Region(0, len(payload)), lead_in=0, raw_scan=0, max_output=1 << 20)
+
+    assert [(hit.offset, hit.codec) for hit in hits] == list(zip(starts, ["zlib", "gzip", "xz", "lzma", "bz2"]))
+    assert all(hit.complete and hit.output_size == 5000 for hit in hits)
+
+
+def test_scan_parallel_over_found_regions_writes_raw_deflate(tmp_path) -> None:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    raw = compressor.compress(_plain(12, 200000)) + compressor.flush()
+    payload = b"\x00" * 8192 + raw + b"\x00" * 8192
+    source = tmp_path / "blob.bin"
+    source.write_bytes(payload)
+
+    regions = find_regions(payload, 1024, 256)
+    assert regions and regions[0].start <= 8192 < regions[0].end
+    hits, skipped = scan_parallel(source, regions, workers=2, lead_in=512, raw_scan=64)
+
+    assert skipped == 0
+    assert [(hit.offset, hit.codec, hit.output_size) for hit in hits] == [(8192, "deflate", 200000)]
+
+
+def test_time_budget_stops_running_regions(tmp_path) -> None:
+    stream = zlib.compress(_plain(13, 50000))
+    payload = _noise(14, 4096) + stream + _noise(15, 4096)
+    source = tmp_path / "blob.bin"
+    source.write_bytes(payload)
+    region = Region(0, len(payload))
+
+    assert try_decompress(payload, 4096, "zlib", deadline=time.monotonic()) is None
+    assert scan_region(payload, region, 0, 64, 1 << 20, deadline=time.monotonic()) == []
+    assert [hit.offset for hit in scan_region(payload, region, 0, 64, 1 << 20)] == [4096]
+
+    hits, skipped = scan_parallel(source, [region, Region(4096, 8192)], workers=1, time_budget=0.0)
+    assert hits == [] and skipped == 2
+
+
+def test_failing_region_is_skipped_and_others_kept(tmp_path, caplog) -> None:
+    stream = zlib.compress(_plain(16, 20000))
+    payload = _noise(17, 2048) + stream + _noise(18, 2048)
+    source = tmp_path / "blob.bin"
+    source.write_bytes(payload)
+
+    broken = Region(None, 4096)  # type: ignore[arg-type]
+    hits, skipped = scan_parallel(source, [broken, Region(0, len(payload))], workers=1, raw_scan=0)
+
+    assert [(hit.offset, hit.codec) for hit in hits] == [(2048, "zlib")]
+    assert skipped == 1
+    assert "Region(start=None, end=4096) failed: TypeError" in caplog.text
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+
+from scripts.arm_disasm import FunctionDecoder
+from scripts.upgrade_orchestrator_callgraph import build_call_graph, disassemble_function, extract_calls, main
+from tests.test_arm_disasm import BASE, build_image
+
+
+def test_call_graph_follows_mode_switches_once_per_function() -> None:
+    decoder = FunctionDecoder(build_image(), BASE)
+
+    graph = build_call_graph(decoder, [BASE + 0x101, BASE + 0x200])
+
+    assert sorted(graph.functions) == [BASE + 0x101, BASE + 0x200]
+    assert [graph.functions[pointer].mode for pointer in sorted(graph.functions)] == ["thumb", "arm"]
+    assert graph.edges == [(BASE + 0x101, BASE + 0x200), (BASE + 0x200, BASE + 0x101)]
+    assert len(decoder) == 2 and not graph.unexpanded
+    assert '"0x00200101" -> "0x00200200";' in graph.to_dot()
+
+    shallow = build_call_graph(FunctionDecoder(build_image(), BASE), [BASE + 0x101], max_depth=0)
+    assert list(shallow.functions) == [BASE + 0x101]
+    assert shallow.unexpanded == {BASE + 0x200: "depth limit"}
+
+
+def test_extract_calls_reuses_first_decode() -> None:
+    image = build_image()
+    instructions = disassemble_function(image[0x100:0x200], BASE + 0x100, 0x100)
+    (call,) = extract_calls(instructions)
+    assert (call.address, call.target, call.kind) == (BASE + 0x108, "0x00200200", "direct")
+
+
+def test_cli_writes_graph(tmp_path) -> None:
+    source = tmp_path / "app.bin"
+    source.write_bytes(build_image())
+    argv = ["--input", str(source), "--root-address", "0x200100", "--graph", "--no-text"]
+    argv += ["--output-json", str(tmp_path / "calls.json"), "--output-graph-json", str(tmp_path / "graph.json")]
+    assert main(argv + ["--output-dot", str(tmp_path / "graph.dot")]) == 0
+
+    graph = json.loads((tmp_path / "graph.json").read_text(encoding="utf-8"))
+    assert graph["roots"] == ["0x00200101"]
+    assert [(edge["caller"], edge["callee"]) for edge in graph["edges"]] == [
+        ("0x00200101", "0x00200200"),
+        ("0x00200200", "0x00200101"),
+    ]
+    assert (tmp_path / "graph.dot").read_text(encoding="utf-8").startswith("digraph callgraph {")